@@ -0,0 +1,142 @@
+# agendamento.py
+"""Cálculo vetorizado das datas de início/fim das tarefas selecionadas.
+
+Modos de agendamento (os mesmos da sidebar do app):
+- 'chain_seq': todas as tarefas em uma única sequência, uma após a outra.
+- 'phase_sequential': cada fase começa quando a anterior termina; dentro da fase as
+  tarefas começam juntas (em paralelo).
+- 'parallel': todas as fases começam na data de início do projeto; dentro de cada
+  fase as tarefas são encadeadas.
+- 'predecessors': caminho crítico sobre a coluna 'predecessores' (ver caminho_critico.py).
+
+Os deslocamentos são calculados em dias; com um calendário (calendario.WorkCalendar)
+eles são dias úteis e a conversão em datas pula fins de semana e feriados.
+"""
+import numpy as np
+import pandas as pd
+
+from caminho_critico import build_edges, critical_path
+
+MODE_CHAIN = 'chain_seq'
+MODE_PHASE_SEQUENTIAL = 'phase_sequential'
+MODE_PARALLEL = 'parallel'
+MODE_PREDECESSORS = 'predecessors'
+
+
+def schedule_mode(chain_seq, phase_sequential, use_predecessors=False):
+    """Converte os checkboxes da sidebar no nome do modo.
+
+    Predecessoras explícitas têm prioridade, depois chain_seq, depois phase_sequential.
+    """
+    if use_predecessors:
+        return MODE_PREDECESSORS
+    if chain_seq:
+        return MODE_CHAIN
+    if phase_sequential:
+        return MODE_PHASE_SEQUENTIAL
+    return MODE_PARALLEL
+
+
+def phase_codes(fases, phases_ordered):
+    """Posição de cada tarefa em phases_ordered (-1 se a fase não estiver na lista)."""
+    order = {ph: i for i, ph in enumerate(phases_ordered)}
+    return pd.Series(fases).map(order).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def compute_offsets(durations, codes, n_phases, mode):
+    """Calcula os deslocamentos (em dias, a partir do início do projeto) de início e fim.
+
+    durations: array float com a duração de cada tarefa, na ordem do cronograma.
+    codes: posição da fase de cada tarefa (ver phase_codes); -1 gera NaN.
+    Retorna (start_offsets, end_offsets) como arrays float.
+    """
+    durations = np.asarray(durations, dtype=float)
+    codes = np.asarray(codes, dtype=np.int64)
+
+    if mode == MODE_CHAIN:
+        starts = np.cumsum(durations) - durations
+        return starts, starts + durations
+
+    valid = codes >= 0
+    if mode == MODE_PHASE_SEQUENTIAL:
+        # duração de cada fase = maior tarefa da fase; a fase seguinte começa no fim dela
+        spans = np.zeros(n_phases, dtype=float)
+        np.maximum.at(spans, codes[valid], durations[valid])
+        phase_starts = np.cumsum(spans) - spans
+        starts = np.where(valid, phase_starts[np.where(valid, codes, 0)], np.nan)
+    elif mode == MODE_PARALLEL:
+        # cumsum por fase: cada fase encadeia suas tarefas a partir do início do projeto
+        starts = pd.Series(durations).groupby(codes).cumsum().to_numpy() - durations
+        starts = np.where(valid, starts, np.nan)
+    else:
+        raise ValueError(f"Modo de agendamento desconhecido: {mode}")
+    return starts, starts + durations
+
+
+def offsets_to_dates(project_start, offsets, calendar=None, is_end=False):
+    """Converte deslocamentos em dias (float, NaN permitido) em datetime64[ns].
+
+    Sem calendário são dias corridos; com calendário, dias úteis. As datas são
+    arredondadas ao segundo, sem o resíduo das somas em ponto flutuante.
+    """
+    if calendar is not None:
+        return calendar.offsets_to_dates(project_start, offsets, is_end=is_end)
+    origin = pd.Timestamp(project_start).to_datetime64().astype('datetime64[ns]')
+    deltas = pd.to_timedelta(np.asarray(offsets, dtype=float), unit='D').round('s').to_numpy()
+    return origin + deltas
+
+
+def start_end_dates(project_start, start_off, end_off, calendar=None):
+    """Datas (start, end) a partir dos deslocamentos de início e fim."""
+    starts = offsets_to_dates(project_start, start_off, calendar)
+    ends = offsets_to_dates(project_start, end_off, calendar, is_end=True)
+    if calendar is not None:
+        # tarefas de duração zero não podem "terminar" antes de começar
+        ends = np.where(np.isnat(ends), ends, np.maximum(ends, starts))
+    return starts, ends
+
+
+def _assign_dates(out, project_start, start_off, end_off, calendar):
+    out['start'], out['end'] = start_end_dates(project_start, start_off, end_off, calendar)
+
+
+def schedule(df_sel, phases_ordered, project_start, mode, calendar=None):
+    """Retorna uma cópia de df_sel com as colunas 'start' e 'end' calculadas.
+
+    df_sel deve estar na ordem do cronograma (fase, numero), como a lista montada no app.
+    calendar: calendario.WorkCalendar opcional; sem ele as durações são dias corridos.
+    """
+    out = df_sel.copy()
+    if out.empty:
+        out['start'] = pd.Series(dtype='datetime64[ns]')
+        out['end'] = pd.Series(dtype='datetime64[ns]')
+        return out
+    durations = out['duracao'].astype(float).fillna(1).to_numpy()
+    if mode == MODE_PREDECESSORS:
+        # pode levantar caminho_critico.CycleError
+        src, dst = build_edges(out['numero'], out['predecessores'])
+        cpm = critical_path(durations, src, dst)
+        _assign_dates(out, project_start, cpm['es'].to_numpy(), cpm['ef'].to_numpy(), calendar)
+        out['folga'] = cpm['folga'].to_numpy()
+        out['critica'] = cpm['critica'].to_numpy()
+        return out
+    if mode == MODE_CHAIN:
+        codes = np.zeros(len(out), dtype=np.int64)
+    else:
+        codes = phase_codes(out['fase'], phases_ordered)
+    start_off, end_off = compute_offsets(durations, codes, len(phases_ordered), mode)
+    _assign_dates(out, project_start, start_off, end_off, calendar)
+    return out
+
+
+def phase_summary(df_sel):
+    """Uma linha por fase (na ordem do cronograma): nº de tarefas, início, fim e duração em dias corridos."""
+    if df_sel.empty or 'fase' not in df_sel.columns:
+        return pd.DataFrame(columns=['fase', 'tarefas', 'inicio', 'fim', 'duracao_dias'])
+    summary = (
+        df_sel.groupby('fase', sort=False, observed=True)
+        .agg(tarefas=('fase', 'size'), inicio=('start', 'min'), fim=('end', 'max'))
+        .reset_index()
+    )
+    summary['duracao_dias'] = (summary['fim'] - summary['inicio']).dt.days
+    return summary
@@ -1,15 +1,43 @@
 # app.py
+import time
+_imports_started = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from io import BytesIO
-import re # Importando a biblioteca de expressões regulares
+from functools import partial
+from pathlib import Path
+
+from ingestao import SESSION_MEMORY_BUDGET, load_catalog, catalog_from_frame, catalog_cache_stats, catalog_nbytes, bytes_per_task, has_progress, has_three_point, rows_within_budget
+from agendamento import MODE_PREDECESSORS, schedule_mode
+from reagendamento import cached_schedule, phase_cache_stats, schedule_incremental
+from caminho_critico import CycleError
+from selecao import get_selection_index
+from historico import get_reopened_schedule, get_stored_catalog, has_history, list_catalogs
+from medicao import instrumentation_enabled, latency_summary, measured, stage, start_run
+from exportacao import XLSX_MIME, export_csv, export_xlsx
+from gantt import GANTT_DETAIL_LIMIT, get_gantt_figure
+from calendario import ALL_SITES, DEFAULT_WEEKDAYS, WEEKDAY_LABELS, holiday_sites, load_holidays, site_calendar
+# os módulos das seções opcionais (chatbot, equipes, Monte Carlo, cenários, histórico de
+# versões, portfólio) são importados só quando a seção é usada, não no arranque do processo
+
+
+@st.cache_resource
+def logo_bytes():
+    """Logotipo lido do disco uma vez por processo (não a cada rerun)."""
+    return Path("logotipoache.png").read_bytes()
+
 
 st.set_page_config(
     page_title="Gerador de Cronograma - Embalagens",
-    page_icon="logotipoache.png",
+    page_icon=logo_bytes(),
     layout="wide")
 
+# medição por etapa (opcional): CRONOGRAMA_MEDICAO=1 ou ?medicao=1 na URL
+run_timer = start_run(instrumentation_enabled(st.query_params))
+if run_timer is not None:
+    # no arranque do processo é o custo real dos imports; nos reruns, módulos já carregados
+    run_timer.record('importacoes', (time.perf_counter() - _imports_started) * 1000)
+
 # --- INÍCIO: INICIALIZAÇÃO DO SESSION STATE ---
 # Essencial para que o chatbot possa se comunicar com os filtros da sidebar
 if 'chatbot_filters' not in st.session_state:
@@ -32,97 +60,40 @@ st.markdown(
 # --- INÍCIO: LÓGICA DO CHATBOT ---
 def parse_command(text, all_categorias, all_fases, all_condicoes):
     """Interpreta o texto do usuário para extrair filtros."""
-    text_lower = text.lower()
-    parsed = {'categoria': None, 'fase_condicoes': {}}
-
-    # 1. Encontrar a Categoria
-    for cat in all_categorias:
-        if cat.lower() in text_lower:
-            parsed['categoria'] = cat
-            break # Pega a primeira que encontrar
-
-    # 2. Encontrar a Fase
-    target_fase = None
-    for fase in all_fases:
-        if fase.lower() in text_lower:
-            target_fase = fase
-            break # Pega a primeira que encontrar
-
-    # 3. Encontrar as Condições (e associar com a fase encontrada, se houver)
-    found_condicoes = []
-    for cond in all_condicoes:
-        # Usamos expressões regulares para encontrar a condição como uma palavra isolada
-        # Ex: encontrar 'A' mas não o 'a' em 'fase'
-        if re.search(r'\b' + re.escape(cond.lower()) + r'\b', text_lower):
-            found_condicoes.append(cond)
-
-    if target_fase and found_condicoes:
-        # Associa as condições à fase específica encontrada
-        parsed['fase_condicoes'][target_fase] = found_condicoes
-    # Se condições foram encontradas, mas NENHUMA fase foi especificada...
-    elif not target_fase and found_condicoes:
-        # ...então aplicamos essas condições a TODAS as fases disponíveis.
-        st.info(f"Condições {found_condicoes} aplicadas a todas as fases por padrão, pois nenhuma fase foi especificada.")
-        for fase in all_fases:
-            parsed['fase_condicoes'][fase] = found_condicoes
+    from comandos import get_matcher
 
+    # o matcher (vocabulário sem acentos, tolerante a erros de digitação) é compilado
+    # uma vez por catálogo e reaproveitado entre comandos
+    parsed = get_matcher(all_categorias, all_fases, all_condicoes).parse(text)
+    if parsed.pop('aplicado_a_todas'):
+        found_condicoes = next(iter(parsed['fase_condicoes'].values()), [])
+        st.info(f"Condições {found_condicoes} aplicadas a todas as fases por padrão, pois nenhuma fase foi especificada.")
     return parsed
 
 # --- FIM: LÓGICA DO CHATBOT ---
 
 
-# ---------- Helpers para detectar colunas ----------
-def find_col(df, keywords):
-    """Encontra a primeira coluna cujo nome contenha qualquer uma das keywords (case-insensitive)."""
-    cols = df.columns.tolist()
-    lower = [c.lower() for c in cols]
-    for kw in keywords:
-        for i, c in enumerate(lower):
-            if kw.lower() in c:
-                return cols[i]
-    return None
-
-def normalize_df_columns(df):
-    # tenta detectar colunas principais e renomear para nomes simples em PT
-    mapping = {}
-    if find_col(df, ['num', 'número', 'numero', 'id']):
-        mapping[find_col(df, ['num', 'número', 'numero', 'id'])] = 'numero'
-    if find_col(df, ['classif', 'classificação', 'classificacao']):
-        mapping[find_col(df, ['classif', 'classificação', 'classificacao'])] = 'classificacao'
-    if find_col(df, ['categ', 'categoria']):
-        mapping[find_col(df, ['categ', 'categoria'])] = 'categoria'
-    if find_col(df, ['fase']):
-        mapping[find_col(df, ['fase'])] = 'fase'
-    if find_col(df, ['condi', 'condição', 'condicao']):
-        mapping[find_col(df, ['condi', 'condição', 'condicao'])] = 'condicao'
-    if find_col(df, ['nome', 'tarefa', 'atividade']):
-        mapping[find_col(df, ['nome', 'tarefa', 'atividade'])] = 'nome'
-    if find_col(df, ['dur', 'duração', 'duracao', 'days']):
-        mapping[find_col(df, ['dur', 'duração', 'duracao', 'days'])] = 'duracao'
-    # colunas opcionais
-    if find_col(df, ['como fazer', 'comofazer', 'como_fazer']):
-        mapping[find_col(df, ['como fazer', 'comofazer', 'como_fazer'])] = 'como_fazer'
-    if find_col(df, ['doc', 'documento']):
-        mapping[find_col(df, ['doc', 'documento'])] = 'documento_referencia'
-
-    df = df.rename(columns=mapping)
-    return df
-
 # ---------- Ler arquivo ----------
 uploaded = st.file_uploader("Upload do arquivo .xlsx (ou .csv) com as tarefas", type=['xlsx', 'xls', 'csv'])
+stored_catalog = None
+if not uploaded and has_history():
+    # catálogos já normalizados e salvos no histórico reabrem sem novo upload nem parse
+    stored = list_catalogs()
+    labels = {'Exemplo embutido': None} | {f"{r.nome or r.hash[:12]} · {r.tarefas} tarefas · salvo em {r.criado_em}": r.hash for r in stored.itertuples()}
+    choice = st.selectbox("Ou reabra um catálogo salvo no histórico", list(labels), key='catalogo_salvo')
+    if labels[choice] is not None:
+        stored_catalog = get_stored_catalog(labels[choice])
 if uploaded:
     try:
-        if uploaded.name.lower().endswith('.csv'):
-            # tenta detectar separador comum, mas por segurança usa sep=";"
-            try:
-                df_raw = pd.read_csv(uploaded, sep=";")
-            except:
-                df_raw = pd.read_csv(uploaded)
-        else:
-            df_raw = pd.read_excel(uploaded, engine='openpyxl')
+        # o catálogo normalizado fica em cache pelo hash do conteúdo: reruns e outras sessões
+        # com o mesmo arquivo não fazem novo parse
+        with stage('catalogo'):
+            catalog = load_catalog(uploaded.getvalue(), uploaded.name)
     except Exception as e:
         st.error(f"Erro ao ler o arquivo: {e}")
         st.stop()
+elif stored_catalog is not None:
+    catalog = stored_catalog
 else:
     st.info("Nenhum arquivo carregado ainda — usando um exemplo pequeno para demonstração.")
     # exemplo mínimo
@@ -136,32 +107,29 @@ else:
         'Duração': [5,10,5,5,7,3],
         'Como Fazer': ['Texto.1','Texto.2','Texto.3','Texto.4','Texto.5','Texto.6']
     }
-    df_raw = pd.DataFrame(sample)
+    with stage('catalogo', len(sample['Número'])):
+        catalog = catalog_from_frame(pd.DataFrame(sample), key=('exemplo',))
 
-df = normalize_df_columns(df_raw.copy())
+df, raw_columns = catalog.df, catalog.raw_columns
 
 # Garante colunas mínimas
 required = ['numero','fase','condicao','nome','duracao']
 missing = [c for c in required if c not in df.columns]
 if missing:
     st.warning(f"O arquivo não tem todas as colunas esperadas. Colunas faltando (esperadas): {missing}. Tente mapear manualmente ou renomear no arquivo.")
-    st.write("Colunas detectadas no arquivo:", df_raw.columns.tolist())
+    st.write("Colunas detectadas no arquivo:", raw_columns)
 
-# normaliza duracao
-if 'duracao' in df.columns:
-    try:
-        df['duracao'] = df['duracao'].astype(str).str.extract('(\\d+)').astype(float)
-    except:
-        df['duracao'] = pd.to_numeric(df['duracao'], errors='coerce')
-    df['duracao'] = pd.to_numeric(df['duracao'], errors='coerce').fillna(1.0)
-else:
+duration_issues = df.attrs.get('duracao_nao_interpretada')
+if duration_issues:
+    examples = ', '.join(f"linha {row}: '{text}'" for row, text in duration_issues['exemplos'][:5])
+    st.warning(f"{duration_issues['linhas']} tarefa(s) com duração não reconhecida (usando 1 dia). Ex.: {examples}")
+
+if 'duracao' not in df.columns:
     st.error("Coluna de duração não encontrada — não é possível continuar.")
-    st.write("Colunas detectadas no arquivo:", df_raw.columns.tolist())
+    st.write("Colunas detectadas no arquivo:", raw_columns)
     st.write("Colunas após normalização:", df.columns.tolist())
     st.stop()
 
-df['condicao'] = df['condicao'].astype(str).str.strip()
-
 
 # --- INÍCIO: INTERFACE DO CHATBOT ---
 st.subheader("🤖 Use linguagem natural para filtrar (opcional)")
@@ -179,7 +147,7 @@ if st.button("Aplicar Comando"):
     st.session_state.chatbot_filters = parse_command(user_command, all_cats, all_phases, all_conds)
 # --- FIM: INTERFACE DO CHATBOT ---
 
-st.sidebar.image("logotipoache.png", use_container_width=True)
+st.sidebar.image(logo_bytes(), use_container_width=True)
 # ---------- Filtros básicos ----------
 st.sidebar.header("Filtros do projeto")
 start_date = st.sidebar.date_input("Data de início do projeto", value=pd.Timestamp.today().date())
@@ -196,18 +164,21 @@ selected_categoria = st.sidebar.selectbox(
     index=default_cat_index
 )
 
-if selected_categoria != 'Todos' and 'categoria' in df.columns:
-    df = df[df['categoria'] == selected_categoria]
-
-phases = list(df['fase'].dropna().unique())
+# índice (categoria, fase, condição) -> linhas, construído uma vez por catálogo
+with stage('indice_selecao', len(df)):
+    selection_index = get_selection_index(catalog)
+phases = selection_index.phases(selected_categoria)
 phases_ordered = phases
 st.sidebar.markdown(f"**Fases detectadas:** {len(phases_ordered)}")
+cache_stats = catalog_cache_stats()
+st.sidebar.caption(f"Cache de catálogos: {cache_stats['entradas']} em memória · {cache_stats['acertos']} acertos / {cache_stats['faltas']} faltas")
+st.sidebar.caption(f"Catálogo compartilhado: {catalog_nbytes(df) / 2**20:.1f} MB · {bytes_per_task(df):.0f} bytes por tarefa")
 
 
 
 st.sidebar.subheader("Condições por fase (Sempre é sempre incluída)")
 phase_conditions = {}
-possible_conditions = sorted(list(df['condicao'].dropna().unique()))
+possible_conditions = selection_index.conditions(selected_categoria)
 option_conditions = [c for c in possible_conditions if c.lower() != 'sempre']
 if not option_conditions:
     option_conditions = ['A','B','C']
@@ -238,114 +209,279 @@ phase_sequential = st.sidebar.checkbox(
 )
 chain_seq = st.sidebar.checkbox("Encadear tarefas sequencialmente (uma continua após a outra)", value=False)
 st.sidebar.markdown("Se 'Encadear tarefas' for ativo: todas as tarefas selecionadas seguem em sequência única (ignora fase->fase).")
+use_predecessors = False
+if 'predecessores' in df.columns:
+    use_predecessors = st.sidebar.checkbox(
+        "Usar predecessoras da planilha (caminho crítico)",
+        value=False,
+        help="Cada tarefa começa quando todas as suas predecessoras terminam. Ignora as opções acima."
+    )
 
-# ... (O RESTO DO CÓDIGO PERMANECE O MESMO) ...
-# ---------- Montar lista de tarefas de saída ----------
-selected_rows = []
-for ph in phases_ordered:
-    conds = phase_conditions.get(ph, [])
-    conds_norm = [c.lower() for c in conds]
-    df_ph = df[df['fase'] == ph].copy()
-    mask = df_ph['condicao'].astype(str).str.lower().isin(conds_norm) | (df_ph['condicao'].astype(str).str.lower() == 'sempre')
-    df_ph = df_ph[mask]
-    selected_rows.append(df_ph)
-
-if selected_rows:
-    df_sel = pd.concat(selected_rows, ignore_index=True)
-else:
-    df_sel = df.iloc[0:0].copy()
+st.sidebar.markdown("### Calendário de trabalho")
+use_workdays = st.sidebar.checkbox("Contar apenas dias úteis (pula fins de semana e feriados)", value=False)
+work_calendar = None
+if use_workdays:
+    weekdays = st.sidebar.multiselect("Dias úteis da semana", WEEKDAY_LABELS, default=DEFAULT_WEEKDAYS)
+    holidays_file = st.sidebar.file_uploader("Feriados / paradas de planta (.csv, .txt ou .xlsx)", type=['csv', 'txt', 'xlsx'], key='feriados')
+    holidays = None
+    if holidays_file:
+        try:
+            holidays = load_holidays(holidays_file.getvalue(), holidays_file.name)
+        except Exception as e:
+            st.sidebar.error(f"Erro ao ler o arquivo de feriados: {e}")
+    site = ALL_SITES
+    if holidays is not None and len(holiday_sites(holidays)) > 1:
+        site = st.sidebar.selectbox("Site / planta", holiday_sites(holidays))
+    try:
+        work_calendar = site_calendar(holidays, site, weekdays)
+    except ValueError as e:
+        st.sidebar.error(str(e))
+
+capacities = None
+if 'equipe' in df.columns:
+    from recursos import DEFAULT_CAPACITY, team_names
+
+    st.sidebar.markdown("### Equipes")
+    if st.sidebar.checkbox("Limitar tarefas simultâneas à capacidade de cada equipe", value=False):
+        capacities = {
+            team: st.sidebar.number_input(f"Pessoas em {team}", min_value=1, value=DEFAULT_CAPACITY, step=1, key=f"cap_{team}")
+            for team in team_names(df)
+        }
+
+status_date = None
+if has_progress(df):
+    st.sidebar.markdown("### Progresso")
+    if st.sidebar.checkbox("Re-prever pelo % concluído (agenda só o trabalho restante)", value=False, key='reprevisao'):
+        status_date = st.sidebar.date_input("Data de status", value=pd.Timestamp.today().date(), key='data_status')
 
-if 'numero' in df_sel.columns:
-    phase_order_map = {ph: i for i, ph in enumerate(phases_ordered)}
-    df_sel['phase_order'] = df_sel['fase'].map(phase_order_map)
-    df_sel = df_sel.sort_values(by=['phase_order', 'numero']).reset_index(drop=True)
-    df_sel = df_sel.drop(columns=['phase_order'])
-else:
-    df_sel = df_sel.reset_index(drop=True)
+# ... (O RESTO DO CÓDIGO PERMANECE O MESMO) ...
+# ---------- Montar lista de tarefas de saída e calcular datas ----------
+# cada fase é um bloco em cache (tarefas + datas): ao mudar as condições de uma fase,
+# só ela é refeita e as fases seguintes só são deslocadas
+project_start = pd.to_datetime(start_date)
+team_usage = None
+try:
+    with stage('agendamento', len(df)) as timing:
+        mode = schedule_mode(chain_seq, phase_sequential, use_predecessors)
+        # blocos de fase já na memória: monta direto, sem consultar o histórico
+        df_sel = cached_schedule(catalog, selected_categoria, phase_conditions, phases_ordered, project_start,
+                                 mode, work_calendar)
+        if df_sel is None and has_history() and not use_predecessors:
+            # versão salva com exatamente estes parâmetros: reabre as datas em vez de recalcular
+            # (no caminho crítico a folga não é guardada, então ele é sempre recalculado)
+            df_sel = get_reopened_schedule(
+                catalog, selected_categoria, project_start, mode, phase_conditions,
+                lambda: selection_index.select(selected_categoria, phase_conditions, phases_ordered), work_calendar
+            )
+        if df_sel is None:
+            df_sel = schedule_incremental(
+                catalog, selected_categoria, phase_conditions, phases_ordered, project_start, mode, work_calendar
+            )
+        timing.rows_out = len(df_sel)
+    if capacities is not None:
+        # nivelamento: nenhuma equipe com mais tarefas ao mesmo tempo do que pessoas
+        from recursos import resource_schedule
+
+        with stage('nivelamento', len(df_sel)):
+            df_sel, team_usage = resource_schedule(
+                df_sel, phases_ordered, project_start,
+                schedule_mode(chain_seq, phase_sequential, use_predecessors), capacities, work_calendar
+            )
+    if status_date is not None:
+        from progresso import reforecast
+
+        # concluídas mantêm as datas; o restante é reagendado a partir da data de status
+        # (com capacidades, nivelado de novo pelas mesmas equipes)
+        with stage('reprevisao', len(df_sel)):
+            df_sel = reforecast(
+                df_sel, phases_ordered, project_start, pd.to_datetime(status_date),
+                schedule_mode(chain_seq, phase_sequential, use_predecessors), work_calendar, capacities
+            )
+except CycleError as e:
+    df_cycle = selection_index.select(selected_categoria, phase_conditions, phases_ordered)
+    st.error(f"{e}. Tarefas no ciclo: {df_cycle['numero'].iloc[e.nodes].tolist()[:20]}")
+    st.stop()
 
 st.header("Resumo das tarefas selecionadas")
 st.write(f"Tarefas selecionadas: {len(df_sel)}")
-st.dataframe(df_sel[['numero','fase','condicao','nome','duracao']].fillna('') if 'numero' in df_sel.columns else df_sel[['fase','condicao','nome','duracao']].fillna(''))
-
-# ---------- Calcular datas (modo fase->fase) ----------
-project_start = pd.to_datetime(start_date)
-df_sel['start'] = pd.NaT
-df_sel['end'] = pd.NaT
-
-if len(df_sel) > 0:
-    if chain_seq:
-        durations = df_sel['duracao'].astype(float).fillna(1)
-        start_offsets = durations.cumsum() - durations
-        df_sel['start'] = project_start + pd.to_timedelta(start_offsets, unit='D')
-        df_sel['end'] = df_sel['start'] + pd.to_timedelta(durations, unit='D')
-    elif phase_sequential:
-        current_phase_start = project_start
-        for ph in phases_ordered:
-            df_ph_idx = df_sel[df_sel['fase'] == ph].index.tolist()
-            if not df_ph_idx:
-                continue
-            ends = []
-            for idx in df_ph_idx:
-                dur = float(df_sel.at[idx, 'duracao'])
-                start_task = current_phase_start
-                end_task = start_task + pd.to_timedelta(dur, unit='D')
-                df_sel.at[idx, 'start'] = start_task
-                df_sel.at[idx, 'end'] = end_task
-                ends.append(end_task)
-            current_phase_start = max(ends) if ends else current_phase_start
-    else:
-        for ph in phases_ordered:
-            df_ph = df_sel[df_sel['fase'] == ph].copy()
-            if df_ph.empty:
-                continue
-            durations = df_ph['duracao'].astype(float).fillna(1)
-            start_offsets = durations.cumsum() - durations
-            starts_ph = project_start + pd.to_timedelta(start_offsets, unit='D')
-            ends_ph = starts_ph + pd.to_timedelta(durations, unit='D')
-            df_sel.loc[df_ph.index, 'start'] = starts_ph
-            df_sel.loc[df_ph.index, 'end'] = ends_ph
-
-df_sel['start'] = pd.to_datetime(df_sel['start'])
-df_sel['end'] = pd.to_datetime(df_sel['end'])
+if status_date is not None and not df_sel.empty:
+    from progresso import forecast_summary
+
+    forecast = forecast_summary(df_sel)
+    st.write(f"Concluídas: **{forecast['concluida']}** · em andamento: **{forecast['em andamento']}** · "
+             f"não iniciadas: **{forecast['nao iniciada']}** · restante: **{forecast['restante_dias']:.0f}** dias de tarefa")
+    st.write(f"Término previsto: **{forecast['fim_previsto']:%d/%m/%Y}** (planejado {forecast['fim_planejado']:%d/%m/%Y}, "
+             f"desvio de **{forecast['deslocamento_fim_dias']}** dias)")
+preview_cols = [c for c in ['numero','fase','condicao','nome','duracao','concluido','situacao'] if c in df_sel.columns]
+preview = df_sel[preview_cols]
+# a tabela enviada ao navegador fica na memória da sessão: limitada ao orçamento
+preview_rows = rows_within_budget(preview)
+if preview_rows < len(preview):
+    st.warning(f"Mostrando as primeiras {preview_rows} tarefas (limite de {SESSION_MEMORY_BUDGET // 2**20} MB por sessão). O cronograma e as exportações usam todas.")
+st.dataframe(preview.head(preview_rows).astype(object).fillna(''))
 
 # ---------- Visualização Gantt (Plotly) ----------
 st.header("Cronograma (Gantt)")
 if df_sel.empty:
     st.info("Nenhuma tarefa selecionada para gerar cronograma.")
 else:
-    df_plot = df_sel.sort_values('start').copy()
-    if 'numero' in df_plot.columns:
-        df_plot['task_label'] = df_plot['fase'].astype(str) + ' - ' + df_plot['numero'].astype(str) + ' - ' + df_plot['nome'].astype(str)
-    else:
-        df_plot['task_label'] = df_plot['fase'].astype(str) + ' - ' + df_plot['nome'].astype(str)
-
-    fig = px.timeline(
-        df_plot,
-        x_start="start",
-        x_end="end",
-        y="fase",
-        color="condicao" if 'condicao' in df_plot.columns else None,
-        hover_data=['task_label','duracao']
-    )
-    fig.update_yaxes(autorange="reversed")
-    st.plotly_chart(fig, use_container_width=True, theme="streamlit")
+    # por padrão só as barras-resumo das fases vão para o navegador; o detalhe por
+    # tarefa é montado apenas para as fases escolhidas aqui
+    phase_names = [str(ph) for ph in phases_ordered]
+    detail_options = phase_names if len(df_sel) > GANTT_DETAIL_LIMIT else ['Todas as fases'] + phase_names
+    expanded = st.multiselect("Detalhar tarefas das fases", detail_options, default=[], key='gantt_detalhe')
+    if 'Todas as fases' in expanded:
+        expanded = phase_names
+    with stage('gantt', len(df_sel)):
+        # a figura fica em cache pelo conteúdo do cronograma: reruns que não mudam as datas
+        # (ex.: abrir outra seção) não a reconstroem
+        fig = get_gantt_figure(df_sel, expanded)
+        st.plotly_chart(fig, use_container_width=True, theme="streamlit")
 
     total_days = (df_sel['end'].max() - df_sel['start'].min()).days if not df_sel.empty and df_sel['start'].min() is not pd.NaT else 0
     st.write(f"Duração total do cronograma (dias, intervalo entre 1ª e última tarefa): **{total_days}** dias")
+    if work_calendar is not None and total_days:
+        st.write(f"Dias úteis no período: **{work_calendar.count_workdays(df_sel['start'].min(), df_sel['end'].max())}**")
+    if 'critica' in df_sel.columns:
+        st.write(f"Tarefas no caminho crítico: **{int(df_sel['critica'].sum())}** de {len(df_sel)}")
+    if team_usage is not None:
+        st.write("Utilização por equipe (carga / capacidade x duração do projeto):")
+        st.dataframe(team_usage, use_container_width=True)
+
+# ---------- Risco de prazo (Monte Carlo) ----------
+if not df_sel.empty and has_three_point(df_sel):
+    from montecarlo import DEFAULT_ITERATIONS, STOP_CAPPED, STOP_CONVERGED, completion_percentiles, get_simulation
+
+    st.header("Risco de prazo (Monte Carlo)")
+    iterations = st.number_input("Iterações da simulação", min_value=1_000, max_value=1_000_000, value=DEFAULT_ITERATIONS, step=10_000)
+    if st.checkbox("Simular o prazo com as durações otimista / provável / pessimista", value=False, key='montecarlo'):
+        with stage('monte_carlo', len(df_sel)):
+            simulation = get_simulation(df_sel, schedule_mode(chain_seq, phase_sequential, use_predecessors), int(iterations))
+        if simulation.stopped == STOP_CAPPED:
+            st.info(f"Simulação limitada a {simulation.iterations} iterações (pedidas: {int(iterations)}): "
+                    f"é o máximo para {len(df_sel)} tarefas sem deixar a página lenta.")
+        elif simulation.stopped == STOP_CONVERGED:
+            st.info(f"Simulação parou em {simulation.iterations} de {int(iterations)} iterações: "
+                    "os percentis do prazo já tinham estabilizado.")
+        st.write("Probabilidade de terminar até a data (P50 = 50% das simulações terminam antes):")
+        st.dataframe(completion_percentiles(simulation.totals, project_start, work_calendar), use_container_width=True)
+        st.write("Criticidade por fase (fração das simulações em que a fase está no caminho crítico) e correlação da duração da fase com o prazo total:")
+        st.dataframe(simulation.phases, use_container_width=True)
+
+# ---------- Cenários (what-if) ----------
+st.header("Comparar cenários de condições")
+if st.checkbox("Calcular os melhores cenários (menor duração x mais tarefas) para a categoria", value=False, key='cenarios'):
+    from cenarios import describe_scenario, get_condition_aggregates, pareto_scenarios
+
+    current_mode = schedule_mode(chain_seq, phase_sequential, use_predecessors)
+    scenarios = None
+    if current_mode == MODE_PREDECESSORS:
+        st.info("A comparação de cenários usa os modos por fase ou encadeado; desmarque as predecessoras.")
+    else:
+        try:
+            with stage('cenarios', len(df)):
+                scenarios = pareto_scenarios(
+                    get_condition_aggregates(catalog, selected_categoria), phases_ordered, current_mode, project_start, work_calendar
+                )
+        except ValueError as e:
+            st.warning(str(e))
+    if scenarios is not None:
+        st.write(f"Cenários na fronteira de Pareto: **{len(scenarios)}** (cada linha: nenhum outro cenário é mais curto com ao menos as mesmas tarefas)")
+        scenarios['cenario'] = scenarios['fase_condicoes'].map(describe_scenario)
+        st.dataframe(scenarios[['duracao_dias', 'tarefas', 'fim', 'cenario']], use_container_width=True)
 
 # ---------- Download / Export ----------
 st.header("Exportar cronograma")
 if not df_sel.empty:
-    csv = df_sel.to_csv(index=False).encode('utf-8')
-    st.download_button("📥 Baixar CSV", data=csv, file_name="cronograma.csv", mime="text/csv")
-    towrite = BytesIO()
-    with pd.ExcelWriter(towrite, engine='openpyxl') as writer:
-        df_sel.to_excel(writer, index=False, sheet_name='cronograma')
-
-    towrite.seek(0)
-    st.download_button("📥 Baixar XLSX", data=towrite, file_name="cronograma.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    # os arquivos só são gerados no clique (e ficam em cache pelo conteúdo do cronograma)
+    st.download_button("📥 Baixar CSV", data=measured('exportacao_csv', export_csv, df_sel), file_name="cronograma.csv", mime="text/csv")
+    st.download_button("📥 Baixar XLSX (geral, resumo e uma aba por fase)", data=measured('exportacao_xlsx', export_xlsx, df_sel), file_name="cronograma.xlsx", mime=XLSX_MIME)
 else:
     st.info("Nenhum cronograma para exportar.")
 
+# ---------- Histórico (versões salvas) ----------
+st.header("Histórico de cronogramas")
+if st.checkbox("Salvar, reabrir e comparar versões deste cronograma", value=False, key='historico'):
+    from historico import delete_schedule, diff_schedules, diff_summary, list_schedules, load_schedule, save_schedule
+
+    note = st.text_input("Nota da versão (opcional)", key='historico_nota')
+    if st.button("💾 Salvar esta versão", disabled=df_sel.empty):
+        # nivelamento e re-previsão entram nos parâmetros: a versão só é reaberta no lugar
+        # do cronograma sem ajustes se tiver sido salva sem eles
+        adjustments = {k: v for k, v in {'capacidades': capacities, 'data_status': status_date}.items() if v is not None}
+        schedule_id = save_schedule(
+            catalog, df_sel, selected_categoria, project_start, schedule_mode(chain_seq, phase_sequential, use_predecessors),
+            phase_conditions, work_calendar, note, uploaded.name if uploaded else '', adjustments=adjustments
+        )
+        st.success(f"Versão #{schedule_id} salva.")
+    versions = list_schedules(catalog, selected_categoria) if has_history() else pd.DataFrame()
+    if versions.empty:
+        st.info("Nenhuma versão salva para este catálogo e categoria.")
+    else:
+        st.dataframe(versions, use_container_width=True, hide_index=True)
+        labels = {f"#{r.id} · início {r.inicio} · {r.criado_em}" + (f" · {r.nota}" if r.nota else ''): r.id for r in versions.itertuples()}
+        col_before, col_after = st.columns(2)
+        before = col_before.selectbox("Versão salva", list(labels), key='historico_antes')
+        after = col_after.selectbox("Comparar com", ['Cronograma atual'] + list(labels), key='historico_depois')
+        # reabrir uma versão é uma consulta ao histórico, sem recalcular o cronograma
+        saved = load_schedule(labels[before])
+        col_download, col_delete = st.columns(2)
+        col_download.download_button("📥 Baixar CSV da versão salva", data=partial(export_csv, saved), file_name=f"cronograma_v{labels[before]}.csv", mime="text/csv")
+        if col_delete.button(f"🗑️ Excluir a versão #{labels[before]}", key='historico_excluir'):
+            delete_schedule(labels[before])
+            st.rerun()
+        diff = diff_schedules(saved, df_sel if after == 'Cronograma atual' else load_schedule(labels[after]))
+        summary = diff_summary(diff)
+        st.write(f"Tarefas adicionadas: **{summary['adicionada']}** · removidas: **{summary['removida']}** · "
+                 f"com datas ou duração alteradas: **{summary['alterada']}** · término deslocado em **{summary['deslocamento_fim_dias']}** dias")
+        changes = diff[diff['situacao'] != 'igual']
+        st.dataframe(changes.head(rows_within_budget(changes)), use_container_width=True, hide_index=True)
+
+# ---------- Portfólio (vários projetos) ----------
+st.header("Portfólio de projetos")
+if st.checkbox("Agendar vários projetos sobre este catálogo (modo portfólio)", value=False, key='portfolio'):
+    from gantt import portfolio_figure
+    from portfolio import export_portfolio_csv, portfolio_nbytes, portfolio_summary, projects_from_table, schedule_portfolio
+
+    st.caption("Uma linha por projeto. Condições separadas por vírgula valem para todas as fases (vazio = todas). "
+               "O catálogo é carregado uma vez e compartilhado; cada projeto guarda só as posições e datas das suas tarefas.")
+    table = st.data_editor(
+        pd.DataFrame({'nome': ['Projeto 1'], 'categoria': [selected_categoria], 'inicio': [project_start.date()], 'condicoes': ['']}),
+        num_rows='dynamic', use_container_width=True, key='portfolio_projetos',
+        column_config={
+            'categoria': st.column_config.SelectboxColumn('categoria', options=categoria_options),
+            'inicio': st.column_config.DateColumn('inicio'),
+        },
+    )
+    projects = projects_from_table(table, project_start)
+    try:
+        with stage('portfolio'):
+            results = schedule_portfolio(catalog, projects, schedule_mode(chain_seq, phase_sequential, use_predecessors), work_calendar)
+    except CycleError as e:
+        st.error(str(e))
+        results = None
+    if results:
+        project_totals, project_phases = portfolio_summary(catalog, results)
+        expanded_projects = st.multiselect("Detalhar fases dos projetos", project_totals['projeto'].tolist(), default=[], key='portfolio_detalhe')
+        st.plotly_chart(portfolio_figure(project_totals, project_phases, expanded_projects), use_container_width=True, theme="streamlit")
+        st.dataframe(project_totals, use_container_width=True)
+        st.write(f"Portfólio: **{len(results)}** projetos, **{int(project_totals['tarefas'].sum())}** tarefas, "
+                 f"de {project_totals['inicio'].min():%d/%m/%Y} a {project_totals['fim'].max():%d/%m/%Y}")
+        st.caption(f"Memória dos projetos: {portfolio_nbytes(results) / 1024:.0f} KB")
+        st.download_button("📥 Baixar CSV do portfólio", data=measured('exportacao_portfolio', export_portfolio_csv, catalog, results), file_name="portfolio.csv", mime="text/csv")
+
 st.markdown("---")
 
+if run_timer is not None:
+    run_timer.finish()
+    with st.sidebar.expander("⏱️ Medição por etapa", expanded=True):
+        st.caption(f"Este rerun: {run_timer.elapsed_ms:.0f} ms (etapas com nível > 0 estão dentro da etapa anterior)")
+        st.dataframe(run_timer.breakdown(), use_container_width=True, hide_index=True)
+        st.caption("Reruns recentes (log de medição):")
+        st.dataframe(latency_summary(), use_container_width=True, hide_index=True)
+        # blocos de fase reaproveitados: mudar uma fase só refaz aquela fase
+        block_stats = phase_cache_stats()
+        st.caption("Cache de fases: " + " · ".join(
+            f"{name} {stats['entradas']} em memória ({stats['bytes'] / 2**20:.1f} de {stats['maxbytes'] // 2**20} MB), "
+            f"{stats['acertos']} acertos / {stats['faltas']} faltas"
+            for name, stats in block_stats.items()))
@@ -0,0 +1,126 @@
+# arranque.py
+"""Orçamento de arranque a frio e primeira tela do app (app_finalizado.py).
+
+Cada amostra roda num processo Python novo, como um pod recém-escalado: importa o
+streamlit/pandas (framework), executa o script uma vez pelo AppTest do Streamlit
+(imports do app + primeira tela com o catálogo de exemplo) e faz um rerun. Os tempos
+do script vêm do log de medição (medicao.py: etapa 'importacoes' e total do rerun).
+Ao fim da primeira tela também são listados os módulos pesados já carregados; os de
+seções opcionais não podem estar entre eles.
+
+A mediana das amostras é comparada com ORCAMENTO e acrescentada a
+benchmarks/resultados/arranque.jsonl.
+
+    python benchmarks/arranque.py --amostras 5
+    python benchmarks/arranque.py --falhar-acima-do-orcamento
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+APP = str(ROOT / 'app_finalizado.py')
+RESULTS_FILE = HERE / 'resultados' / 'arranque.jsonl'
+
+# milissegundos (mediana das amostras)
+ORCAMENTO = {
+    'importacoes_ms': 100,    # imports do app, com streamlit/pandas já carregados
+    'primeira_tela_ms': 500,  # imports + primeira execução do script (inclui o Gantt do exemplo)
+    'rerun_ms': 150,          # segunda execução, processo quente
+}
+# módulos que a primeira tela (sem arquivo, seções opcionais fechadas) não deve carregar
+HEAVY_MODULES = ['plotly', 'openpyxl', 'sqlite3', 'difflib',
+                 'cenarios', 'montecarlo', 'recursos', 'portfolio', 'comandos', 'progresso']
+NOT_ON_FIRST_RENDER = ['openpyxl', 'cenarios', 'montecarlo', 'recursos', 'portfolio', 'comandos', 'progresso']
+
+
+def sample():
+    """Uma amostra (roda no processo filho): dicionário com os tempos e módulos carregados."""
+    t0 = time.perf_counter()
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+    framework_ms = (time.perf_counter() - t0) * 1000
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    t0 = time.perf_counter()
+    at.run()
+    first_ms = (time.perf_counter() - t0) * 1000
+    loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+    at.run()
+    if len(at.exception):
+        raise RuntimeError(at.exception[0].message)
+
+    with open(os.environ['CRONOGRAMA_MEDICAO_LOG'], encoding='utf-8') as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    runs = [r for r in runs if r.get('rerun', True)]
+    imports_ms = sum(e['ms'] for e in runs[0]['etapas'] if e['etapa'] == 'importacoes')
+    return {
+        'framework_ms': framework_ms,
+        'importacoes_ms': imports_ms,
+        'primeira_tela_ms': imports_ms + runs[0]['total_ms'],
+        'apptest_primeira_execucao_ms': first_ms,
+        'rerun_ms': runs[1]['total_ms'],
+        'modulos_carregados': loaded,
+    }
+
+
+def run_samples(n):
+    samples = []
+    for _ in range(n):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, CRONOGRAMA_MEDICAO='1', CRONOGRAMA_MEDICAO_LOG=str(Path(tmp) / 'medicao.jsonl'))
+            out = subprocess.run([sys.executable, __file__, '--amostra'], cwd=ROOT, env=env,
+                                 capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tempo de arranque a frio e da primeira tela, contra o orçamento.")
+    parser.add_argument('--amostras', type=int, default=5)
+    parser.add_argument('--resultados', default=str(RESULTS_FILE))
+    parser.add_argument('--nao-salvar', action='store_true')
+    parser.add_argument('--falhar-acima-do-orcamento', action='store_true', help="código de saída 1 se estourar o orçamento")
+    parser.add_argument('--amostra', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.amostra:
+        print(json.dumps(sample()))
+        return 0
+
+    samples = run_samples(args.amostras)
+    summary = {key: median([s[key] for s in samples])
+               for key in ['framework_ms', 'importacoes_ms', 'primeira_tela_ms', 'apptest_primeira_execucao_ms', 'rerun_ms']}
+    loaded = sorted({m for s in samples for m in s['modulos_carregados']})
+    failures = [f"{key}: {summary[key]:.0f} ms > {budget} ms" for key, budget in ORCAMENTO.items() if summary[key] > budget]
+    failures += [f"módulo carregado na primeira tela: {m}" for m in loaded if m in NOT_ON_FIRST_RENDER]
+
+    for key, value in summary.items():
+        budget = ORCAMENTO.get(key)
+        print(f"{key:<30} {value:8.0f} ms" + (f"   (orçamento {budget} ms)" if budget else ''))
+    print(f"{'modulos_carregados':<30} {', '.join(loaded) or '-'}")
+    if not args.nao_salvar:
+        Path(args.resultados).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.resultados, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'execucao': datetime.now().isoformat(timespec='seconds'), 'amostras': len(samples),
+                                **summary, 'modulos_carregados': loaded, 'estouros': failures}, ensure_ascii=False) + '\n')
+    if failures:
+        print("\nAcima do orçamento:\n  " + "\n  ".join(failures))
+    return 1 if args.falhar_acima_do_orcamento and failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
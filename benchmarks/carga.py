@@ -0,0 +1,298 @@
+# carga.py
+"""Teste de carga com N sessões simultâneas do app (app_finalizado.py).
+
+Cada sessão faz o que um planejador faz: envia um catálogo, muda as condições de uma
+fase, liga/desliga phase_sequential e chain_seq e baixa o CSV/XLSX; cada mudança de
+widget é um rerun. Para cada N são medidos os percentis de latência do rerun (e do
+download), a vazão (reruns/s) e o RSS do processo, que faz o papel do servidor.
+
+Modos:
+- 'threads' (padrão): uma thread por sessão no mesmo processo, como o servidor do
+  Streamlit (uma thread de script por sessão, caches dos módulos compartilhados, GIL).
+  O AppTest do Streamlit usa um Runtime global por execução e não roda sessões em
+  paralelo; por isso cada rerun é o mesmo caminho do script feito direto nos módulos
+  do app: load_catalog, índice, schedule_incremental, tabela em Arrow IPC (o que o
+  st.dataframe envia), figura do Gantt em JSON (st.plotly_chart) e, no download,
+  export_csv/export_xlsx. Antes da largada um rerun e um download fora da medição
+  carregam os imports preguiçosos (plotly, PIL, openpyxl), que não são seguros para
+  várias threads importarem ao mesmo tempo. Um erro numa sessão encerra só aquela
+  sessão; os erros são contados e listados no relatório.
+- 'apptest': o script real pelo AppTest, com as N sessões intercaladas numa thread só.
+  Mede o custo do script inteiro com N sessões residentes, sem concorrência; serve para
+  calibrar o modo 'threads'. Downloads não são exercitados (o AppTest não busca o
+  conteúdo adiado dos botões). Roda a partir da raiz do repositório, como o
+  `streamlit run` (o app lê o logotipo pelo caminho relativo).
+
+    python benchmarks/carga.py --sessoes 1 10 30 50
+    python benchmarks/carga.py --sessoes 5 --modo apptest --acoes 10
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pyarrow as pa  # noqa: E402
+
+from agendamento import schedule_mode  # noqa: E402
+from exportacao import export_csv, export_xlsx  # noqa: E402
+from gantt import get_gantt_figure  # noqa: E402
+from ingestao import load_catalog, rows_within_budget  # noqa: E402
+from reagendamento import schedule_incremental  # noqa: E402
+from selecao import ALL_CATEGORIES, get_selection_index  # noqa: E402
+from sintetico import synthetic_catalog, to_csv_bytes  # noqa: E402
+
+APP = str(ROOT / 'app_finalizado.py')
+DEFAULT_SESSIONS = [1, 5, 10, 30, 50]
+RESULTS_FILE = HERE / 'resultados' / 'carga.jsonl'
+ACTIONS = ['fase', 'phase_sequential', 'chain_seq', 'exportar']
+ACTION_WEIGHTS = [0.55, 0.15, 0.15, 0.15]
+RSS_INTERVAL = 0.1  # segundos entre amostras do RSS
+
+
+def rss_mb():
+    """RSS atual do processo em MB (Linux: /proc; outros: pico via resource)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+class RSSMonitor(threading.Thread):
+    """Amostra o RSS em segundo plano; guarda o pico."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(RSS_INTERVAL):
+            self.peak = max(self.peak, rss_mb())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, rss_mb())
+        return self.peak
+
+
+def arrow_bytes(df):
+    """Tabela serializada em Arrow IPC, como o st.dataframe a envia ao navegador."""
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.RecordBatchStreamWriter(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def make_catalogs(n_catalogs, n_rows, seed=0):
+    """[(nome, bytes do CSV)]: catálogos distintos, para as sessões não dividirem um só cache."""
+    return [(f'catalogo_{i + 1}.csv', to_csv_bytes(synthetic_catalog(n_rows, seed=seed + i)))
+            for i in range(n_catalogs)]
+
+
+# ---------- modo 'threads': o caminho do script feito direto nos módulos ----------
+class Session:
+    """Estado dos widgets de uma sessão e o rerun equivalente ao do script."""
+
+    def __init__(self, catalog_file, rng):
+        self.rng = rng
+        self.catalog_file = catalog_file
+        self.phase_sequential = True
+        self.chain_seq = False
+        self.project_start = pd.Timestamp('2026-01-05')
+        self.categoria = None
+        self.phase_conditions = None
+        self.df_sel = None
+        self._options = []
+
+    def rerun(self):
+        catalog = load_catalog(self.catalog_file[1], self.catalog_file[0])
+        index = get_selection_index(catalog)
+        if self.categoria is None:
+            # cada planejador trabalha numa categoria (projeto) do catálogo
+            self.categoria = self.rng.choice(index.categorias or [ALL_CATEGORIES])
+        phases = index.phases(self.categoria)
+        options = [c for c in index.conditions(self.categoria) if c.lower() != 'sempre']
+        if self.phase_conditions is None:
+            self.phase_conditions = {ph: options + ['Sempre'] for ph in phases}
+        self.df_sel = schedule_incremental(
+            catalog, self.categoria, self.phase_conditions, phases, self.project_start,
+            schedule_mode(self.chain_seq, self.phase_sequential)
+        )
+        preview = self.df_sel[['numero', 'fase', 'condicao', 'nome', 'duracao']]
+        arrow_bytes(preview.head(rows_within_budget(preview)).astype(object).fillna(''))
+        if not self.df_sel.empty:
+            get_gantt_figure(self.df_sel, []).to_json()
+        self._options = options
+
+    def act(self, action):
+        """Aplica uma ação ('upload' é só o primeiro rerun); devolve 'rerun' ou 'download'."""
+        if action == 'exportar':
+            if self.df_sel is not None and not self.df_sel.empty:
+                export_csv(self.df_sel)
+                export_xlsx(self.df_sel)
+            return 'download'
+        if action == 'fase' and self.phase_conditions:
+            ph = self.rng.choice(list(self.phase_conditions))
+            chosen = [c for c in self._options if self.rng.random() < 0.6]
+            self.phase_conditions[ph] = chosen + ['Sempre']
+        elif action == 'phase_sequential':
+            self.phase_sequential = not self.phase_sequential
+        elif action == 'chain_seq':
+            self.chain_seq = not self.chain_seq
+        self.rerun()
+        return 'rerun'
+
+
+def warm_up(catalogs, seed):
+    """Um rerun e um download fora da medição: carrega os imports preguiçosos numa thread só."""
+    session = Session(catalogs[0], random.Random(seed))
+    session.rerun()
+    session.act('exportar')
+
+
+def run_threads(n_sessions, catalogs, n_actions, pause, seed):
+    """([(tipo, ms)], [erros]) de todas as sessões, rodando em paralelo."""
+    samples, errors, lock = [], [], threading.Lock()
+    warm_up(catalogs, seed)
+    start = threading.Barrier(n_sessions)
+
+    def session_main(i):
+        rng = random.Random(seed * 1000 + i)
+        session = Session(catalogs[i % len(catalogs)], rng)
+        start.wait()
+        steps = ['upload'] + rng.choices(ACTIONS, ACTION_WEIGHTS, k=n_actions)
+        action = steps[0]
+        try:
+            for action in steps:
+                t0 = time.perf_counter()
+                kind = session.act(action)
+                ms = (time.perf_counter() - t0) * 1000
+                with lock:
+                    samples.append((kind, ms))
+                time.sleep(pause * rng.uniform(0.5, 1.5))
+        except Exception as e:
+            with lock:
+                errors.append(f"sessão {i + 1} ({action}): {type(e).__name__}: {e}")
+
+    threads = [threading.Thread(target=session_main, args=(i,)) for i in range(n_sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, errors
+
+
+# ---------- modo 'apptest': o script real, sessões intercaladas ----------
+def run_apptest(n_sessions, catalogs, n_actions, pause, seed):
+    """([(tipo, ms)], [erros]); um erro no script encerra a execução."""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(ROOT)
+
+    def timed(at):
+        t0 = time.perf_counter()
+        at.run()
+        if len(at.exception):
+            raise RuntimeError(at.exception[0].message)
+        return ('rerun', (time.perf_counter() - t0) * 1000)
+
+    samples = []
+    sessions = []
+    for i in range(n_sessions):
+        at = AppTest.from_file(APP, default_timeout=300)
+        at.run()
+        name, data = catalogs[i % len(catalogs)]
+        at.file_uploader[0].set_value((name, data, 'text/csv'))
+        samples.append(timed(at))
+        sessions.append((at, random.Random(seed * 1000 + i)))
+    for _ in range(n_actions):
+        for at, rng in sessions:
+            action = rng.choices(ACTIONS[:3], ACTION_WEIGHTS[:3])[0]
+            if action == 'fase':
+                widgets = [w for w in at.sidebar.multiselect if w.key and w.key.startswith('cond_')]
+                if not widgets:
+                    continue
+                widget = rng.choice(widgets)
+                widget.set_value([c for c in widget.options if rng.random() < 0.6])
+            else:
+                prefix = 'Agendar fases' if action == 'phase_sequential' else 'Encadear tarefas'
+                box = next(c for c in at.sidebar.checkbox if c.label.startswith(prefix))
+                box.set_value(not box.value)
+            samples.append(timed(at))
+            time.sleep(pause * rng.uniform(0.5, 1.5))
+    return samples, []
+
+
+def summarize(n_sessions, samples, errors, wall_s, rss_start, rss_peak):
+    row = {'sessoes': n_sessions, 'erros': len(errors), 'segundos': round(wall_s, 2),
+           'rss_inicial_mb': round(rss_start, 1), 'rss_pico_mb': round(rss_peak, 1)}
+    for kind in ('rerun', 'download'):
+        ms = np.array([m for k, m in samples if k == kind])
+        row[f'{kind}s'] = len(ms)
+        for p in (50, 95, 99):
+            row[f'{kind}_p{p}_ms'] = round(float(np.percentile(ms, p)), 1) if len(ms) else None
+    row['reruns_por_s'] = round(row['reruns'] / wall_s, 2) if wall_s else None
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latência de rerun, vazão e RSS com N sessões simultâneas.")
+    parser.add_argument('--sessoes', type=int, nargs='+', default=DEFAULT_SESSIONS)
+    parser.add_argument('--modo', choices=['threads', 'apptest'], default='threads')
+    parser.add_argument('--acoes', type=int, default=20, help="ações por sessão (cada uma é um rerun ou download)")
+    parser.add_argument('--pausa', type=float, default=0.2, help="tempo médio (s) entre ações de uma sessão")
+    parser.add_argument('--linhas', type=int, default=5_000, help="tarefas por catálogo")
+    parser.add_argument('--catalogos', type=int, default=3, help="catálogos distintos enviados pelas sessões")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--resultados', default=str(RESULTS_FILE))
+    parser.add_argument('--nao-salvar', action='store_true')
+    args = parser.parse_args(argv)
+    results_file = Path(args.resultados).resolve()  # o modo apptest muda o diretório atual
+
+    catalogs = make_catalogs(args.catalogos, args.linhas, args.semente)
+    driver = run_threads if args.modo == 'threads' else run_apptest
+    rows = []
+    for n in args.sessoes:
+        rss_start = rss_mb()
+        monitor = RSSMonitor()
+        monitor.start()
+        t0 = time.perf_counter()
+        samples, errors = driver(n, catalogs, args.acoes, args.pausa, args.semente)
+        wall_s = time.perf_counter() - t0
+        rows.append(summarize(n, samples, errors, wall_s, rss_start, monitor.stop()))
+        print(f"{n:>4} sessões: rerun p50 {rows[-1]['rerun_p50_ms']} ms, p95 {rows[-1]['rerun_p95_ms']} ms, "
+              f"{rows[-1]['reruns_por_s']} reruns/s, RSS {rows[-1]['rss_pico_mb']} MB, {len(errors)} erro(s)", flush=True)
+        for error in errors:
+            print(f"       {error}", flush=True)
+
+    report = pd.DataFrame(rows)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(report.to_string(index=False))
+    if not args.nao_salvar:
+        meta = {'execucao': datetime.now().isoformat(timespec='seconds'), 'modo': args.modo, 'acoes': args.acoes,
+                'pausa': args.pausa, 'linhas': args.linhas, 'catalogos': args.catalogos}
+        results_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(results_file, 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps({**meta, **row}, ensure_ascii=False) + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
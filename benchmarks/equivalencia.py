@@ -0,0 +1,143 @@
+# equivalencia.py
+"""Regressão de equivalência do agendamento sobre o catálogo de exemplo do repositório.
+
+Compara, para cada categoria, cada modo (fase -> fase, fases em paralelo, encadeado) e
+vários conjuntos de condições por fase:
+- agendamento.schedule (vetorizado) com o laço por tarefa do app original (baseline);
+- reagendamento.schedule_incremental (blocos de fase em cache) com
+  schedule(SelectionIndex.select(...)), em dias corridos e com calendário de dias úteis.
+Os caches de blocos ficam de uma comparação para a outra, então blocos reaproveitados
+(mesma fase e condições em outro conjunto) também são conferidos.
+
+Qualquer diferença de datas é listada e o código de saída é 1.
+
+    python benchmarks/equivalencia.py
+"""
+import argparse
+import random
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from agendamento import schedule, schedule_mode  # noqa: E402
+from calendario import WorkCalendar  # noqa: E402
+from ingestao import load_catalog  # noqa: E402
+from reagendamento import schedule_incremental  # noqa: E402
+from selecao import get_selection_index  # noqa: E402
+
+CATALOG_FILES = sorted(ROOT.glob('*.csv'))
+PROJECT_START = pd.Timestamp('2026-01-05')
+# (chain_seq, phase_sequential) de cada modo do app
+MODES = {'fase_sequencial': (False, True), 'paralelo': (False, False), 'encadeado': (True, False)}
+RANDOM_SUBSETS = 5  # conjuntos de condições sorteados por categoria, além de "todas" e "uma só"
+CALENDARS = {'dias corridos': None, 'dias úteis': WorkCalendar(holidays=['2026-01-06', '2026-02-16'])}
+
+
+def baseline_schedule(df_sel, phases_ordered, project_start, chain_seq, phase_sequential):
+    """Cálculo de datas do app original (laço por fase e por tarefa), como referência."""
+    df_sel = df_sel.copy()
+    df_sel['start'] = pd.NaT
+    df_sel['end'] = pd.NaT
+    if len(df_sel) > 0:
+        if chain_seq:
+            durations = df_sel['duracao'].astype(float).fillna(1)
+            start_offsets = durations.cumsum() - durations
+            df_sel['start'] = project_start + pd.to_timedelta(start_offsets, unit='D')
+            df_sel['end'] = df_sel['start'] + pd.to_timedelta(durations, unit='D')
+        elif phase_sequential:
+            current_phase_start = project_start
+            for ph in phases_ordered:
+                ends = []
+                for idx in df_sel[df_sel['fase'] == ph].index.tolist():
+                    end_task = current_phase_start + pd.to_timedelta(float(df_sel.at[idx, 'duracao']), unit='D')
+                    df_sel.at[idx, 'start'] = current_phase_start
+                    df_sel.at[idx, 'end'] = end_task
+                    ends.append(end_task)
+                current_phase_start = max(ends) if ends else current_phase_start
+        else:
+            for ph in phases_ordered:
+                df_ph = df_sel[df_sel['fase'] == ph]
+                if df_ph.empty:
+                    continue
+                durations = df_ph['duracao'].astype(float).fillna(1)
+                starts_ph = project_start + pd.to_timedelta(durations.cumsum() - durations, unit='D')
+                df_sel.loc[df_ph.index, 'start'] = starts_ph
+                df_sel.loc[df_ph.index, 'end'] = starts_ph + pd.to_timedelta(durations, unit='D')
+    df_sel['start'] = pd.to_datetime(df_sel['start'])
+    df_sel['end'] = pd.to_datetime(df_sel['end'])
+    return df_sel
+
+
+def condition_sets(index, categoria, phases, rng):
+    """Condições por fase: todas, cada uma sozinha e alguns subconjuntos sorteados."""
+    conditions = index.conditions(categoria)
+    sets = [{ph: list(conditions) for ph in phases}]
+    sets += [{ph: [c] for ph in phases} for c in conditions]
+    for _ in range(RANDOM_SUBSETS):
+        sets.append({ph: [c for c in conditions if rng.random() < 0.5] for ph in phases})
+    return sets
+
+
+def differences(expected, actual, label):
+    """Mensagens com as tarefas cujas datas diferem (vazia se iguais)."""
+    if len(expected) != len(actual):
+        return [f"{label}: {len(expected)} tarefas esperadas, {len(actual)} obtidas"]
+    problems = []
+    for col in ('start', 'end'):
+        left = expected[col].to_numpy(dtype='datetime64[ns]')
+        right = actual[col].to_numpy(dtype='datetime64[ns]')
+        bad = ~((left == right) | (pd.isna(left) & pd.isna(right)))
+        if bad.any():
+            first = bad.argmax()
+            problems.append(f"{label}: {int(bad.sum())} datas de '{col}' diferentes "
+                            f"(tarefa {expected['numero'].iloc[first]}: {left[first]} x {right[first]})")
+    return problems
+
+
+def check_catalog(path, rng):
+    """(comparações feitas, mensagens de diferença) para um arquivo de catálogo."""
+    catalog = load_catalog(path.read_bytes(), path.name)
+    index = get_selection_index(catalog)
+    checks, problems = 0, []
+    for categoria in index.categorias:
+        phases = index.phases(categoria)
+        for k, conditions in enumerate(condition_sets(index, categoria, phases, rng)):
+            df_sel = index.select(categoria, conditions, phases)
+            for mode_name, (chain_seq, phase_sequential) in MODES.items():
+                label = f"{path.name} · {categoria} · {mode_name} · condições #{k}"
+                mode = schedule_mode(chain_seq, phase_sequential)
+                expected = baseline_schedule(df_sel, phases, PROJECT_START, chain_seq, phase_sequential)
+                problems += differences(expected, schedule(df_sel, phases, PROJECT_START, mode), f"schedule x baseline · {label}")
+                checks += 1
+                for calendar_name, calendar in CALENDARS.items():
+                    expected = schedule(df_sel, phases, PROJECT_START, mode, calendar)
+                    actual = schedule_incremental(catalog, categoria, conditions, phases, PROJECT_START, mode, calendar)
+                    problems += differences(expected, actual, f"incremental x schedule · {label} · {calendar_name}")
+                    checks += 1
+    return checks, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Confere o agendamento vetorizado e o incremental contra as referências.")
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.semente)
+    total, problems = 0, []
+    for path in CATALOG_FILES:
+        checks, found = check_catalog(path, rng)
+        total += checks
+        problems += found
+        print(f"{path.name}: {checks} comparações, {len(found)} diferença(s)")
+    for problem in problems[:50]:
+        print(f"  {problem}")
+    print(f"Total: {total} comparações, {len(problems)} diferença(s)")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
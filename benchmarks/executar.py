@@ -0,0 +1,189 @@
+# executar.py
+"""Benchmarks do pipeline (leitura, normalização, seleção, agendamento, exportação).
+
+Para cada tamanho de catálogo sintético mede cada etapa: tempo (mínimo de N repetições,
+sem tracemalloc) e pico de memória alocada (uma execução com tracemalloc). Os resultados
+são acrescentados a benchmarks/resultados/historico.jsonl e comparados com a mediana das
+últimas execuções do mesmo tamanho/etapa; pioras acima da tolerância são marcadas.
+
+    python benchmarks/executar.py --tamanhos 1000 10000 100000 1000000
+    python benchmarks/executar.py --tamanhos 10000 --etapas agendamento_parallel --falhar-em-regressao
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from agendamento import MODE_CHAIN, MODE_PARALLEL, MODE_PHASE_SEQUENTIAL, MODE_PREDECESSORS, phase_codes, schedule  # noqa: E402
+from exportacao import build_csv, build_xlsx  # noqa: E402
+from ingestao import normalize_df_columns, prepare_catalog, read_catalog_bytes  # noqa: E402
+from progresso import reforecast  # noqa: E402
+from selecao import ALL_CATEGORIES, SelectionIndex  # noqa: E402
+from sintetico import synthetic_catalog, to_csv_bytes  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+RESULTS_FILE = HERE / 'resultados' / 'historico.jsonl'
+BASELINE_RUNS = 5          # execuções anteriores usadas como referência
+TIME_TOLERANCE = 0.20      # 20% mais lento que a referência = regressão
+MEMORY_TOLERANCE = 0.20
+MIN_TIME_DELTA = 0.005     # segundos: abaixo disso é ruído
+MIN_MEMORY_DELTA = 1.0     # MB
+XLSX_MAX_ROWS = 10_000     # XLSX por openpyxl: ~0,7 s por mil linhas; acima disso é pulado
+PROJECT_START = pd.Timestamp('2026-01-05')
+SCHEDULE_MODES = [MODE_CHAIN, MODE_PHASE_SEQUENTIAL, MODE_PARALLEL, MODE_PREDECESSORS]
+
+
+def pipeline_stages(n_rows, seed=0):
+    """Lista (etapa, função sem argumentos) para um catálogo de n_rows linhas.
+
+    Cada etapa recebe como entrada a saída (já calculada) da etapa anterior, para que
+    o tempo medido seja só o dela.
+    """
+    data = to_csv_bytes(synthetic_catalog(n_rows, seed=seed, predecessors=True))
+    df_raw = read_catalog_bytes(data, 'sintetico.csv')
+    df = prepare_catalog(df_raw)
+    index = SelectionIndex(df)
+    phases = index.phases(ALL_CATEGORIES)
+    phase_conditions = {ph: index.conditions(ALL_CATEGORIES) for ph in phases}
+    df_sel = index.select(ALL_CATEGORIES, phase_conditions, phases)
+    # todas as categorias encadeadas passariam do limite de datas do pandas (~292 anos):
+    # durações reescaladas para o encadeamento total caber em ~100 anos (o custo não muda)
+    total = float(df_sel['duracao'].astype(float).sum())
+    df_sel = df_sel.assign(duracao=df_sel['duracao'].astype(float) * min(1.0, 36_500 / max(total, 1.0)))
+    scheduled = schedule(df_sel, phases, PROJECT_START, MODE_PHASE_SEQUENTIAL)
+    # progresso sintético: primeira fase concluída, segunda pela metade, demais não iniciadas
+    progressed = scheduled.assign(concluido=np.clip(2 - phase_codes(scheduled['fase'], phases), 0, 2) / 2)
+    status_date = scheduled['start'].min() + (scheduled['end'].max() - scheduled['start'].min()) / 3
+
+    stages = [
+        ('leitura_csv', lambda: read_catalog_bytes(data, 'sintetico.csv')),
+        ('normalizar_colunas', lambda: normalize_df_columns(df_raw.copy())),
+        ('preparar_catalogo', lambda: prepare_catalog(df_raw)),
+        ('indice_selecao', lambda: SelectionIndex(df)),
+        ('selecao', lambda: index.select(ALL_CATEGORIES, phase_conditions, phases)),
+    ]
+    stages += [(f'agendamento_{mode}', lambda mode=mode: schedule(df_sel, phases, PROJECT_START, mode))
+               for mode in SCHEDULE_MODES]
+    stages.append(('reprevisao', lambda: reforecast(progressed, phases, PROJECT_START, status_date, MODE_PHASE_SEQUENTIAL)))
+    stages.append(('exportacao_csv', lambda: build_csv(scheduled)))
+    if n_rows <= XLSX_MAX_ROWS:
+        stages.append(('exportacao_xlsx', lambda: build_xlsx(scheduled)))
+    return stages
+
+
+def measure(func, repeat):
+    """(menor tempo em segundos entre `repeat` execuções, pico de memória em MB)."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak / 2**20
+
+
+def load_history(path=RESULTS_FILE):
+    if not Path(path).exists():
+        return pd.DataFrame(columns=['execucao', 'tamanho', 'etapa', 'segundos', 'pico_mb'])
+    with open(path, encoding='utf-8') as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def flag_regressions(results, history, baseline_runs=BASELINE_RUNS,
+                     time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Acrescenta a referência (mediana das últimas execuções) e a coluna 'regressao'."""
+    if history.empty:
+        ref = pd.DataFrame(columns=['tamanho', 'etapa', 'ref_segundos', 'ref_pico_mb'])
+    else:
+        recent = history[history['execucao'].isin(history['execucao'].drop_duplicates().tail(baseline_runs))]
+        ref = (recent.groupby(['tamanho', 'etapa'], as_index=False)[['segundos', 'pico_mb']].median()
+               .rename(columns={'segundos': 'ref_segundos', 'pico_mb': 'ref_pico_mb'}))
+    out = results.merge(ref, on=['tamanho', 'etapa'], how='left')
+    seconds, ref_seconds = out['segundos'].to_numpy(float), out['ref_segundos'].to_numpy(float)
+    peak, ref_peak = out['pico_mb'].to_numpy(float), out['ref_pico_mb'].to_numpy(float)
+    # sem referência (NaN) as comparações dão False
+    with np.errstate(invalid='ignore'):
+        slower = (seconds > ref_seconds * (1 + time_tolerance)) & (seconds - ref_seconds > MIN_TIME_DELTA)
+        bigger = (peak > ref_peak * (1 + memory_tolerance)) & (peak - ref_peak > MIN_MEMORY_DELTA)
+    out['regressao'] = np.select([slower & bigger, slower, bigger], ['tempo+memoria', 'tempo', 'memoria'], default='')
+    return out
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE.parent,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(sizes, repeat=3, only=None, seed=0):
+    """DataFrame com uma linha por (tamanho, etapa)."""
+    rows = []
+    for n in sizes:
+        for name, func in pipeline_stages(n, seed):
+            if only and name not in only:
+                continue
+            seconds, peak = measure(func, repeat)
+            rows.append({'tamanho': n, 'etapa': name, 'segundos': seconds, 'pico_mb': peak})
+            print(f"{n:>9} {name:<28} {seconds * 1000:10.1f} ms {peak:9.1f} MB", flush=True)
+    return pd.DataFrame(rows, columns=['tamanho', 'etapa', 'segundos', 'pico_mb'])
+
+
+def save_results(results, path=RESULTS_FILE):
+    meta = {
+        'execucao': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'maquina': platform.node(),
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for row in results.to_dict('records'):
+            f.write(json.dumps({**meta, **row}, ensure_ascii=False) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de tempo e memória por etapa do pipeline.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--etapas', nargs='+', default=None, help="só estas etapas (ex.: selecao agendamento_parallel)")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--resultados', default=str(RESULTS_FILE))
+    parser.add_argument('--nao-salvar', action='store_true', help="só compara, sem gravar no histórico")
+    parser.add_argument('--falhar-em-regressao', action='store_true', help="código de saída 1 se houver regressão")
+    args = parser.parse_args(argv)
+
+    history = load_history(args.resultados)
+    results = run(args.tamanhos, args.repeticoes, args.etapas, args.semente)
+    report = flag_regressions(results, history)
+    with pd.option_context('display.width', 160, 'display.max_rows', None):
+        print(report.assign(ms=report['segundos'] * 1000, ref_ms=report['ref_segundos'] * 1000)
+              [['tamanho', 'etapa', 'ms', 'ref_ms', 'pico_mb', 'ref_pico_mb', 'regressao']].round(1).to_string(index=False))
+    if not args.nao_salvar:
+        save_results(results, args.resultados)
+    regressions = report[report['regressao'] != '']
+    if len(regressions):
+        print(f"\n{len(regressions)} regressão(ões) em relação às últimas {BASELINE_RUNS} execuções.")
+    return 1 if args.falhar_em_regressao and len(regressions) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
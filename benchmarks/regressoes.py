@@ -0,0 +1,198 @@
+# regressoes.py
+"""Verificações de regressão de casos que já quebraram (um por função verifica_*).
+
+Complementa benchmarks/equivalencia.py: aqui ficam cenários pequenos e montados à mão,
+cada um com o comportamento esperado. Falhas são listadas e o código de saída é 1.
+
+    python benchmarks/regressoes.py
+"""
+import sys
+import traceback
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+import pandas as pd  # noqa: E402
+
+from agendamento import MODE_PHASE_SEQUENTIAL  # noqa: E402
+
+PROJECT_START = pd.Timestamp('2026-01-05')
+
+
+def verifica_reprevisao_com_capacidades():
+    """A re-previsão com capacidades mantém o nivelamento (equipe de 1 pessoa, 3 tarefas de 5 dias)."""
+    from progresso import reforecast
+    from recursos import resource_schedule
+
+    df = pd.DataFrame({'numero': [1, 2, 3], 'fase': ['F1'] * 3, 'nome': ['a', 'b', 'c'],
+                       'duracao': [5.0, 5.0, 5.0], 'equipe': ['E'] * 3, 'concluido': [0.0, 0.0, 0.0]})
+    capacities = {'E': 1}
+    leveled, _ = resource_schedule(df, ['F1'], PROJECT_START, MODE_PHASE_SEQUENTIAL, capacities)
+    expected = pd.to_datetime(['2026-01-05', '2026-01-10', '2026-01-15'])
+    assert list(leveled['start']) == list(expected), leveled['start'].tolist()
+
+    # sem progresso e status no início: nada muda
+    same = reforecast(leveled, ['F1'], PROJECT_START, PROJECT_START, MODE_PHASE_SEQUENTIAL, capacities=capacities)
+    assert list(same['start']) == list(expected), same['start'].tolist()
+    assert (same['desvio_fim_dias'] == 0).all(), same['desvio_fim_dias'].tolist()
+
+    # primeira concluída, segunda pela metade: a terceira espera a pessoa da equipe
+    progressed = leveled.assign(concluido=[1.0, 0.5, 0.0])
+    status = pd.Timestamp('2026-01-12')
+    out = reforecast(progressed, ['F1'], PROJECT_START, status, MODE_PHASE_SEQUENTIAL, capacities=capacities)
+    assert out['end'].iloc[1] == pd.Timestamp('2026-01-14 12:00'), out['end'].tolist()
+    assert out['start'].iloc[2] == out['end'].iloc[1], out['start'].tolist()
+
+
+def verifica_lote_conjuntos_com_espacos():
+    """--conjuntos "A, B" mantém B; condição inexistente no catálogo é erro."""
+    from lote import parse_condition_sets, plan_jobs
+
+    assert parse_condition_sets(['A, B', ' C ,', ',']) == [['A', 'B'], ['C']]
+    catalog = sorted(HERE.parent.glob('*.csv'))[0]
+    jobs = plan_jobs([catalog], [['A', 'b']])
+    assert jobs and jobs[0][2] == [['A', 'b']], jobs
+    try:
+        plan_jobs([catalog], [['A', 'X']])
+    except ValueError as e:
+        assert 'X' in str(e), str(e)
+    else:
+        raise AssertionError("condição inexistente aceita")
+
+
+def verifica_xlsx_abas_por_fase_em_blocos():
+    """Abas por fase escritas em blocos trazem as mesmas linhas do cronograma, na ordem."""
+    import exportacao
+    from io import BytesIO
+    from openpyxl import load_workbook
+
+    n = 7
+    df = pd.DataFrame({'numero': range(1, n + 1), 'fase': ['F1', 'F2', 'F1', 'F2', 'F1', 'F2', 'F1'],
+                       'nome': list('abcdefg'), 'duracao': [1.0, 2.0, 1.5, None, 3.0, 1.0, 2.0],
+                       'start': pd.date_range(PROJECT_START, periods=n), 'end': pd.date_range('2026-01-06', periods=n)})
+    chunk_rows = exportacao.XLSX_CHUNK_ROWS
+    exportacao.XLSX_CHUNK_ROWS = 2  # força vários blocos por aba
+    try:
+        wb = load_workbook(BytesIO(exportacao.build_xlsx(df)), read_only=True)
+    finally:
+        exportacao.XLSX_CHUNK_ROWS = chunk_rows
+    for fase in ('F1', 'F2'):
+        rows = list(wb[fase].iter_rows(values_only=True))
+        assert list(rows[0]) == list(df.columns), rows[0]
+        assert [r[0] for r in rows[1:]] == df.loc[df['fase'] == fase, 'numero'].tolist(), rows
+
+
+def verifica_historico_ida_e_volta_do_catalogo():
+    """Catálogo salvo no histórico volta com os mesmos tipos (texto '001' continua texto; datas como datas)."""
+    import tempfile
+
+    import historico
+    from ingestao import catalog_from_frame
+
+    raw = pd.DataFrame({'Número': [1, 2, 3], 'Categoria': ['X'] * 3, 'Fase': ['F1', 'F1', 'F2'],
+                        'Condição': ['Sempre', 'A', 'B'], 'Nome': ['001', 'True', '1e3'],
+                        'Duração': [5, 2.5, 1], 'Como Fazer': ['0012', None, 'texto'],
+                        'Início real': ['10/01/2026', None, '12/01/2026']})
+    catalog = catalog_from_frame(raw, key=('regressao-historico',))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'historico.sqlite3')
+        digest = historico.save_catalog(catalog, 'regressao', path)
+        back = historico.load_stored_catalog(digest, path)
+        # o esquema já existe: as próximas conexões não o recriam
+        assert str(Path(path).resolve()) in {str(Path(p).resolve()) for p in historico._schema_ready}
+    assert list(back.df.columns) == list(catalog.df.columns), back.df.columns
+    for col in catalog.df.columns:
+        assert back.df[col].dtype == catalog.df[col].dtype, (col, back.df[col].dtype, catalog.df[col].dtype)
+    pd.testing.assert_frame_equal(back.df, catalog.df)
+
+
+def verifica_historico_reaberto_da_memoria():
+    """Versão salva é reaberta uma vez; os reruns seguintes não consultam o banco."""
+    import tempfile
+
+    import historico
+    from agendamento import schedule
+    from ingestao import catalog_from_frame
+    from reagendamento import cached_schedule, schedule_incremental
+
+    raw = pd.DataFrame({'Número': [1, 2], 'Categoria': ['X', 'X'], 'Fase': ['F1', 'F2'],
+                        'Condição': ['Sempre', 'Sempre'], 'Nome': ['a', 'b'], 'Duração': [3, 2]})
+    catalog = catalog_from_frame(raw, key=('regressao-reabrir',))
+    conditions, phases = {'F1': [], 'F2': []}, ['F1', 'F2']
+    assert cached_schedule(catalog, 'X', conditions, phases, PROJECT_START, MODE_PHASE_SEQUENTIAL) is None
+    df_sel = catalog.df[['numero', 'fase', 'condicao', 'nome', 'duracao']]
+    saved = schedule(df_sel, phases, PROJECT_START, MODE_PHASE_SEQUENTIAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / 'historico.sqlite3')
+        historico.save_schedule(catalog, saved, 'X', PROJECT_START, MODE_PHASE_SEQUENTIAL, conditions, path=path)
+        selects = []
+
+        def select():
+            selects.append(1)
+            return df_sel
+
+        args = (catalog, 'X', PROJECT_START, MODE_PHASE_SEQUENTIAL, conditions, select)
+        first = historico.get_reopened_schedule(*args, path=path)
+        again = historico.get_reopened_schedule(*args, path=path)
+        assert first is again and len(selects) == 1, len(selects)
+        assert list(first['end']) == list(saved['end']), first['end'].tolist()
+    schedule_incremental(catalog, 'X', conditions, phases, PROJECT_START, MODE_PHASE_SEQUENTIAL)
+    assert cached_schedule(catalog, 'X', conditions, phases, PROJECT_START, MODE_PHASE_SEQUENTIAL) is not None
+
+
+def verifica_cache_limitado_em_bytes():
+    """Com maxbytes, o cache descarta as entradas mais antigas até caber, e não guarda (nem abre espaço para) o que excede sozinho."""
+    from cache_lru import LRUTTLCache
+
+    cache = LRUTTLCache(maxsize=100, maxbytes=10, sizeof=len)
+    for key in 'abc':
+        cache.put(key, 'x' * 4)
+    assert 'a' not in cache and 'b' in cache and 'c' in cache, cache.stats()
+    assert cache.stats()['bytes'] == 8, cache.stats()
+    cache.put('b', 'x' * 2)  # substituir não conta o valor antigo
+    assert cache.stats()['bytes'] == 6, cache.stats()
+    cache.put('grande', 'x' * 11)
+    assert 'grande' not in cache and 'b' in cache and cache.stats()['bytes'] == 6, cache.stats()
+
+
+def verifica_montecarlo_limitado_e_convergente():
+    """Monte Carlo: iterações limitadas pelo nº de tarefas; parada antecipada quando os percentis estabilizam."""
+    import montecarlo
+    from agendamento import schedule
+
+    n = 50
+    df = pd.DataFrame({'numero': range(1, n + 1), 'fase': ['F1'] * 25 + ['F2'] * 25, 'nome': ['t'] * n,
+                       'duracao': [4.0] * n, 'otimista': [3.0] * n, 'pessimista': [8.0] * n})
+    df_sel = schedule(df, ['F1', 'F2'], PROJECT_START, MODE_PHASE_SEQUENTIAL)
+    cells = montecarlo.MAX_SIMULATION_CELLS
+    montecarlo.MAX_SIMULATION_CELLS = n * 2_000
+    try:
+        capped = montecarlo.simulate(df_sel, MODE_PHASE_SEQUENTIAL, 5_000, seed=0)
+    finally:
+        montecarlo.MAX_SIMULATION_CELLS = cells
+    assert capped.stopped == montecarlo.STOP_CAPPED and capped.iterations == len(capped.totals) == 2_000, capped[2:]
+    converged = montecarlo.simulate(df_sel, MODE_PHASE_SEQUENTIAL, 1_000_000, seed=0)
+    assert converged.stopped == montecarlo.STOP_CONVERGED, converged[2:]
+    assert converged.iterations == len(converged.totals) < 1_000_000, converged.iterations
+    assert (converged.phases['criticidade'] == 1).all(), converged.phases
+    full = montecarlo.simulate(df_sel, MODE_PHASE_SEQUENTIAL, 5_000, seed=0)
+    assert full.stopped is None and full.iterations == 5_000, full[2:]
+
+
+def main():
+    checks = [(name, func) for name, func in globals().items() if name.startswith('verifica_')]
+    failures = 0
+    for name, func in checks:
+        try:
+            func()
+            print(f"ok     {name}")
+        except Exception:
+            failures += 1
+            print(f"FALHA  {name}\n{traceback.format_exc()}")
+    print(f"{len(checks)} verificações, {failures} falha(s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# sintetico.py
+"""Catálogo sintético com o mesmo esquema da planilha exportada (Número; Classificação;
+Categoria; Fase; Condição; Nome; Duração; Como Fazer; Documento Referência; % Concluída),
+de 10³ a 10⁶ linhas, gerado de forma vetorizada e reprodutível (semente fixa).
+
+    python benchmarks/sintetico.py 100000 --saida catalogo_100k.csv
+"""
+import argparse
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+CLASSIFICATIONS = ['Embalagem Primária', 'Embalagem Secundária']
+PHASES = ['1. Escopo & Briefing', '2. Desenvolvimento', '3. Validação', '4. Aprovação Regulatória',
+          '5. Industrialização', '6. Lançamento']
+CONDITIONS = ['Sempre', 'A', 'B', 'C']
+CONDITION_WEIGHTS = [0.4, 0.2, 0.2, 0.2]
+# mesma forma de texto do arquivo real ("10 dias"), com algumas outras unidades
+DURATIONS = ['5 dias', '10 dias', '15 dias', '20 dias', '25 dias', '2 semanas', '1,5 dia', '16h', '1 mês']
+DURATION_DAYS = [5, 10, 15, 20, 25, 14, 1.5, 2, 30]
+DURATION_WEIGHTS = [0.2, 0.25, 0.2, 0.15, 0.05, 0.05, 0.04, 0.04, 0.02]
+ROWS_PER_CATEGORY = 100
+
+
+def synthetic_catalog(n_rows, n_categories=None, seed=0, predecessors=False, three_point=False, teams=0):
+    """DataFrame bruto (nomes de coluna da planilha) com n_rows tarefas.
+
+    Cada categoria tem as fases em ordem, com as tarefas de cada fase contíguas; por
+    padrão uma categoria a cada ROWS_PER_CATEGORY linhas (como os catálogos reais).
+    predecessors: coluna Predecessoras ligando cada tarefa a 1-2 anteriores da categoria;
+    three_point: colunas Otimista/Pessimista; teams: nº de equipes na coluna Equipe.
+    """
+    rng = np.random.default_rng(seed)
+    n_categories = n_categories or max(1, n_rows // ROWS_PER_CATEGORY)
+    numero = np.arange(1, n_rows + 1)
+    cat_code = np.arange(n_rows) * n_categories // n_rows
+    cat_start = np.searchsorted(cat_code, cat_code)
+    position = np.arange(n_rows) - cat_start
+    cat_size = np.bincount(cat_code, minlength=n_categories)[cat_code]
+    phase_code = position * len(PHASES) // cat_size
+    duration_code = rng.choice(len(DURATIONS), size=n_rows, p=DURATION_WEIGHTS)
+    numero_text = pd.Series(numero).astype(str)
+
+    df = pd.DataFrame({
+        'Número': numero,
+        'Classificação': pd.Categorical.from_codes(cat_code % len(CLASSIFICATIONS), CLASSIFICATIONS),
+        'Categoria': pd.Categorical.from_codes(cat_code, [f'Categoria {i + 1}' for i in range(n_categories)]),
+        'Fase': pd.Categorical.from_codes(phase_code, PHASES),
+        'Condição': pd.Categorical.from_codes(rng.choice(len(CONDITIONS), size=n_rows, p=CONDITION_WEIGHTS), CONDITIONS),
+        'Nome': 'Tarefa ' + numero_text,
+        'Duração': pd.Categorical.from_codes(duration_code, DURATIONS),
+        'Como Fazer': 'Texto.' + numero_text,
+        'Documento Referência': 'Doc.' + numero_text,
+        '% Concluída': '0%',
+    })
+    if predecessors:
+        # 1 ou 2 predecessoras entre as 20 tarefas anteriores da mesma categoria
+        back1 = np.minimum(position, rng.integers(1, 21, size=n_rows))
+        back2 = np.minimum(position, rng.integers(1, 21, size=n_rows))
+        first = pd.Series(numero - back1).astype(str).where(back1 > 0, '')
+        second = pd.Series(numero - back2).astype(str).where((back2 > 0) & (back2 != back1) & (rng.random(n_rows) < 0.3), '')
+        df['Predecessoras'] = (first + ';' + second).str.strip(';')
+    if three_point:
+        days = np.asarray(DURATION_DAYS, dtype=float)[duration_code]
+        df['Otimista'] = np.round(days * rng.uniform(0.6, 1.0, n_rows), 1)
+        df['Pessimista'] = np.round(days * rng.uniform(1.0, 2.0, n_rows), 1)
+    if teams:
+        df['Equipe'] = pd.Categorical.from_codes(rng.integers(0, teams, n_rows), [f'Equipe {i + 1}' for i in range(teams)])
+    return df
+
+
+def to_csv_bytes(df):
+    """CSV como o exportado pelo sistema de origem: ';' e latin-1."""
+    return df.to_csv(index=False, sep=';').encode('latin-1', errors='replace')
+
+
+def to_xlsx_bytes(df):
+    buffer = BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um catálogo sintético no esquema da planilha de tarefas.")
+    parser.add_argument('linhas', type=int)
+    parser.add_argument('--saida', required=True, help="arquivo .csv ou .xlsx")
+    parser.add_argument('--categorias', type=int, default=None)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--predecessoras', action='store_true')
+    parser.add_argument('--tres-pontos', action='store_true')
+    parser.add_argument('--equipes', type=int, default=0)
+    args = parser.parse_args(argv)
+    df = synthetic_catalog(args.linhas, args.categorias, args.semente, args.predecessoras, args.tres_pontos, args.equipes)
+    data = to_xlsx_bytes(df) if args.saida.lower().endswith('.xlsx') else to_csv_bytes(df)
+    with open(args.saida, 'wb') as f:
+        f.write(data)
+    print(f"{len(df)} tarefas, {df['Categoria'].nunique()} categorias -> {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# cache_lru.py
+"""Cache em memória com limite de tamanho, expiração (TTL) e contadores de acerto/falta."""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUTTLCache:
+    """Cache LRU com TTL, seguro para uso entre sessões (threads) do Streamlit.
+
+    - maxsize: número máximo de entradas; a menos usada recentemente é descartada.
+    - ttl: tempo de vida de cada entrada em segundos (None = sem expiração).
+    - maxbytes: limite da soma de sizeof(valor) em bytes (None = só o número de entradas);
+      um valor maior que o limite sozinho não fica em cache.
+    """
+
+    def __init__(self, maxsize=8, ttl=None, maxbytes=None, sizeof=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self._sizeof = sizeof
+        self._data = OrderedDict()
+        self._sizes = {}
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and (time.monotonic() - stored_at) > self.ttl
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, stored_at = item
+            if self._expired(stored_at):
+                self._drop(key)
+                self.evictions += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _drop(self, key):
+        del self._data[key]
+        self.nbytes -= self._sizes.pop(key, 0)
+
+    def _over_limit(self):
+        return len(self._data) > self.maxsize or (self.maxbytes is not None and self.nbytes > self.maxbytes)
+
+    def put(self, key, value):
+        size = self._sizeof(value) if self.maxbytes is not None and self._sizeof is not None else 0
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            self._data[key] = (value, time.monotonic())
+            self._sizes[key] = size
+            self.nbytes += size
+            while self._data and self._over_limit():
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Retorna o valor em cache ou calcula com compute() e armazena."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and not self._expired(item[1])
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entradas': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'bytes': self.nbytes,
+                'maxbytes': self.maxbytes,
+                'acertos': self.hits,
+                'faltas': self.misses,
+                'descartes': self.evictions,
+            }
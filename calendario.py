@@ -0,0 +1,100 @@
+# calendario.py
+"""Calendário de dias úteis (dias da semana + feriados, opcionalmente por site/planta).
+
+Os deslocamentos do agendamento (em dias de trabalho) são convertidos em datas de
+uma só vez com numpy.busday_offset, para todas as tarefas.
+"""
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from cache_lru import LRUTTLCache
+from ingestao import catalog_key, find_col
+
+WEEKDAY_LABELS = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
+DEFAULT_WEEKDAYS = WEEKDAY_LABELS[:5]
+ALL_SITES = 'Todos'
+
+_holiday_cache = LRUTTLCache(maxsize=8, ttl=60 * 60)
+
+
+class WorkCalendar:
+    """Dias úteis: máscara semanal (Seg..Dom) + lista de feriados."""
+
+    def __init__(self, weekdays=None, holidays=None):
+        weekdays = DEFAULT_WEEKDAYS if weekdays is None else weekdays
+        self.weekmask = [label in weekdays for label in WEEKDAY_LABELS]
+        if not any(self.weekmask):
+            raise ValueError("O calendário precisa de pelo menos um dia útil na semana.")
+        holidays = [] if holidays is None else holidays
+        dates = pd.to_datetime(pd.Series(list(holidays), dtype=object), errors='coerce').dropna()
+        self.holidays = np.unique(dates.to_numpy().astype('datetime64[D]'))
+        self._busdaycal = np.busdaycalendar(weekmask=self.weekmask, holidays=self.holidays)
+        # identifica o calendário em chaves de cache
+        self.key = (tuple(self.weekmask), self.holidays.tobytes())
+
+    def offsets_to_dates(self, origin, offsets, is_end=False):
+        """Converte deslocamentos (dias úteis, float, NaN permitido) em datetime64[ns].
+
+        Início: o dia útil `floor(off)` após a origem, mais a fração do dia.
+        Fim: termina dentro do último dia útil trabalhado (ex.: 1 dia começando na
+        sexta termina no fim da sexta, não na segunda).
+        """
+        offsets = np.asarray(offsets, dtype=float)
+        valid = ~np.isnan(offsets)
+        safe = np.where(valid, offsets, 0.0)
+        if is_end:
+            whole = np.maximum(np.ceil(safe) - 1, 0)
+        else:
+            whole = np.floor(safe)
+        origin_day = np.datetime64(pd.Timestamp(origin).date(), 'D')
+        days = np.busday_offset(origin_day, whole.astype(np.int64), roll='forward', busdaycal=self._busdaycal)
+        fraction = pd.to_timedelta(safe - whole, unit='D').round('s').to_numpy()
+        dates = days.astype('datetime64[ns]') + fraction
+        return np.where(valid, dates, np.datetime64('NaT', 'ns'))
+
+    def count_workdays(self, start, end):
+        """Dias úteis no intervalo [start, end)."""
+        return int(np.busday_count(np.datetime64(pd.Timestamp(start).date(), 'D'),
+                                   np.datetime64(pd.Timestamp(end).date(), 'D'),
+                                   busdaycal=self._busdaycal))
+
+
+def read_holidays(data, filename):
+    """Lê um arquivo de feriados (.csv, .txt, .xlsx) com uma coluna de data e, opcionalmente, de site.
+
+    Retorna um DataFrame com as colunas 'data' e 'site' (ALL_SITES quando não informado).
+    """
+    if filename.lower().endswith(('.xlsx', '.xls')):
+        raw = pd.read_excel(BytesIO(data), engine='openpyxl')
+    else:
+        raw = pd.read_csv(BytesIO(data), sep=None, engine='python')
+    date_col = find_col(raw, ['data', 'date', 'feriado', 'dia'])
+    if date_col is None:
+        date_col = raw.columns[0]
+    site_col = find_col(raw, ['site', 'planta', 'unidade', 'fábrica', 'fabrica'])
+    out = pd.DataFrame({'data': pd.to_datetime(raw[date_col], dayfirst=True, errors='coerce')})
+    out['site'] = raw[site_col].fillna(ALL_SITES).astype(str).str.strip() if site_col else ALL_SITES
+    return out.dropna(subset=['data'])
+
+
+def load_holidays(data, filename):
+    """read_holidays com cache pelo conteúdo do arquivo."""
+    key = catalog_key(data, filename)
+    return _holiday_cache.get_or_compute(key, lambda: read_holidays(data, filename))
+
+
+def holiday_sites(holidays):
+    sites = sorted(s for s in holidays['site'].unique() if s != ALL_SITES)
+    return [ALL_SITES] + sites
+
+
+def site_calendar(holidays, site=ALL_SITES, weekdays=None):
+    """Calendário de um site: feriados gerais (ALL_SITES) + os feriados do próprio site."""
+    if holidays is None or holidays.empty:
+        return WorkCalendar(weekdays)
+    mask = holidays['site'] == ALL_SITES
+    if site != ALL_SITES:
+        mask |= holidays['site'] == site
+    return WorkCalendar(weekdays, holidays.loc[mask, 'data'])
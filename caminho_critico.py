@@ -0,0 +1,186 @@
+# caminho_critico.py
+"""Método do caminho crítico (CPM) sobre predecessoras explícitas entre tarefas.
+
+O grafo é guardado em formato CSR (arrays NumPy) e percorrido nível a nível
+(algoritmo de Kahn): cada nível é processado com operações vetorizadas, então o
+custo total é linear no número de tarefas + dependências. Grafos muito "profundos"
+(longas cadeias, poucos nós por nível) usam a mesma ordenação de Kahn em laço
+escalar, onde o custo fixo por nível das operações NumPy dominaria.
+"""
+import numpy as np
+import pandas as pd
+
+
+# abaixo desta largura média de nível o laço escalar é mais rápido que o vetorizado
+MIN_LEVEL_WIDTH = 64
+
+
+class CycleError(ValueError):
+    """As predecessoras formam um ciclo; `nodes` são as posições das tarefas envolvidas."""
+
+    def __init__(self, nodes):
+        self.nodes = np.asarray(nodes)
+        super().__init__(f"Dependências circulares entre {len(self.nodes)} tarefa(s)")
+
+
+def build_edges(numeros, predecessores):
+    """Converte a coluna de predecessoras ("12;15", "12, 15"...) em arestas por posição.
+
+    numeros: identificador de cada tarefa (coluna 'numero').
+    predecessores: números das tarefas das quais cada tarefa depende. Células numéricas
+    (12 ou 12.0, como o Excel lê) são uma predecessora só; no texto, cada item separado
+    por ';' ou ',' vale pelo número inicial ("5FS+2d" -> 5, sem o atraso).
+    Predecessoras que não estão na lista (ex.: filtradas pela condição) e
+    auto-referências são ignoradas. Retorna (src, dst) com src -> dst.
+    """
+    numeros = pd.Series(numeros).reset_index(drop=True)
+    preds = pd.Series(predecessores).reset_index(drop=True)
+    as_number = pd.to_numeric(preds, errors='coerce')
+    is_number = as_number.notna() & (as_number == np.floor(as_number))
+    numeric_refs = as_number[is_number].astype('Int64')
+    tokens = preds[~is_number & preds.notna()].astype(str).str.split(r'[;,]', regex=True).explode()
+    text_refs = tokens.str.extract(r'^\s*(\d+)', expand=False).dropna().astype('Int64')
+    refs = pd.concat([numeric_refs, text_refs]).sort_index(kind='stable')
+    if refs.empty:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    # compara como número: "12", 12 e 12.0 identificam a mesma tarefa
+    keys = pd.to_numeric(numeros, errors='coerce').to_numpy(dtype=float)
+    position = pd.Series(np.arange(len(numeros)), index=keys)
+    position = position[~position.index.duplicated() & ~np.isnan(keys)]
+    src = refs.astype(float).map(position)
+    ok = src.notna().to_numpy()
+    src = src.to_numpy()[ok].astype(np.int64)
+    dst = refs.index.to_numpy()[ok].astype(np.int64)
+    keep = src != dst
+    return src[keep], dst[keep]
+
+
+def csr_adjacency(n, src, dst):
+    """Lista de adjacência compacta: sucessores de i em targets[indptr[i]:indptr[i+1]]."""
+    order = np.argsort(src, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order]
+
+
+def _edges_of(nodes, indptr):
+    """Índices (em targets) de todas as arestas que saem de `nodes`, e a origem de cada uma."""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    sources = np.repeat(nodes, counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets, sources
+
+
+class _GraphTooDeep(Exception):
+    pass
+
+
+def topological_levels(n, src, dst, min_width=None):
+    """Ordena as tarefas em níveis topológicos (Kahn). Levanta CycleError se houver ciclo.
+
+    Com min_width, desiste (_GraphTooDeep) quando os níveis ficam estreitos demais.
+    """
+    indptr, targets = csr_adjacency(n, src, dst)
+    indegree = np.bincount(dst, minlength=n)
+    frontier = np.flatnonzero(indegree == 0)
+    levels = []
+    visited = 0
+    while frontier.size:
+        levels.append(frontier)
+        visited += frontier.size
+        if min_width and len(levels) > min_width and visited < min_width * len(levels):
+            raise _GraphTooDeep()
+        idx, _ = _edges_of(frontier, indptr)
+        if idx.size == 0:
+            break
+        touched, counts = np.unique(targets[idx], return_counts=True)
+        indegree[touched] -= counts
+        frontier = touched[indegree[touched] == 0]
+    if visited < n:
+        raise CycleError(np.flatnonzero(indegree > 0))
+    return levels, indptr, targets
+
+
+def _passes_by_level(durations, levels, indptr, targets):
+    n = len(durations)
+    # ida: início mais cedo = maior fim mais cedo entre as predecessoras
+    es = np.zeros(n)
+    for nodes in levels:
+        idx, sources = _edges_of(nodes, indptr)
+        if idx.size:
+            np.maximum.at(es, targets[idx], es[sources] + durations[sources])
+
+    # volta: fim mais tarde = menor início mais tarde entre as sucessoras
+    project_end = (es + durations).max() if n else 0.0
+    lf = np.full(n, project_end)
+    for nodes in reversed(levels):
+        idx, sources = _edges_of(nodes, indptr)
+        if idx.size:
+            succ = targets[idx]
+            np.minimum.at(lf, sources, lf[succ] - durations[succ])
+    return es, lf
+
+
+def _passes_scalar(durations, src, dst):
+    """Mesmo algoritmo (Kahn + ida e volta) em laço escalar sobre listas."""
+    n = len(durations)
+    indptr, targets = csr_adjacency(n, src, dst)
+    ip = indptr.tolist()
+    tg = targets.tolist()
+    dur = durations.tolist()
+    indegree = np.bincount(dst, minlength=n).tolist()
+    order = [i for i in range(n) if indegree[i] == 0]
+    es = [0.0] * n
+    for u in order:  # `order` cresce durante o laço (fila de Kahn)
+        fu = es[u] + dur[u]
+        for v in tg[ip[u]:ip[u + 1]]:
+            if fu > es[v]:
+                es[v] = fu
+            indegree[v] -= 1
+            if not indegree[v]:
+                order.append(v)
+    if len(order) < n:
+        raise CycleError(np.flatnonzero(np.asarray(indegree) > 0))
+
+    project_end = max(e + d for e, d in zip(es, dur)) if n else 0.0
+    lf = [project_end] * n
+    for u in reversed(order):
+        m = lf[u]
+        for v in tg[ip[u]:ip[u + 1]]:
+            ls_v = lf[v] - dur[v]
+            if ls_v < m:
+                m = ls_v
+        lf[u] = m
+    return np.asarray(es), np.asarray(lf)
+
+
+def critical_path(durations, src, dst):
+    """Passadas de ida e volta do CPM.
+
+    durations: duração (dias) de cada tarefa; src/dst: arestas predecessora -> sucessora.
+    Retorna um DataFrame (uma linha por tarefa, mesma ordem) com es, ef, ls, lf, folga e critica.
+    """
+    durations = np.asarray(durations, dtype=float)
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    try:
+        levels, indptr, targets = topological_levels(len(durations), src, dst, min_width=MIN_LEVEL_WIDTH)
+        es, lf = _passes_by_level(durations, levels, indptr, targets)
+    except _GraphTooDeep:
+        es, lf = _passes_scalar(durations, src, dst)
+    ef = es + durations
+    ls = lf - durations
+    slack = ls - es
+    return pd.DataFrame({
+        'es': es,
+        'ef': ef,
+        'ls': ls,
+        'lf': lf,
+        'folga': slack,
+        'critica': np.isclose(slack, 0.0),
+    })
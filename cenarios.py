@@ -0,0 +1,157 @@
+# cenarios.py
+"""Otimizador de cenários (what-if) sobre as combinações de condições por fase.
+
+Em vez de reagendar cada cenário, o catálogo é resumido uma vez em agregados por
+(fase, condição): nº de tarefas, soma e maior duração. Para cada fase todos os
+subconjuntos de condições são avaliados de uma vez (matriz de máscaras), e as fases
+são combinadas em sequência mantendo só a fronteira de Pareto
+(menor duração total x mais tarefas cobertas), com ponteiros para reconstruir o cenário.
+Fronteiras muito grandes (catálogos enormes no modo encadeado) são limitadas a
+MAX_FRONT pontos; os pontos devolvidos continuam sendo cenários reais e exatos.
+
+Modos suportados: os mesmos de agendamento.compute_offsets
+- phase_sequential: duração da fase = maior tarefa; total = soma das fases.
+- chain_seq: duração da fase = soma das tarefas; total = soma das fases.
+- parallel: duração da fase = soma das tarefas; total = maior fase.
+"""
+import numpy as np
+import pandas as pd
+
+from agendamento import MODE_CHAIN, MODE_PARALLEL, MODE_PHASE_SEQUENTIAL, offsets_to_dates
+from cache_lru import LRUTTLCache
+from ingestao import CATALOG_CACHE_MAXSIZE, CATALOG_CACHE_TTL
+from selecao import ALL_CATEGORIES
+
+# 2**16 subconjuntos por fase no máximo
+MAX_PHASE_CONDITIONS = 16
+# acima disto a fronteira acumulada é rarefeita (pontos igualmente espaçados, extremos mantidos)
+MAX_FRONT = 400
+
+_aggregate_cache = LRUTTLCache(maxsize=CATALOG_CACHE_MAXSIZE, ttl=CATALOG_CACHE_TTL)
+
+
+def condition_aggregates(df, categoria=ALL_CATEGORIES):
+    """Uma linha por (fase, condição em minúsculas): condicao (texto original), tarefas, soma, maior."""
+    if categoria != ALL_CATEGORIES:
+        df = df[df['categoria'] == categoria] if 'categoria' in df.columns else df.iloc[0:0]
+    df = df[df['fase'].notna()]
+    condicao = df['condicao'].astype(str)
+    work = pd.DataFrame({
+        'fase': df['fase'].to_numpy(),
+        'cond': condicao.str.lower().to_numpy(),
+        'condicao': condicao.to_numpy(),
+        'duracao': df['duracao'].astype(float).fillna(1).to_numpy(),
+    })
+    return (
+        work.groupby(['fase', 'cond'], sort=False)
+        .agg(condicao=('condicao', 'first'), tarefas=('duracao', 'size'),
+             soma=('duracao', 'sum'), maior=('duracao', 'max'))
+        .reset_index()
+    )
+
+
+def get_condition_aggregates(catalog, categoria=ALL_CATEGORIES):
+    """condition_aggregates em cache por (catálogo, categoria)."""
+    return _aggregate_cache.get_or_compute(
+        (catalog.key, categoria), lambda: condition_aggregates(catalog.df, categoria)
+    )
+
+
+def _subset_masks(k):
+    """Matriz (2**k, k) de booleanos com todos os subconjuntos de k itens."""
+    return ((np.arange(2 ** k)[:, None] >> np.arange(k)) & 1).astype(bool)
+
+
+def _pareto(durations, tasks, limit=None):
+    """Índices da fronteira (menor duração, mais tarefas), ordenados por duração.
+
+    Com limit, fronteiras maiores são reduzidas a limit pontos igualmente espaçados.
+    """
+    order = np.lexsort((-tasks, durations))
+    t = tasks[order]
+    best_before = np.maximum.accumulate(np.concatenate(([-1], t[:-1])))
+    front = order[t > best_before]
+    if limit is not None and len(front) > limit:
+        front = front[np.unique(np.linspace(0, len(front) - 1, limit).round().astype(np.int64))]
+    return front
+
+
+def phase_options(agg_phase, mode, candidates=None):
+    """Avalia todos os subconjuntos de condições de uma fase.
+
+    Retorna (duracoes, tarefas, mascaras, nomes) só com os subconjuntos de Pareto.
+    'Sempre' entra em todos os subconjuntos, como na seleção do app.
+    """
+    always = agg_phase[agg_phase['cond'] == 'sempre']
+    optional = agg_phase[agg_phase['cond'] != 'sempre']
+    if candidates is not None:
+        wanted = {str(c).lower() for c in candidates}
+        optional = optional[optional['cond'].isin(wanted)]
+    k = len(optional)
+    if k > MAX_PHASE_CONDITIONS:
+        raise ValueError(f"Fase com {k} condições: o limite do otimizador é {MAX_PHASE_CONDITIONS}.")
+    masks = _subset_masks(k)
+    tasks = masks @ optional['tarefas'].to_numpy() + always['tarefas'].sum()
+    if mode == MODE_PHASE_SEQUENTIAL:
+        maiores = np.where(masks, optional['maior'].to_numpy(), 0.0)
+        durations = np.maximum(maiores.max(axis=1, initial=0.0), always['maior'].max() if len(always) else 0.0)
+    else:
+        durations = masks @ optional['soma'].to_numpy() + always['soma'].sum()
+    keep = _pareto(durations, tasks)
+    return durations[keep], tasks[keep], masks[keep], optional['condicao'].tolist()
+
+
+def pareto_scenarios(agg, phases_ordered, mode, project_start=None, calendar=None, candidates=None):
+    """Cenários de Pareto (duração total x tarefas cobertas) sobre as condições de cada fase.
+
+    agg: saída de condition_aggregates.
+    candidates: dict opcional fase -> condições que podem ser escolhidas (padrão: todas da fase).
+    Retorna um DataFrame ordenado por duração com duracao_dias, tarefas, fim (se houver
+    project_start) e fase_condicoes (dict fase -> condições, pronto para SelectionIndex.select).
+    """
+    if mode not in (MODE_PHASE_SEQUENTIAL, MODE_CHAIN, MODE_PARALLEL):
+        raise ValueError(f"O otimizador não suporta o modo {mode}.")
+    candidates = candidates or {}
+    by_phase = dict(tuple(agg.groupby('fase', sort=False)))
+
+    # fronteira acumulada + ponteiros (índice na fronteira anterior, subconjunto da fase)
+    front_d = np.zeros(1)
+    front_t = np.zeros(1, dtype=np.int64)
+    steps = []
+    for ph in phases_ordered:
+        if ph not in by_phase:
+            continue
+        d, t, masks, names = phase_options(by_phase[ph], mode, candidates.get(ph))
+        if mode == MODE_PARALLEL:
+            comb_d = np.maximum(front_d[:, None], d[None, :]).ravel()
+        else:
+            comb_d = (front_d[:, None] + d[None, :]).ravel()
+        comb_t = (front_t[:, None] + t[None, :]).ravel()
+        keep = _pareto(comb_d, comb_t, MAX_FRONT)
+        prev_idx, opt_idx = np.divmod(keep, len(d))
+        steps.append((ph, prev_idx, opt_idx, masks, names))
+        front_d, front_t = comb_d[keep], comb_t[keep]
+
+    # reconstrução de trás para frente
+    chosen = [{} for _ in range(len(front_d))]
+    pointer = np.arange(len(front_d))
+    for ph, prev_idx, opt_idx, masks, names in reversed(steps):
+        options = opt_idx[pointer]
+        for i, opt in enumerate(options):
+            chosen[i][ph] = [name for name, on in zip(names, masks[opt]) if on]
+        pointer = prev_idx[pointer]
+
+    result = pd.DataFrame({
+        'duracao_dias': front_d,
+        'tarefas': front_t,
+        'condicoes_escolhidas': [sum(len(v) for v in c.values()) for c in chosen],
+    })
+    if project_start is not None:
+        result['fim'] = offsets_to_dates(project_start, front_d, calendar, is_end=True)
+    result['fase_condicoes'] = [{ph: c[ph] for ph in phases_ordered if ph in c} for c in chosen]
+    return result
+
+
+def describe_scenario(fase_condicoes):
+    """Texto curto do cenário: "Fase 1: A, B | Fase 2: —"."""
+    return ' | '.join(f"{ph}: {', '.join(map(str, conds)) or '—'}" for ph, conds in fase_condicoes.items())
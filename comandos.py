@@ -0,0 +1,149 @@
+# comandos.py
+"""Interpretação dos comandos em linguagem natural do chatbot.
+
+O vocabulário do catálogo (categorias, fases, condições) é compilado uma vez em
+um dicionário de sequências de palavras sem acento; o texto do usuário é
+percorrido uma única vez, casando sempre a sequência mais longa possível.
+"""
+import difflib
+import re
+import unicodedata
+
+from cache_lru import LRUTTLCache
+
+# palavras com pelo menos este tamanho aceitam pequenos erros de digitação
+FUZZY_MIN_LENGTH = 4
+FUZZY_CUTOFF = 0.8
+
+_WORD = re.compile(r'\w+')
+_PHASE_NUMBER = re.compile(r'^\s*(\d+)\s*[.)-]?\s*')
+_PHASE_PARTS = re.compile(r'\s*(?:&|/|\s-\s|\be\b)\s*')
+
+_matcher_cache = LRUTTLCache(maxsize=16)
+
+
+def fold(text):
+    """Minúsculas e sem acentos ("Validação" -> "validacao")."""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def _words(text):
+    return tuple(_WORD.findall(fold(text)))
+
+
+class CommandMatcher:
+    """Vocabulário compilado de um catálogo."""
+
+    def __init__(self, categorias, fases, condicoes):
+        self.fases = list(fases)
+        self._aliases = {}
+        for cat in categorias:
+            self._add_with_keywords(cat, 'categoria', categorias)
+        for fase in self.fases:
+            self._add_with_keywords(fase, 'fase', self.fases)
+            number = _PHASE_NUMBER.match(str(fase))
+            rest = _PHASE_NUMBER.sub('', str(fase))
+            self._add(_words(rest), 'fase', fase)
+            if number:
+                self._add(('fase', number.group(1)), 'fase', fase)
+            for part in _PHASE_PARTS.split(rest):
+                self._add(_words(part), 'fase', fase)
+        for cond in condicoes:
+            self._add(_words(cond), 'condicao', cond)
+        self._max_len = max((len(k) for k in self._aliases), default=0)
+        self._fuzzy_vocab = sorted({w for key in self._aliases for w in key if len(w) >= FUZZY_MIN_LENGTH})
+        self._corrections = {}
+
+    def _add(self, words, kind, value):
+        if not words:
+            return
+        entries = self._aliases.setdefault(words, [])
+        if (kind, value) not in entries:
+            entries.append((kind, value))
+
+    def _add_with_keywords(self, name, kind, siblings):
+        """Nome completo + cada palavra significativa que só aparece neste nome."""
+        self._add(_words(name), kind, name)
+        others = [set(_words(s)) for s in siblings if s != name]
+        for word in _words(name):
+            if len(word) >= FUZZY_MIN_LENGTH and not word.isdigit() and not any(word in o for o in others):
+                self._add((word,), kind, name)
+
+    def _correct(self, word):
+        """Troca uma palavra desconhecida pela mais parecida do vocabulário (se houver)."""
+        if len(word) < FUZZY_MIN_LENGTH or word in self._corrections:
+            return self._corrections.get(word, word)
+        close = difflib.get_close_matches(word, self._fuzzy_vocab, n=1, cutoff=FUZZY_CUTOFF)
+        self._corrections[word] = close[0] if close else word
+        return self._corrections[word]
+
+    def scan(self, text):
+        """Lista de (tipo, valor) na ordem em que aparecem no texto."""
+        raw = _WORD.findall(unicodedata.normalize('NFC', str(text)))
+        words = [self._correct(fold(w)) for w in raw]
+        events = []
+        i = 0
+        while i < len(words):
+            for n in range(min(self._max_len, len(words) - i), 0, -1):
+                found = self._aliases.get(tuple(words[i:i + n]))
+                if not found:
+                    continue
+                for kind, value in found:
+                    # condições de uma letra ("A") só valem em maiúscula, para não
+                    # confundir com o artigo "a"
+                    if kind == 'condicao' and n == 1 and len(words[i]) == 1 and not raw[i].isupper():
+                        continue
+                    events.append((kind, value))
+                i += n - 1
+                break
+            i += 1
+        return events
+
+    def parse(self, text):
+        """Extrai categoria e condições por fase do texto.
+
+        Condições citadas antes de uma fase ("A e C na fase de Desenvolvimento") ou logo
+        depois dela ("fase de Validação com B") são associadas a ela. Sem nenhuma fase
+        citada, as condições valem para todas as fases (aplicado_a_todas=True).
+        """
+        parsed = {'categoria': None, 'fase_condicoes': {}, 'aplicado_a_todas': False}
+        pending = []
+        current = None  # fase que ainda pode receber as condições seguintes
+        seen_phases = []
+        for kind, value in self.scan(text):
+            if kind == 'categoria':
+                if parsed['categoria'] is None:
+                    parsed['categoria'] = value
+            elif kind == 'fase':
+                seen_phases.append(value)
+                if pending:
+                    self._attach(parsed, value, pending)
+                    pending = []
+                    current = None
+                else:
+                    current = value
+            elif kind == 'condicao':
+                if current is not None:
+                    self._attach(parsed, current, [value])
+                else:
+                    pending.append(value)
+
+        if pending and seen_phases:
+            self._attach(parsed, seen_phases[-1], pending)
+        elif pending:
+            parsed['aplicado_a_todas'] = True
+            for fase in self.fases:
+                self._attach(parsed, fase, pending)
+        return parsed
+
+    @staticmethod
+    def _attach(parsed, fase, conds):
+        target = parsed['fase_condicoes'].setdefault(fase, [])
+        target.extend(c for c in conds if c not in target)
+
+
+def get_matcher(categorias, fases, condicoes):
+    """CommandMatcher em cache pelo vocabulário do catálogo."""
+    key = (tuple(categorias), tuple(fases), tuple(condicoes))
+    return _matcher_cache.get_or_compute(key, lambda: CommandMatcher(*key))
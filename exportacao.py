@@ -0,0 +1,119 @@
+# exportacao.py
+"""Geração dos arquivos de exportação do cronograma (CSV e XLSX).
+
+Os arquivos só são gerados quando o usuário pede o download e ficam em cache pela
+impressão digital do cronograma. O XLSX é escrito em modo streaming (openpyxl
+write-only), linha a linha, com uma aba geral, uma aba de resumo e uma aba por fase.
+"""
+import hashlib
+import math
+import re
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from agendamento import phase_summary
+from cache_lru import LRUTTLCache
+
+EXPORT_CACHE_MAXSIZE = 16
+EXPORT_CACHE_TTL = 30 * 60  # segundos
+XLSX_CHUNK_ROWS = 2_000  # linhas copiadas por vez ao escrever uma aba
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_export_cache = LRUTTLCache(maxsize=EXPORT_CACHE_MAXSIZE, ttl=EXPORT_CACHE_TTL)
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]\*\?/\\:]')
+
+
+def schedule_fingerprint(df_sel):
+    """Hash do conteúdo do cronograma (valores + nomes das colunas)."""
+    h = hashlib.sha256()
+    h.update('\x1f'.join(map(str, df_sel.columns)).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df_sel, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def build_csv(df_sel):
+    return df_sel.to_csv(index=False).encode('utf-8')
+
+
+def _cell(value):
+    """Valor aceito pelo openpyxl (sem NaN/NaT/tipos NumPy)."""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+        if isinstance(value, float) and math.isnan(value):
+            return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if value is pd.NA:
+        return None
+    return value
+
+
+def _sheet_title(name, used):
+    base = _INVALID_SHEET_CHARS.sub(' ', str(name)).strip()[:31] or 'Fase'
+    title = base
+    n = 2
+    while title.lower() in used:
+        suffix = f' ({n})'
+        title = base[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(title.lower())
+    return title
+
+
+def _write_rows(ws, df, columns, positions=None):
+    """Cabeçalho e linhas de df (todas, ou só `positions`) em blocos de XLSX_CHUNK_ROWS.
+
+    Só um bloco de linhas é copiado por vez, nunca a aba inteira.
+    """
+    ws.append(columns)
+    n = len(df) if positions is None else len(positions)
+    for begin in range(0, n, XLSX_CHUNK_ROWS):
+        end = min(begin + XLSX_CHUNK_ROWS, n)
+        chunk = df.iloc[begin:end] if positions is None else df.iloc[positions[begin:end]]
+        for row in chunk[columns].itertuples(index=False, name=None):
+            ws.append([_cell(v) for v in row])
+
+
+def build_xlsx(df_sel):
+    """XLSX com abas 'cronograma', 'resumo' e uma por fase, escrito em streaming."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    columns = df_sel.columns.tolist()
+    used = {'cronograma', 'resumo'}
+
+    _write_rows(wb.create_sheet('cronograma'), df_sel, columns)
+
+    summary = phase_summary(df_sel)
+    _write_rows(wb.create_sheet('resumo'), summary, summary.columns.tolist())
+
+    if 'fase' in df_sel.columns:
+        # posições por fase: cada aba copia só blocos das suas linhas
+        for fase, positions in df_sel.groupby('fase', sort=False, observed=True).indices.items():
+            _write_rows(wb.create_sheet(_sheet_title(fase, used)), df_sel, columns, positions)
+
+    out = BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def _cached(kind, build, df_sel):
+    key = (kind, schedule_fingerprint(df_sel))
+    return _export_cache.get_or_compute(key, lambda: build(df_sel))
+
+
+def export_csv(df_sel):
+    """CSV do cronograma (em cache pela impressão digital)."""
+    return _cached('csv', build_csv, df_sel)
+
+
+def export_xlsx(df_sel):
+    """XLSX do cronograma (em cache pela impressão digital)."""
+    return _cached('xlsx', build_xlsx, df_sel)
@@ -0,0 +1,158 @@
+# gantt.py
+"""Gantt escalável: barras-resumo por fase e detalhe por tarefa só da fase expandida.
+
+As barras são desenhadas como segmentos de linha grossos em traces WebGL
+(Scattergl): um trace por cor, com os segmentos separados por None, em vez de
+um elemento SVG por tarefa como no px.timeline. O plotly só é importado quando a
+primeira figura é montada, e as figuras ficam em cache pela impressão digital do
+cronograma e pelas fases expandidas.
+"""
+import numpy as np
+import pandas as pd
+
+from agendamento import phase_summary
+from cache_lru import LRUTTLCache
+from exportacao import EXPORT_CACHE_TTL, schedule_fingerprint
+
+# acima deste número de tarefas não é oferecido o detalhe de todas as fases de uma vez
+GANTT_DETAIL_LIMIT = 500
+BAR_WIDTH = 16
+ROW_HEIGHT = 28
+SUMMARY_COLOR = '#4C78A8'
+GANTT_CACHE_MAXSIZE = 16
+
+_figure_cache = LRUTTLCache(maxsize=GANTT_CACHE_MAXSIZE, ttl=EXPORT_CACHE_TTL)
+
+
+def _interleave(a, b):
+    """[a0, b0, None, a1, b1, None, ...] como array object."""
+    out = np.empty(len(a) * 3, dtype=object)
+    out[0::3] = a
+    out[1::3] = b
+    out[2::3] = None
+    return out
+
+
+def _bar_trace(go, starts, ends, rows, hover, name, color=None):
+    starts = pd.to_datetime(pd.Series(starts)).dt.strftime('%Y-%m-%d %H:%M').to_numpy()
+    ends = pd.to_datetime(pd.Series(ends)).dt.strftime('%Y-%m-%d %H:%M').to_numpy()
+    rows = np.asarray(rows, dtype=object)
+    hover = np.asarray(hover, dtype=object)
+    return go.Scattergl(
+        x=_interleave(starts, ends),
+        y=_interleave(rows, rows),
+        text=_interleave(hover, hover),
+        mode='lines',
+        line={'width': BAR_WIDTH, 'color': color} if color else {'width': BAR_WIDTH},
+        name=str(name),
+        hovertemplate='%{text}<extra></extra>',
+        connectgaps=False,
+    )
+
+
+def task_labels(df_tasks):
+    if 'numero' in df_tasks.columns:
+        return df_tasks['numero'].astype(str) + ' - ' + df_tasks['nome'].astype(str)
+    return df_tasks['nome'].astype(str)
+
+
+def gantt_figure(df_sel, expanded_phases=()):
+    """Figura com uma barra por fase e, logo abaixo das fases expandidas, uma por tarefa.
+
+    expanded_phases: fases cujo detalhe deve ser enviado ao navegador.
+    """
+    import plotly.graph_objects as go
+
+    summary = phase_summary(df_sel)
+    fig = go.Figure()
+    fig.add_trace(_bar_trace(
+        go,
+        summary['inicio'],
+        summary['fim'],
+        summary['fase'].astype(str),
+        summary['fase'].astype(str) + '<br>' + summary['tarefas'].astype(str) + ' tarefas, '
+        + summary['duracao_dias'].astype(str) + ' dias',
+        'Fase (resumo)',
+        SUMMARY_COLOR,
+    ))
+
+    row_order = []
+    expanded = set(expanded_phases)
+    detail_parts = []
+    for fase in summary['fase'].astype(str):
+        row_order.append(fase)
+        if fase in expanded:
+            tasks = df_sel[df_sel['fase'].astype(str) == fase]
+            labels = '   ' + task_labels(tasks)
+            # rótulos únicos por fase (o eixo y é categórico)
+            labels = labels + np.where(labels.duplicated(keep=False), ' #' + pd.Series(range(len(tasks)), index=tasks.index).astype(str), '')
+            row_order.extend(labels.tolist())
+            detail_parts.append(tasks.assign(_row=labels))
+
+    if detail_parts:
+        detail = pd.concat(detail_parts)
+        color_col = 'condicao' if 'condicao' in detail.columns else None
+        groups = detail.groupby(detail[color_col].astype(str), sort=True) if color_col else [('Tarefa', detail)]
+        for cond, part in groups:
+            hover = (part['_row'].str.strip() + '<br>' + part['duracao'].astype(str) + ' dias'
+                     + ('<br>Condição: ' + part[color_col].astype(str) if color_col else ''))
+            if 'folga' in part.columns:
+                hover = hover + '<br>Folga: ' + part['folga'].round(1).astype(str) + ' dias'
+            fig.add_trace(_bar_trace(go, part['start'], part['end'], part['_row'], hover, cond))
+
+    fig.update_yaxes(categoryorder='array', categoryarray=row_order, autorange='reversed', type='category')
+    fig.update_layout(
+        height=max(300, 80 + ROW_HEIGHT * len(row_order)),
+        margin={'l': 10, 'r': 10, 't': 30, 'b': 10},
+        legend={'orientation': 'h', 'y': 1.02, 'yanchor': 'bottom'},
+        xaxis={'type': 'date'},
+    )
+    return fig
+
+
+def get_gantt_figure(df_sel, expanded_phases=()):
+    """gantt_figure em cache pelo conteúdo do cronograma e pelas fases expandidas."""
+    expanded_phases = tuple(expanded_phases)
+    key = (schedule_fingerprint(df_sel), expanded_phases)
+    return _figure_cache.get_or_compute(key, lambda: gantt_figure(df_sel, expanded_phases))
+
+
+def portfolio_figure(projects, project_phases, expanded_projects=()):
+    """Gantt do portfólio: uma barra por projeto e, para os projetos expandidos, uma por fase.
+
+    projects / project_phases: saídas de portfolio.portfolio_summary.
+    """
+    import plotly.graph_objects as go
+
+    projects = projects.dropna(subset=['inicio'])
+    fig = go.Figure()
+    fig.add_trace(_bar_trace(
+        go,
+        projects['inicio'],
+        projects['fim'],
+        projects['projeto'].astype(str),
+        projects['projeto'].astype(str) + '<br>' + projects['categoria'].astype(str) + '<br>'
+        + projects['tarefas'].astype(str) + ' tarefas, ' + projects['duracao_dias'].astype(str) + ' dias',
+        'Projeto',
+        SUMMARY_COLOR,
+    ))
+
+    row_order = []
+    expanded = set(expanded_projects)
+    detail = project_phases[project_phases['projeto'].isin(expanded)]
+    detail = detail.assign(_row='   ' + detail['projeto'].astype(str) + ' · ' + detail['fase'].astype(str))
+    for nome in projects['projeto'].astype(str):
+        row_order.append(nome)
+        row_order.extend(detail.loc[detail['projeto'] == nome, '_row'].tolist())
+    for fase, part in detail.groupby(detail['fase'].astype(str), sort=False):
+        hover = part['_row'].str.strip() + '<br>' + part['tarefas'].astype(str) + ' tarefas'
+        fig.add_trace(_bar_trace(go, part['inicio'], part['fim'], part['_row'], hover, fase))
+
+    fig.update_yaxes(categoryorder='array', categoryarray=row_order, autorange='reversed', type='category')
+    fig.update_layout(
+        height=max(300, 80 + ROW_HEIGHT * len(row_order)),
+        margin={'l': 10, 'r': 10, 't': 30, 'b': 10},
+        legend={'orientation': 'h', 'y': 1.02, 'yanchor': 'bottom'},
+        xaxis={'type': 'date'},
+    )
+    return fig
@@ -0,0 +1,379 @@
+# historico.py
+"""Histórico local (SQLite) de catálogos normalizados e cronogramas gerados.
+
+- catalogos: o catálogo já normalizado (JSON comprimido), pela hash do conteúdo;
+  reabrir não repete a leitura nem a normalização do arquivo.
+- cronogramas: metadados de cada versão salva, com índice (catálogo, categoria, início)
+  e pela hash dos parâmetros: o app reabre a versão com os mesmos parâmetros em vez
+  de recalcular;
+- cronograma_tarefas: as tarefas de cada versão (número, fase, datas...), com índice
+  por cronograma, para reabrir por consulta e comparar duas versões tarefa a tarefa.
+
+Cada operação abre a sua conexão (seguro entre sessões/threads do Streamlit); o
+esquema é criado uma vez por arquivo de banco, na primeira conexão do processo.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import closing
+from datetime import datetime
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+from cache_lru import LRUTTLCache
+from ingestao import CATALOG_CACHE_MAXSIZE, CATALOG_CACHE_TTL, Catalog, compact_catalog
+
+HISTORY_DB = os.environ.get('CRONOGRAMA_HISTORICO', 'historico_cronogramas.sqlite3')
+
+_stored_catalog_cache = LRUTTLCache(maxsize=CATALOG_CACHE_MAXSIZE, ttl=CATALOG_CACHE_TTL)
+# cronograma reaberto por (banco, hash dos parâmetros); None também fica (não há versão salva)
+_reopened_cache = LRUTTLCache(maxsize=CATALOG_CACHE_MAXSIZE, ttl=CATALOG_CACHE_TTL)
+
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalogos (
+    hash TEXT PRIMARY KEY,
+    nome TEXT,
+    extensao TEXT,
+    opcoes TEXT,
+    colunas TEXT,
+    tarefas INTEGER,
+    dados BLOB,
+    criado_em TEXT
+);
+CREATE TABLE IF NOT EXISTS cronogramas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    catalogo TEXT NOT NULL REFERENCES catalogos(hash),
+    categoria TEXT NOT NULL,
+    inicio TEXT NOT NULL,
+    modo TEXT NOT NULL,
+    calendario TEXT,
+    fase_condicoes TEXT,
+    parametros TEXT NOT NULL,
+    tarefas INTEGER,
+    fim TEXT,
+    nota TEXT,
+    criado_em TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_cronogramas_busca ON cronogramas (catalogo, categoria, inicio);
+CREATE INDEX IF NOT EXISTS idx_cronogramas_parametros ON cronogramas (parametros);
+CREATE TABLE IF NOT EXISTS cronograma_tarefas (
+    cronograma INTEGER NOT NULL REFERENCES cronogramas(id) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL,
+    numero TEXT,
+    fase TEXT,
+    condicao TEXT,
+    nome TEXT,
+    duracao REAL,
+    inicio TEXT,
+    fim TEXT,
+    PRIMARY KEY (cronograma, posicao)
+);
+"""
+
+
+def _connect(path=None):
+    path = path or HISTORY_DB
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA foreign_keys=ON')
+    db = os.path.abspath(path)
+    if db not in _schema_ready:
+        with _schema_lock:
+            if db not in _schema_ready:
+                # WAL fica gravado no arquivo; o esquema só precisa ser conferido uma vez
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(_SCHEMA)
+                _schema_ready.add(db)
+    return conn
+
+
+def has_history(path=None):
+    """Se o arquivo do histórico já existe (consultar sem criar o banco)."""
+    return os.path.exists(path or HISTORY_DB)
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _day(value):
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def catalog_hash(catalog):
+    """Hash do catálogo: o sha256 do arquivo (chave de ingestao.catalog_key) ou da chave."""
+    key = catalog.key
+    if isinstance(key, tuple) and key and isinstance(key[0], str) and len(key[0]) == 64:
+        return key[0]
+    return hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+
+
+def calendar_hash(calendar):
+    if calendar is None:
+        return None
+    return hashlib.sha256(repr(calendar.key).encode('utf-8')).hexdigest()[:16]
+
+
+def _conditions_json(phase_conditions):
+    return json.dumps({str(ph): sorted(map(str, conds)) for ph, conds in phase_conditions.items()},
+                      ensure_ascii=False, sort_keys=True)
+
+
+def schedule_params_hash(catalog, categoria, project_start, mode, phase_conditions, calendar=None, adjustments=None):
+    """Identifica um cronograma pelos parâmetros que o geram (para reabrir sem recalcular).
+
+    adjustments: ajustes aplicados sobre o agendamento (capacidades das equipes, data de
+    status da re-previsão); versões com ajustes não casam com o cronograma sem eles.
+    """
+    parts = [catalog_hash(catalog), str(categoria), _day(project_start), mode,
+             str(calendar_hash(calendar)), _conditions_json(phase_conditions)]
+    if adjustments:
+        parts.append(json.dumps(adjustments, default=str, ensure_ascii=False, sort_keys=True))
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _as_text(values):
+    values = values.astype(object)
+    return values.where(values.notna(), None).map(lambda v: None if v is None else str(v)).tolist()
+
+
+# ---------- Catálogos ----------
+
+def save_catalog(catalog, name='', path=None):
+    """Guarda o catálogo normalizado (só na primeira vez). Retorna a hash."""
+    digest = catalog_hash(catalog)
+    with closing(_connect(path)) as conn, conn:
+        if conn.execute('SELECT 1 FROM catalogos WHERE hash = ?', (digest,)).fetchone():
+            return digest
+        payload = {
+            'dados': catalog.df.to_json(orient='split', index=False, date_format='iso'),
+            'attrs': catalog.df.attrs,
+            'tipos': {str(col): str(dtype) for col, dtype in catalog.df.dtypes.items()},
+        }
+        key = catalog.key if isinstance(catalog.key, tuple) else ()
+        ext = key[1] if len(key) > 1 else ''
+        options = dict(key[2]) if len(key) > 2 else {}
+        conn.execute(
+            'INSERT INTO catalogos VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (digest, name, ext, json.dumps(options, default=str), json.dumps(list(map(str, catalog.raw_columns))),
+             len(catalog.df), zlib.compress(json.dumps(payload, default=str).encode('utf-8')), _now()),
+        )
+    return digest
+
+
+def list_catalogs(path=None):
+    """Catálogos guardados (sem os dados), do mais recente para o mais antigo."""
+    with closing(_connect(path)) as conn:
+        return pd.read_sql_query(
+            'SELECT hash, nome, tarefas, criado_em FROM catalogos ORDER BY criado_em DESC', conn
+        )
+
+
+def _restore_dtypes(df, dtypes):
+    """Tipos das colunas como foram salvos: o JSON não guarda datas nem nulos de número."""
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        if dtype.startswith('datetime64'):
+            df[col] = pd.to_datetime(df[col], format='ISO8601').astype(dtype)
+        elif dtype.startswith('float') or dtype in ('str', 'string'):
+            df[col] = df[col].astype(dtype)
+        elif dtype == 'object':
+            values = df[col].astype(object)
+            df[col] = values.where(values.isna(), values.map(str))
+    return df
+
+
+def load_stored_catalog(digest, path=None):
+    """Catalog guardado, sem reler o arquivo original (None se não existir)."""
+    with closing(_connect(path)) as conn:
+        row = conn.execute('SELECT extensao, opcoes, colunas, dados FROM catalogos WHERE hash = ?', (digest,)).fetchone()
+    if row is None:
+        return None
+    ext, options, columns, data = row
+    payload = json.loads(zlib.decompress(data).decode('utf-8'))
+    # sem inferência: texto como '001' ou 'True' continua texto; datas voltam pelos tipos salvos
+    df = pd.read_json(StringIO(payload['dados']), orient='split', convert_dates=False, dtype=False)
+    df = _restore_dtypes(df, payload.get('tipos', {}))
+    df.attrs = payload.get('attrs', {})
+    options = tuple(sorted(json.loads(options).items()))
+    return Catalog(compact_catalog(df), json.loads(columns), (digest, ext, options))
+
+
+def get_stored_catalog(digest, path=None):
+    """load_stored_catalog em cache na memória (reruns não descomprimem de novo)."""
+    return _stored_catalog_cache.get_or_compute((path or HISTORY_DB, digest), lambda: load_stored_catalog(digest, path))
+
+
+# ---------- Cronogramas ----------
+
+def save_schedule(catalog, df_sel, categoria, project_start, mode, phase_conditions, calendar=None,
+                  note='', catalog_name='', path=None, adjustments=None):
+    """Guarda uma versão do cronograma (e o catálogo, se ainda não estiver guardado). Retorna o id."""
+    digest = save_catalog(catalog, catalog_name, path)
+    params = schedule_params_hash(catalog, categoria, project_start, mode, phase_conditions, calendar, adjustments)
+    n = len(df_sel)
+
+    def text(col):
+        return _as_text(df_sel[col]) if col in df_sel.columns else [None] * n
+
+    def dates(col):
+        # com hora: durações fracionárias terminam no meio do dia
+        values = pd.to_datetime(df_sel[col]).dt.strftime('%Y-%m-%dT%H:%M:%S')
+        return values.astype(object).where(values.notna(), None).tolist()
+
+    durations = df_sel['duracao'].astype(float).tolist() if 'duracao' in df_sel.columns else [None] * n
+    end = _day(df_sel['end'].max()) if n else None
+    with closing(_connect(path)) as conn, conn:
+        cur = conn.execute(
+            'INSERT INTO cronogramas (catalogo, categoria, inicio, modo, calendario, fase_condicoes, parametros,'
+            ' tarefas, fim, nota, criado_em) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (digest, str(categoria), _day(project_start), mode, calendar_hash(calendar),
+             _conditions_json(phase_conditions), params, n, end, note, _now()),
+        )
+        schedule_id = cur.lastrowid
+        conn.executemany(
+            'INSERT INTO cronograma_tarefas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            zip([schedule_id] * n, range(n), text('numero'), text('fase'), text('condicao'), text('nome'),
+                durations, dates('start'), dates('end')),
+        )
+    _reopened_cache.clear()
+    return schedule_id
+
+
+def list_schedules(catalog, categoria=None, project_start=None, path=None):
+    """Versões guardadas do catálogo (consulta pelo índice catálogo, categoria, início)."""
+    query = 'SELECT id, categoria, inicio, modo, tarefas, fim, nota, criado_em FROM cronogramas WHERE catalogo = ?'
+    args = [catalog_hash(catalog)]
+    if categoria is not None:
+        query += ' AND categoria = ?'
+        args.append(str(categoria))
+    if project_start is not None:
+        query += ' AND inicio = ?'
+        args.append(_day(project_start))
+    with closing(_connect(path)) as conn:
+        return pd.read_sql_query(query + ' ORDER BY id DESC', conn, params=args)
+
+
+def find_schedule(catalog, categoria, project_start, mode, phase_conditions, calendar=None, path=None, adjustments=None):
+    """Id da versão mais recente gerada com exatamente estes parâmetros (None se não houver)."""
+    params = schedule_params_hash(catalog, categoria, project_start, mode, phase_conditions, calendar, adjustments)
+    with closing(_connect(path)) as conn:
+        row = conn.execute(
+            'SELECT id FROM cronogramas WHERE parametros = ? ORDER BY id DESC LIMIT 1', (params,)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def load_schedule(schedule_id, path=None):
+    """Tarefas de uma versão guardada (colunas do cronograma: numero, fase, ..., start, end)."""
+    with closing(_connect(path)) as conn:
+        df = pd.read_sql_query(
+            'SELECT numero, fase, condicao, nome, duracao, inicio AS start, fim AS "end"'
+            ' FROM cronograma_tarefas WHERE cronograma = ? ORDER BY posicao', conn, params=(int(schedule_id),)
+        )
+    df['start'] = pd.to_datetime(df['start'], format='ISO8601')
+    df['end'] = pd.to_datetime(df['end'], format='ISO8601')
+    return df
+
+
+def reopen_schedule(schedule_id, df_sel, path=None):
+    """df_sel (tarefas selecionadas, na ordem do cronograma) com start/end da versão guardada.
+
+    Só as datas vêm do histórico; as demais colunas continuam as do catálogo. None se a
+    versão não tiver as mesmas tarefas na mesma ordem (ex.: catálogo salvo antes de mudar).
+    """
+    saved = load_schedule(schedule_id, path)
+    if len(saved) != len(df_sel) or saved['numero'].tolist() != _as_text(df_sel['numero']):
+        return None
+    out = df_sel.copy()
+    out['start'] = saved['start'].to_numpy(dtype='datetime64[ns]')
+    out['end'] = saved['end'].to_numpy(dtype='datetime64[ns]')
+    return out
+
+
+def get_reopened_schedule(catalog, categoria, project_start, mode, phase_conditions, select, calendar=None,
+                          path=None, adjustments=None):
+    """reopen_schedule da versão salva com estes parâmetros, em cache na memória (None se não houver).
+
+    select() devolve as tarefas selecionadas; só é chamado quando há versão salva e ela
+    ainda não foi reaberta. Reruns com os mesmos parâmetros não consultam o banco.
+    """
+    params = schedule_params_hash(catalog, categoria, project_start, mode, phase_conditions, calendar, adjustments)
+
+    def reopen():
+        schedule_id = find_schedule(catalog, categoria, project_start, mode, phase_conditions, calendar, path, adjustments)
+        return None if schedule_id is None else reopen_schedule(schedule_id, select(), path)
+    return _reopened_cache.get_or_compute((os.path.abspath(path or HISTORY_DB), params), reopen)
+
+
+def delete_schedule(schedule_id, path=None):
+    """Remove uma versão guardada e as suas tarefas."""
+    with closing(_connect(path)) as conn, conn:
+        conn.execute('DELETE FROM cronogramas WHERE id = ?', (int(schedule_id),))
+    _reopened_cache.clear()
+
+
+# ---------- Comparação ----------
+
+def _task_keys(df):
+    """Chave de cada tarefa: o número (repetições ganham #2, #3...); sem número, a posição."""
+    if 'numero' not in df.columns:
+        return pd.Series(np.arange(len(df)).astype(str), index=df.index)
+    numero = df['numero'].astype(object).where(df['numero'].notna(), '').astype(str)
+    seen = numero.groupby(numero).cumcount()
+    return numero.where(seen == 0, numero + '#' + (seen + 1).astype(str))
+
+
+def diff_schedules(old, new):
+    """Compara duas versões tarefa a tarefa (pelo número).
+
+    Uma linha por tarefa com situacao ('adicionada', 'removida', 'alterada', 'igual'),
+    datas antes/depois e o deslocamento em dias do início e do fim.
+    """
+    cols = [c for c in ['fase', 'nome', 'duracao', 'start', 'end'] if c in old.columns and c in new.columns]
+    left = old[cols].assign(tarefa=_task_keys(old).to_numpy())
+    right = new[cols].assign(tarefa=_task_keys(new).to_numpy())
+    for frame in (left, right):
+        for col in ('start', 'end'):
+            frame[col] = pd.to_datetime(frame[col]).dt.normalize()
+        if 'duracao' in frame.columns:
+            frame['duracao'] = frame['duracao'].astype(float)
+    merged = left.merge(right, on='tarefa', how='outer', suffixes=('_antes', '_depois'), indicator=True, sort=False)
+    delta_start = (merged['start_depois'] - merged['start_antes']).dt.days
+    delta_end = (merged['end_depois'] - merged['end_antes']).dt.days
+    changed = (delta_start != 0) | (delta_end != 0)
+    if 'duracao' in cols:
+        changed |= ~np.isclose(merged['duracao_antes'], merged['duracao_depois'])
+    status = np.select(
+        [merged['_merge'] == 'right_only', merged['_merge'] == 'left_only', changed],
+        ['adicionada', 'removida', 'alterada'], default='igual',
+    )
+    out = pd.DataFrame({'tarefa': merged['tarefa'], 'situacao': status})
+    for col in cols:
+        if col in ('fase', 'nome'):
+            out[col] = merged[f'{col}_depois'].astype(object).where(merged[f'{col}_depois'].notna(), merged[f'{col}_antes'])
+        else:
+            out[f'{col}_antes'] = merged[f'{col}_antes']
+            out[f'{col}_depois'] = merged[f'{col}_depois']
+    out['delta_inicio_dias'] = delta_start
+    out['delta_fim_dias'] = delta_end
+    return out
+
+
+def diff_summary(diff):
+    """Contagem por situação e deslocamento do término do projeto (dias)."""
+    counts = diff['situacao'].value_counts()
+    summary = {situacao: int(counts.get(situacao, 0)) for situacao in ('adicionada', 'removida', 'alterada', 'igual')}
+    shift = 0
+    if 'end_antes' in diff.columns and diff['end_antes'].notna().any() and diff['end_depois'].notna().any():
+        shift = (diff['end_depois'].max() - diff['end_antes'].max()).days
+    summary['deslocamento_fim_dias'] = shift
+    return summary
@@ -0,0 +1,457 @@
+# ingestao.py
+"""Leitura e normalização do catálogo de tarefas, com cache por conteúdo do arquivo."""
+import codecs
+import csv
+import hashlib
+import os
+from collections import namedtuple
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from cache_lru import LRUTTLCache
+from medicao import stage
+
+# Limites do cache de catálogos (compartilhado entre reruns e sessões do mesmo processo)
+CATALOG_CACHE_MAXSIZE = 8
+CATALOG_CACHE_TTL = 60 * 60  # segundos
+
+_catalog_cache = LRUTTLCache(maxsize=CATALOG_CACHE_MAXSIZE, ttl=CATALOG_CACHE_TTL)
+
+# O catálogo é compartilhado; o que cada sessão guarda (cronograma, tabela enviada ao
+# navegador) deve caber neste orçamento
+SESSION_MEMORY_BUDGET = int(os.environ.get('CRONOGRAMA_MEMORIA_SESSAO_MB', '64')) * 1024 * 1024
+
+# Leitura de CSV: amostra inicial usada para detectar encoding/separador e tamanho dos blocos
+CSV_SNIFF_BYTES = 64 * 1024
+CSV_CHUNK_ROWS = 50_000
+CSV_DELIMITERS = ';,\t|'
+CSV_CATEGORY_MAX_RATIO = 0.5  # no máximo 1 valor distinto a cada 2 linhas para virar category
+
+# Catálogo carregado: DataFrame normalizado, colunas originais do arquivo e a chave
+# de cache (identifica o conteúdo; usada para cachear estruturas derivadas)
+Catalog = namedtuple('Catalog', ['df', 'raw_columns', 'key'])
+
+
+# ---------- Helpers para detectar colunas ----------
+# (keywords, nome normalizado), testadas nesta ordem
+COLUMN_RULES = [
+    (['num', 'número', 'numero', 'id'], 'numero'),
+    (['classif', 'classificação', 'classificacao'], 'classificacao'),
+    (['categ', 'categoria'], 'categoria'),
+    (['fase'], 'fase'),
+    (['condi', 'condição', 'condicao'], 'condicao'),
+    (['nome', 'tarefa', 'atividade'], 'nome'),
+    # durações de três pontos (opcionais, para a simulação de risco); antes de 'duracao'
+    # para que "Duração otimista" não seja tomada como a duração principal
+    (['otimista', 'optimistic'], 'otimista'),
+    (['provável', 'provavel', 'likely'], 'provavel'),
+    (['pessimista', 'pessimistic'], 'pessimista'),
+    (['dur', 'duração', 'duracao', 'days'], 'duracao'),
+    # colunas opcionais
+    (['como fazer', 'comofazer', 'como_fazer'], 'como_fazer'),
+    (['doc', 'documento'], 'documento_referencia'),
+    (['predec', 'depende'], 'predecessores'),
+    (['equipe', 'recurso', 'team', 'resource'], 'equipe'),
+    # progresso (opcional, para a re-previsão do trabalho restante)
+    (['% concl', 'concluí', 'conclui', '% complete', 'percent complete', 'progresso'], 'concluido'),
+    (['início real', 'inicio real', 'início efetivo', 'inicio efetivo', 'actual start'], 'inicio_real'),
+]
+REQUIRED_COLUMNS = ['numero', 'fase', 'condicao', 'nome', 'duracao']
+THREE_POINT_COLUMNS = ['otimista', 'provavel', 'pessimista']
+PROGRESS_COLUMNS = ['concluido', 'inicio_real']
+# colunas de poucos valores distintos: sempre category
+CATEGORY_COLUMNS = ['classificacao', 'categoria', 'fase', 'condicao', 'equipe']
+
+
+def find_col(df, keywords):
+    """Encontra a primeira coluna cujo nome contenha qualquer uma das keywords (case-insensitive)."""
+    return find_col_in(df.columns, keywords)
+
+def find_col_in(columns, keywords):
+    """Como find_col, mas sobre uma lista de nomes (ex.: só o cabeçalho de uma planilha)."""
+    cols = list(columns)
+    lower = [str(c).lower() for c in cols]
+    for kw in keywords:
+        for i, c in enumerate(lower):
+            if kw.lower() in c:
+                return cols[i]
+    return None
+
+def has_three_point(df):
+    """Se o catálogo/cronograma tem alguma coluna de estimativa de três pontos."""
+    return any(col in df.columns for col in THREE_POINT_COLUMNS)
+
+def has_progress(df):
+    """Se o catálogo/cronograma traz % concluída ou início real."""
+    return any(col in df.columns for col in PROGRESS_COLUMNS)
+
+def detect_columns(columns):
+    """Mapa {coluna original: nome normalizado} segundo COLUMN_RULES.
+
+    Cada coluna é usada por uma regra só (a primeira que a encontrar).
+    """
+    mapping = {}
+    for keywords, target in COLUMN_RULES:
+        col = find_col_in([c for c in columns if c not in mapping], keywords)
+        if col is not None:
+            mapping[col] = target
+    return mapping
+
+def normalize_df_columns(df):
+    # tenta detectar colunas principais e renomear para nomes simples em PT
+    return df.rename(columns=detect_columns(df.columns))
+
+
+# ---------- Duração ----------
+# fatores de conversão para dias (dia de trabalho de 8 h; mês de 30 dias; ano de 12 meses)
+HOURS_PER_DAY = 8
+DAYS_PER_WEEK = 7
+DAYS_PER_MONTH = 30
+DAYS_PER_YEAR = 12 * DAYS_PER_MONTH
+DURATION_UNITS = {
+    **dict.fromkeys(['', 'd', 'du', 'dia', 'dias', 'day', 'days'], 1.0),
+    **dict.fromkeys(['s', 'sem', 'semana', 'semanas', 'w', 'wk', 'week', 'weeks'], float(DAYS_PER_WEEK)),
+    **dict.fromkeys(['mes', 'mês', 'meses', 'month', 'months'], float(DAYS_PER_MONTH)),
+    **dict.fromkeys(['a', 'ano', 'anos', 'y', 'yr', 'yrs', 'year', 'years'], float(DAYS_PER_YEAR)),
+    **dict.fromkeys(['h', 'hr', 'hrs', 'hora', 'horas', 'hour', 'hours'], 1.0 / HOURS_PER_DAY),
+    **dict.fromkeys(['min', 'mins', 'minuto', 'minutos', 'minute', 'minutes'], 1.0 / (HOURS_PER_DAY * 60)),
+}
+# número seguido da unidade, ex.: "1,5 dia", "2 semanas", "4h", "1.000 dias"; o número
+# é decimal com vírgula ou ponto, ou agrupado em milhares com ponto ("1.000", "1.250,5")
+_THOUSANDS_PATTERN = r'\d{1,3}(?:\.\d{3})+(?:,\d+)?'
+_DURATION_PATTERN = rf'({_THOUSANDS_PATTERN}|\d+(?:[.,]\d+)?)\s*([^\W\d_]*)'
+# exemplos guardados no relatório de durações não interpretadas
+DURATION_REPORT_EXAMPLES = 20
+
+
+def parse_durations(values):
+    """Converte textos de duração em dias (float), com unidade e decimal com vírgula.
+
+    Cada texto distinto é interpretado uma vez só (factorize) e o resultado é
+    espalhado de volta pelas linhas. "1.000" é lido como mil (ponto de milhar).
+    Retorna (dias, nao_interpretada): dias é NaN onde não há número ou a unidade é
+    desconhecida; a máscara marca essas células (as vazias não entram).
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype(float), pd.Series(False, index=values.index)
+    text = values.astype(str).str.strip().str.lower().where(values.notna())
+    codes, uniques = pd.factorize(text)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.extract(_DURATION_PATTERN)
+    digits = parts[0].where(~parts[0].str.fullmatch(_THOUSANDS_PATTERN).fillna(False).astype(bool),
+                            parts[0].str.replace('.', '', regex=False))
+    number = pd.to_numeric(digits.str.replace(',', '.', regex=False), errors='coerce')
+    factor = parts[1].fillna('').map(DURATION_UNITS)
+    per_value = (number * factor).to_numpy(dtype=float)
+    days = np.where(codes >= 0, per_value[np.maximum(codes, 0)] if len(per_value) else np.nan, np.nan)
+    blank = text.isna() | (text == '') | text.isin(['nan', 'none'])
+    return pd.Series(days, index=values.index), pd.Series(np.isnan(days), index=values.index) & ~blank
+
+
+def parse_percentages(values):
+    """Converte '100%', '37,5 %', 40 ou 0,4 (célula de porcentagem do Excel) em fração 0–1.
+
+    Com '%' o número é em pontos percentuais; sem '%' a coluna inteira é lida como
+    fração, a menos que algum valor passe de 1. Como em parse_durations, cada texto
+    distinto é interpretado uma vez. Vazio ou sem número vira NaN.
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        number = values.astype(float).to_numpy()
+        percent = np.zeros(len(number), dtype=bool)
+    else:
+        codes, uniques = pd.factorize(values.astype(str).str.strip().where(values.notna()))
+        text = pd.Series(uniques, dtype=object).astype(str)
+        per_number = pd.to_numeric(text.str.rstrip('%').str.strip().str.replace(',', '.', regex=False), errors='coerce').to_numpy(dtype=float)
+        per_percent = text.str.endswith('%').to_numpy()
+        safe = np.maximum(codes, 0)
+        number = np.where(codes >= 0, per_number[safe] if len(per_number) else np.nan, np.nan)
+        percent = (codes >= 0) & (per_percent[safe] if len(per_percent) else False)
+    plain = number[~percent]
+    points = percent | (np.nanmax(plain, initial=0.0) > 1)
+    fraction = np.where(points, number / 100, number)
+    return pd.Series(np.clip(fraction, 0.0, 1.0), index=values.index)
+
+
+def duration_report(values, unparsed):
+    """Resumo das durações não interpretadas: total e alguns exemplos (linha da planilha, texto)."""
+    rows = np.flatnonzero(unparsed.to_numpy())
+    examples = [(int(i) + 2, str(values.iloc[i])) for i in rows[:DURATION_REPORT_EXAMPLES]]
+    return {'linhas': len(rows), 'exemplos': examples}
+
+
+def prepare_catalog(df_raw):
+    """Normaliza nomes de colunas, duração, progresso e condição do catálogo lido.
+
+    Durações não interpretadas ficam com 1 dia e são resumidas em
+    df.attrs['duracao_nao_interpretada'] (ver duration_report).
+    """
+    df = normalize_df_columns(df_raw.copy())
+    if 'duracao' in df.columns:
+        days, unparsed = parse_durations(df['duracao'])
+        if unparsed.any():
+            df.attrs['duracao_nao_interpretada'] = duration_report(df['duracao'], unparsed)
+        df['duracao'] = days.fillna(1.0).to_numpy()
+    for col in THREE_POINT_COLUMNS:
+        if col in df.columns:
+            # sem preenchimento: célula vazia usa a duração principal na simulação
+            df[col] = parse_durations(df[col])[0].to_numpy()
+    if 'concluido' in df.columns:
+        # vazio = não iniciada
+        df['concluido'] = parse_percentages(df['concluido']).fillna(0.0).to_numpy()
+    if 'inicio_real' in df.columns:
+        df['inicio_real'] = pd.to_datetime(df['inicio_real'], dayfirst=True, errors='coerce')
+    if 'condicao' in df.columns:
+        df['condicao'] = df['condicao'].astype(str).str.strip()
+    return compact_catalog(df)
+
+
+def _compact_number(values, integer_dtype=None):
+    """Inteiros no menor tipo inteiro (ou integer_dtype); frações ficam em float64.
+
+    float32 não representa 1,3 dia exatamente e o erro chegaria às datas do cronograma.
+    """
+    if values.notna().all() and (values % 1 == 0).all():
+        if integer_dtype is not None and values.abs().max() <= np.iinfo(integer_dtype).max:
+            return values.astype(integer_dtype)
+        return pd.to_numeric(values.astype('int64'), downcast='integer')
+    return values.astype('float64')
+
+
+def compact_catalog(df):
+    """Tipos compactos para o catálogo compartilhado entre sessões.
+
+    Categoria, fase, condição etc. viram category; duração em int16 (float64 se houver
+    frações), número no menor inteiro; texto repetido (nome, como fazer...) vira
+    category, guardando cada texto distinto uma vez só.
+    """
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        if col in CATEGORY_COLUMNS:
+            out[col] = values if _is_category(values) else values.astype('category')
+        elif col == 'duracao' and pd.api.types.is_numeric_dtype(values):
+            out[col] = _compact_number(values, np.int16)
+        elif col in THREE_POINT_COLUMNS and pd.api.types.is_numeric_dtype(values):
+            out[col] = values.astype('float32')
+        elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            out[col] = _compact_number(values)
+        elif not _is_category(values) and (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+            out[col] = _as_category_if_repeated(values)
+        else:
+            out[col] = values
+    compact = pd.DataFrame(out, index=df.index, columns=df.columns)
+    compact.attrs = df.attrs
+    return compact
+
+
+def catalog_nbytes(df):
+    """Memória ocupada pelo DataFrame (incluindo o texto)."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def bytes_per_task(df):
+    return catalog_nbytes(df) / len(df) if len(df) else 0.0
+
+
+def rows_within_budget(df, budget=SESSION_MEMORY_BUDGET):
+    """Quantas linhas de df cabem no orçamento de memória (bytes) de uma sessão."""
+    size = catalog_nbytes(df)
+    if size <= budget:
+        return len(df)
+    return int(budget // bytes_per_task(df))
+
+
+# ---------- Ler arquivo ----------
+def sniff_csv(data):
+    """Detecta (encoding, separador) a partir dos primeiros CSV_SNIFF_BYTES do arquivo.
+
+    BOM UTF-8/UTF-16 tem prioridade; sem BOM tenta UTF-8 e cai para cp1252/latin-1
+    (os catálogos exportados do Excel em PT-BR costumam vir em Windows-1252).
+    """
+    sample = data[:CSV_SNIFF_BYTES]
+    if sample.startswith(codecs.BOM_UTF8):
+        encoding = 'utf-8-sig'
+    elif sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encoding = 'utf-16'
+    else:
+        encoding = None
+        for candidate in ('utf-8', 'cp1252'):
+            try:
+                # a amostra pode cortar um caractere multibyte no final
+                codecs.getincrementaldecoder(candidate)().decode(sample, final=False)
+                encoding = candidate
+                break
+            except UnicodeDecodeError:
+                continue
+        encoding = encoding or 'latin-1'
+    text = sample.decode(encoding, errors='ignore')
+    lines = text.splitlines()[:50]
+    if len(lines) > 1 and len(sample) == CSV_SNIFF_BYTES:
+        lines = lines[:-1]  # última linha provavelmente incompleta
+    try:
+        delimiter = csv.Sniffer().sniff('\n'.join(lines), delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        header = lines[0] if lines else ''
+        delimiter = max(CSV_DELIMITERS, key=header.count)
+    return encoding, delimiter
+
+
+def _is_category(values):
+    return isinstance(values.dtype, pd.CategoricalDtype)
+
+
+def _as_category_if_repeated(values):
+    """Texto repetido (fase, categoria, condição...) vira category; texto quase único fica como está."""
+    non_null = values.notna().sum()
+    if non_null and values.nunique() <= CSV_CATEGORY_MAX_RATIO * non_null:
+        return values.astype('category')
+    return values
+
+
+def _compact_chunk(chunk):
+    """Colunas totalmente numéricas viram números; texto repetido vira category."""
+    out = {}
+    for col in chunk.columns:
+        values = chunk[col]
+        try:
+            # sem errors='coerce': falha logo no primeiro texto, em vez de varrer a coluna
+            out[col] = pd.to_numeric(values)
+        except (ValueError, TypeError):
+            out[col] = _as_category_if_repeated(values)
+    return out
+
+
+def _concat_compact(parts, columns):
+    """Junta os blocos coluna a coluna, mantendo os tipos compactos."""
+    data = {}
+    for col in columns:
+        pieces = [p[col] for p in parts]
+        if all(_is_category(p) for p in pieces):
+            data[col] = pd.Series(union_categoricals([p.array for p in pieces], ignore_order=True))
+        elif all(pd.api.types.is_numeric_dtype(p) for p in pieces):
+            merged = pd.concat(pieces, ignore_index=True)
+            if merged.notna().all() and (merged % 1 == 0).all():
+                data[col] = pd.to_numeric(merged.astype('int64'), downcast='integer')
+            else:
+                data[col] = merged
+        else:
+            # texto em algum bloco (ou numérica em um e texto em outro): junta como texto
+            as_text = [p.astype(str).where(p.notna()) for p in pieces]
+            data[col] = _as_category_if_repeated(pd.concat(as_text, ignore_index=True))
+    return pd.DataFrame(data, columns=columns)
+
+
+def read_csv_streaming(data, chunksize=CSV_CHUNK_ROWS, **read_kwargs):
+    """Lê um CSV em blocos, detectando encoding e separador, com tipos compactos.
+
+    Cada bloco é convertido (números / category) antes do próximo ser lido, então o
+    pico de memória fica limitado ao bloco em texto + as colunas já compactadas.
+    """
+    encoding, delimiter = sniff_csv(data)
+    read_kwargs.setdefault('sep', delimiter)
+    read_kwargs.setdefault('encoding', encoding)
+    reader = pd.read_csv(BytesIO(data), dtype=str, chunksize=chunksize, **read_kwargs)
+    parts = []
+    columns = None
+    for chunk in reader:
+        columns = chunk.columns.tolist()
+        parts.append(_compact_chunk(chunk))
+    if not parts:
+        return pd.read_csv(BytesIO(data), **read_kwargs)
+    return _concat_compact(parts, columns)
+
+
+def _sheet_header(ws):
+    for row in ws.iter_rows(min_row=1, max_row=1, values_only=True):
+        return ['' if v is None else str(v) for v in row]
+    return []
+
+
+def read_excel_projected(data, sheet_name=None):
+    """Lê da planilha apenas as colunas reconhecidas por COLUMN_RULES.
+
+    Primeiro lê só o cabeçalho de cada aba (openpyxl em modo read-only) e escolhe a
+    aba que tem mais colunas obrigatórias; depois percorre as linhas guardando apenas
+    as colunas mapeadas. Memória e tempo acompanham as colunas usadas, não a largura
+    da planilha. As colunas completas do arquivo ficam em df.attrs['source_columns'].
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        if sheet_name is not None:
+            ws = wb[sheet_name]
+            header = _sheet_header(ws)
+        else:
+            best = None
+            for candidate in wb.worksheets:
+                cand_header = _sheet_header(candidate)
+                found = set(detect_columns(cand_header).values())
+                score = sum(c in found for c in REQUIRED_COLUMNS)
+                if best is None or score > best[0]:
+                    best = (score, candidate, cand_header)
+            _, ws, header = best
+        mapping = detect_columns(header)
+        wanted = [i for i, name in enumerate(header) if name in mapping]
+        values = {i: [] for i in wanted}
+        if wanted:
+            last = max(wanted) + 1
+            for row in ws.iter_rows(min_row=2, max_col=last, values_only=True):
+                if all(v is None for v in row):
+                    continue
+                for i in wanted:
+                    values[i].append(row[i] if i < len(row) else None)
+    finally:
+        wb.close()
+    df = pd.DataFrame({header[i]: values[i] for i in wanted})
+    df.attrs['source_columns'] = header
+    return df
+
+
+def read_catalog_bytes(data, filename, **read_kwargs):
+    """Lê os bytes de um upload (.csv, .xlsx ou .xls) para um DataFrame bruto."""
+    if filename.lower().endswith('.csv'):
+        return read_csv_streaming(data, **read_kwargs)
+    return read_excel_projected(data, **read_kwargs)
+
+
+def catalog_key(data, filename, **options):
+    """Chave de cache: hash do conteúdo + extensão + opções do parser."""
+    digest = hashlib.sha256(data).hexdigest()
+    ext = filename.lower().rsplit('.', 1)[-1]
+    return (digest, ext, tuple(sorted(options.items())))
+
+
+def load_catalog(data, filename, **options):
+    """Lê e normaliza um catálogo, reaproveitando o resultado se o mesmo conteúdo já foi carregado.
+
+    Retorna um Catalog. O DataFrame em cache é compartilhado: quem o recebe não deve
+    alterá-lo in-place.
+    """
+    with stage('hash_arquivo'):
+        key = catalog_key(data, filename, **options)
+
+    def _load():
+        with stage('leitura') as s:
+            df_raw = read_catalog_bytes(data, filename, **options)
+            s.rows_out = len(df_raw)
+        raw_columns = df_raw.attrs.get('source_columns', df_raw.columns.tolist())
+        with stage('normalizacao', len(df_raw)) as s:
+            df = prepare_catalog(df_raw)
+            s.rows_out = len(df)
+        return Catalog(df, raw_columns, key)
+
+    return _catalog_cache.get_or_compute(key, _load)
+
+
+def catalog_from_frame(df_raw, key):
+    """Catalog a partir de um DataFrame já em memória (ex.: o exemplo embutido no app)."""
+    return Catalog(prepare_catalog(df_raw), df_raw.columns.tolist(), key)
+
+
+def catalog_cache_stats():
+    return _catalog_cache.stats()
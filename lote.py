@@ -0,0 +1,217 @@
+# lote.py
+"""Geração de cronogramas em lote, sem Streamlit.
+
+Para cada catálogo, cada categoria e cada conjunto de condições gera um cronograma
+com a mesma normalização, seleção e agendamento do app, distribuindo os trabalhos
+em um pool de processos. Exemplo:
+
+    python lote.py catalogos/ --saida cronogramas/ --inicio 2026-01-05 --processos 8
+"""
+import argparse
+import itertools
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from agendamento import MODE_CHAIN, MODE_PARALLEL, MODE_PHASE_SEQUENTIAL, schedule
+from calendario import ALL_SITES, DEFAULT_WEEKDAYS, load_holidays, site_calendar
+from ingestao import has_progress, load_catalog
+from progresso import reforecast
+from selecao import ALL_CATEGORIES, get_selection_index
+
+CATALOG_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+FORMATS = ('csv', 'parquet')
+
+
+def find_catalogs(paths):
+    """Arquivos de catálogo a partir de arquivos e/ou diretórios."""
+    found = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            found.extend(sorted(f for f in p.iterdir() if f.suffix.lower() in CATALOG_EXTENSIONS))
+        elif p.suffix.lower() in CATALOG_EXTENSIONS:
+            found.append(p)
+    return found
+
+
+def condition_sets(conditions):
+    """Todos os subconjuntos não vazios das condições (além de 'Sempre')."""
+    options = [c for c in conditions if str(c).lower() != 'sempre']
+    return [list(combo) for r in range(1, len(options) + 1) for combo in itertools.combinations(options, r)]
+
+
+def _slug(text):
+    return re.sub(r'[^\w.-]+', '_', str(text)).strip('_') or 'vazio'
+
+
+def _load(path):
+    data = Path(path).read_bytes()
+    return load_catalog(data, Path(path).name)
+
+
+def _calendar(options):
+    if not options.get('dias_uteis'):
+        return None
+    holidays = None
+    if options.get('feriados'):
+        path = Path(options['feriados'])
+        holidays = load_holidays(path.read_bytes(), path.name)
+    return site_calendar(holidays, options.get('site') or ALL_SITES, options.get('dias_semana') or DEFAULT_WEEKDAYS)
+
+
+def _write(df, path, fmt):
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def run_batch(catalog_path, categoria, cond_sets, options):
+    """Executa (no processo do pool) todos os conjuntos de condições de uma categoria.
+
+    Retorna uma linha de resumo por cronograma gerado, com os tempos de cada etapa.
+    """
+    t0 = time.perf_counter()
+    catalog = _load(catalog_path)
+    index = get_selection_index(catalog)
+    calendar = _calendar(options)
+    load_s = time.perf_counter() - t0
+
+    out_dir = Path(options['saida']) / _slug(Path(catalog_path).stem)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    phases = index.phases(categoria)
+    results = []
+    for conds in cond_sets:
+        t1 = time.perf_counter()
+        df_sel = index.select(categoria, {ph: conds for ph in phases}, phases)
+        t2 = time.perf_counter()
+        df_sched = schedule(df_sel, phases, options['inicio'], options['modo'], calendar)
+        if options.get('data_status') is not None and has_progress(df_sched):
+            df_sched = reforecast(df_sched, phases, options['inicio'], options['data_status'], options['modo'], calendar)
+        t3 = time.perf_counter()
+        name = f"{_slug(categoria)}__{'-'.join(map(_slug, conds))}.{options['formato']}"
+        _write(df_sched, out_dir / name, options['formato'])
+        t4 = time.perf_counter()
+        results.append({
+            'catalogo': str(catalog_path),
+            'categoria': categoria,
+            'condicoes': ','.join(map(str, conds)),
+            'arquivo': str(out_dir / name),
+            'tarefas': len(df_sched),
+            'fim': df_sched['end'].max() if len(df_sched) else pd.NaT,
+            'leitura_s': load_s,
+            'selecao_s': t2 - t1,
+            'agendamento_s': t3 - t2,
+            'escrita_s': t4 - t3,
+            'total_s': t4 - t1 + load_s,
+            'pid': os.getpid(),
+        })
+        load_s = 0.0  # a leitura conta só no primeiro cronograma do lote
+    return results
+
+
+def parse_condition_sets(texts):
+    """'A, B' -> ['A', 'B']: itens sem espaços nas pontas, vazios descartados."""
+    sets = [[c.strip() for c in str(text).split(',') if c.strip()] for text in texts]
+    return [conds for conds in sets if conds]
+
+
+def plan_jobs(catalog_paths, cond_override=None, categorias=None):
+    """Lista de (catálogo, categoria, conjuntos de condições), um item por tarefa do pool.
+
+    Levanta ValueError se cond_override tiver condições que não existem no catálogo.
+    """
+    jobs = []
+    for path in catalog_paths:
+        index = get_selection_index(_load(path))
+        cats = index.categorias or [ALL_CATEGORIES]
+        if categorias:
+            cats = [c for c in cats if c in categorias]
+        if cond_override:
+            # a seleção compara sem diferenciar maiúsculas
+            known = {str(c).lower() for cat in cats for c in index.conditions(cat)}
+            unknown = sorted({c for conds in cond_override for c in conds if c.lower() not in known})
+            if unknown:
+                raise ValueError(f"{path}: condições inexistentes no catálogo: {', '.join(unknown)}")
+        for cat in cats:
+            sets = cond_override or condition_sets(index.conditions(cat))
+            jobs.append((str(path), cat, sets))
+    return jobs
+
+
+def run(catalog_paths, options, processes=None, cond_override=None, categorias=None):
+    """Roda todos os trabalhos e grava o resumo (resumo_lote.csv) no diretório de saída."""
+    jobs = plan_jobs(catalog_paths, cond_override, categorias)
+    rows = []
+    if processes == 1:
+        for job in jobs:
+            rows.extend(run_batch(*job, options))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(run_batch, *job, options) for job in jobs]
+            for fut in as_completed(futures):
+                rows.extend(fut.result())
+    summary = pd.DataFrame(rows)
+    Path(options['saida']).mkdir(parents=True, exist_ok=True)
+    summary.to_csv(Path(options['saida']) / 'resumo_lote.csv', index=False)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera cronogramas em lote para cada catálogo × categoria × condições.")
+    parser.add_argument('catalogos', nargs='+', help="arquivos .csv/.xlsx ou diretórios com catálogos")
+    parser.add_argument('--saida', default='cronogramas', help="diretório de saída (padrão: cronogramas)")
+    parser.add_argument('--inicio', default=pd.Timestamp.today().strftime('%Y-%m-%d'), help="data de início (AAAA-MM-DD)")
+    parser.add_argument('--modo', default=MODE_PHASE_SEQUENTIAL, choices=[MODE_PHASE_SEQUENTIAL, MODE_CHAIN, MODE_PARALLEL])
+    parser.add_argument('--formato', default='csv', choices=FORMATS)
+    parser.add_argument('--processos', type=int, default=None, help="processos no pool (padrão: nº de CPUs)")
+    parser.add_argument('--categorias', nargs='*', help="limita às categorias informadas")
+    parser.add_argument('--conjuntos', nargs='*', help='conjuntos de condições, ex.: "A" "A,B" (padrão: todos os subconjuntos)')
+    parser.add_argument('--dias-uteis', action='store_true', help="agenda em dias úteis")
+    parser.add_argument('--feriados', help="arquivo de feriados (.csv/.txt/.xlsx)")
+    parser.add_argument('--site', default=ALL_SITES, help="site/planta do arquivo de feriados")
+    parser.add_argument('--data-status', help="re-prevê pelo %% concluído a partir desta data (AAAA-MM-DD)")
+    args = parser.parse_args(argv)
+
+    if args.formato == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("o formato parquet requer o pacote pyarrow")
+
+    catalogs = find_catalogs(args.catalogos)
+    if not catalogs:
+        parser.error("nenhum catálogo .csv/.xlsx encontrado")
+    options = {
+        'saida': args.saida,
+        'inicio': pd.Timestamp(args.inicio),
+        'modo': args.modo,
+        'formato': args.formato,
+        'dias_uteis': args.dias_uteis,
+        'feriados': args.feriados,
+        'site': args.site,
+        'data_status': pd.Timestamp(args.data_status) if args.data_status else None,
+    }
+    cond_override = parse_condition_sets(args.conjuntos) if args.conjuntos else None
+    if args.conjuntos and not cond_override:
+        parser.error("--conjuntos sem nenhuma condição")
+
+    t0 = time.perf_counter()
+    try:
+        summary = run(catalogs, options, args.processos, cond_override, args.categorias)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - t0
+    print(f"{len(summary)} cronogramas gerados em {elapsed:.1f}s -> {args.saida}")
+    if len(summary):
+        print(summary[['leitura_s', 'selecao_s', 'agendamento_s', 'escrita_s', 'total_s']].describe().loc[['mean', '50%', 'max']].round(4).to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
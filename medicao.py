@@ -0,0 +1,209 @@
+# medicao.py
+"""Medição opcional do tempo de cada etapa de um rerun (leitura, normalização, seleção...).
+
+Ligada pela variável de ambiente CRONOGRAMA_MEDICAO=1 ou pelo parâmetro ?medicao=1 na URL.
+Cada rerun tem um StageTimer ativo na thread da sessão; os módulos marcam etapas com
+`with stage('nome', linhas_entrada) as s: ...; s.rows_out = n` sem receber o timer
+(sem timer ativo, stage() não faz nada). Etapas dentro de etapas ficam com nível + 1
+e não entram de novo no total. Ao fim do rerun o detalhamento é acrescentado
+como uma linha JSON ao log (CRONOGRAMA_MEDICAO_LOG) e a uma janela em memória dos
+reruns recentes, de onde saem os percentis p50/p95 (o log não é relido a cada rerun).
+O log é rotacionado ao passar de PERF_LOG_MAX_BYTES (o anterior fica em <log>.1).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+PERF_LOG = os.environ.get('CRONOGRAMA_MEDICAO_LOG', 'medicao_cronograma.jsonl')
+PERF_LOG_WINDOW = 1000  # reruns mais recentes usados nos percentis
+PERF_LOG_MAX_BYTES = int(os.environ.get('CRONOGRAMA_MEDICAO_LOG_MB', '10')) * 1024 * 1024
+_TRUE = ('1', 'true', 'sim', 'on')
+
+_local = threading.local()
+_log_lock = threading.Lock()
+_recent_runs = {}  # log -> deque com as linhas (já como dict) dos reruns mais recentes
+
+
+def instrumentation_enabled(query_params=None):
+    """Ligada pela variável CRONOGRAMA_MEDICAO ou pelo parâmetro 'medicao' da URL."""
+    if os.environ.get('CRONOGRAMA_MEDICAO', '').lower() in _TRUE:
+        return True
+    value = (query_params or {}).get('medicao')
+    return str(value).lower() in _TRUE
+
+
+class StageRecord:
+    __slots__ = ('name', 'ms', 'rows_in', 'rows_out', 'depth')
+
+    def __init__(self, name, rows_in=None, depth=0):
+        self.name, self.ms, self.rows_in, self.rows_out, self.depth = name, 0.0, rows_in, None, depth
+
+    def as_dict(self):
+        return {'etapa': self.name, 'nivel': self.depth, 'ms': round(self.ms, 3),
+                'linhas_entrada': self.rows_in, 'linhas_saida': self.rows_out}
+
+
+class StageTimer:
+    """Etapas de um rerun, na ordem em que começaram."""
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path or PERF_LOG
+        self.records = []
+        self.depth = 0
+        self.started = time.perf_counter()
+        self.finished = False
+        self.elapsed_ms = None
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        record = StageRecord(name, rows_in, self.depth)
+        self.records.append(record)
+        self.depth += 1
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.ms = (time.perf_counter() - t0) * 1000
+            self.depth -= 1
+            if self.finished and record.depth == 0:
+                # etapa que roda depois do rerun (ex.: exportação no clique): linha própria no log
+                self._append_log([record], record.ms, rerun=False)
+
+    def record(self, name, ms, rows_in=None):
+        """Etapa já medida fora do timer (ex.: imports, antes de o timer existir)."""
+        record = StageRecord(name, rows_in, self.depth)
+        record.ms = ms
+        self.records.append(record)
+        return record
+
+    def call(self, name, func, *args, **kwargs):
+        """Roda func(*args) como uma etapa; a linha de saída é len(resultado) quando existir."""
+        with self.stage(name, len(args[0]) if args and hasattr(args[0], '__len__') else None) as record:
+            result = func(*args, **kwargs)
+            record.rows_out = len(result) if hasattr(result, '__len__') else None
+        return result
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def breakdown(self):
+        """DataFrame etapa, nivel, ms, linhas_entrada, linhas_saida (uma linha por etapa)."""
+        return pd.DataFrame([r.as_dict() for r in self.records],
+                            columns=['etapa', 'nivel', 'ms', 'linhas_entrada', 'linhas_saida'])
+
+    def finish(self):
+        """Fecha o rerun: grava a linha no log e desativa o timer da thread."""
+        if not self.finished:
+            self.finished = True
+            self.elapsed_ms = self.total_ms()
+            self._append_log(self.records, self.elapsed_ms)
+        if getattr(_local, 'timer', None) is self:
+            _local.timer = None
+
+    def _append_log(self, records, total_ms, rerun=True):
+        entry = {
+            'quando': datetime.now().isoformat(timespec='milliseconds'),
+            'rerun': rerun,
+            'total_ms': round(total_ms, 3),
+            'etapas': [r.as_dict() for r in records],
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        with _log_lock:
+            _recent(self.log_path).append(entry)
+            _rotate_log(self.log_path)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+def _read_log_tail(path, window):
+    """Últimas `window` linhas válidas do log, como dict."""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        lines = deque(f, maxlen=window)
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+def _recent(path):
+    """Janela em memória dos reruns do log; na primeira vez, carregada do fim do arquivo.
+
+    Chamar com _log_lock.
+    """
+    runs = _recent_runs.get(path)
+    if runs is None:
+        runs = _recent_runs[path] = deque(_read_log_tail(path, PERF_LOG_WINDOW), maxlen=PERF_LOG_WINDOW)
+    return runs
+
+
+def _rotate_log(path, max_bytes=None):
+    """Move o log para <log>.1 (substituindo o anterior) quando passa de max_bytes."""
+    max_bytes = PERF_LOG_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        if os.path.getsize(path) >= max_bytes:
+            os.replace(path, path + '.1')
+    except OSError:
+        pass
+
+
+def start_run(enabled=True, log_path=None):
+    """Timer do rerun atual (None se a medição estiver desligada)."""
+    _local.timer = StageTimer(log_path) if enabled else None
+    return _local.timer
+
+
+def current_timer():
+    return getattr(_local, 'timer', None)
+
+
+def stage(name, rows_in=None):
+    """Etapa no timer ativo da thread; sem medição ligada, um contexto vazio."""
+    timer = current_timer()
+    if timer is None:
+        return nullcontext(StageRecord(name, rows_in))
+    return timer.stage(name, rows_in)
+
+
+def measured(name, func, *args):
+    """partial(func, *args) que, com medição ligada, vira uma etapa do timer atual quando chamado
+    (ex.: data= de um st.download_button, gerado só no clique)."""
+    timer = current_timer()
+    if timer is None:
+        return partial(func, *args)
+    return partial(timer.call, name, func, *args)
+
+
+def latency_summary(log_path=None, window=PERF_LOG_WINDOW):
+    """p50/p95 (ms) do rerun completo e de cada etapa nos `window` reruns mais recentes.
+
+    Vem da janela em memória (no máximo PERF_LOG_WINDOW reruns), sem reler o log.
+    """
+    path = log_path or PERF_LOG
+    columns = ['etapa', 'execucoes', 'p50_ms', 'p95_ms']
+    with _log_lock:
+        entries = list(_recent(path))[-window:]
+    samples = {}
+    for entry in entries:
+        if entry.get('rerun', True):
+            samples.setdefault('rerun (total)', []).append(entry['total_ms'])
+        # etapas repetidas no mesmo rerun (ex.: seleção por fase) contam como uma amostra
+        per_stage = {}
+        for record in entry.get('etapas', []):
+            per_stage[record['etapa']] = per_stage.get(record['etapa'], 0.0) + record['ms']
+        for name, ms in per_stage.items():
+            samples.setdefault(name, []).append(ms)
+    rows = [(name, len(v), *np.percentile(v, [50, 95])) for name, v in samples.items()]
+    return pd.DataFrame(rows, columns=columns)
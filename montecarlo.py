@@ -0,0 +1,235 @@
+# montecarlo.py
+"""Simulação de Monte Carlo do prazo com durações de três pontos.
+
+Cada tarefa tem uma distribuição triangular (otimista, provável, pessimista); colunas
+ausentes ou vazias usam a duração principal. As amostras são geradas em lotes como
+matrizes (iterações x tarefas) e cada lote é agendado de uma vez no modo atual:
+- chain_seq: soma das tarefas;
+- phase_sequential: soma, sobre as fases, da maior tarefa de cada fase (reduceat);
+- parallel: maior, sobre as fases, da soma das tarefas de cada fase;
+- predecessors: CPM com ida e volta nível a nível, vetorizado nas iterações.
+
+O custo cresce com iterações x tarefas: as iterações são limitadas a
+MAX_SIMULATION_CELLS / tarefas e a simulação para antes quando os percentis do prazo
+estabilizam (variação abaixo de CONVERGENCE_TOLERANCE entre checagens a cada
+dobro de iterações). Simulation.stopped diz se e por que rodou menos que o pedido.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from agendamento import MODE_CHAIN, MODE_PARALLEL, MODE_PHASE_SEQUENTIAL, MODE_PREDECESSORS, offsets_to_dates
+from cache_lru import LRUTTLCache
+from caminho_critico import build_edges, topological_levels
+from exportacao import schedule_fingerprint
+from ingestao import THREE_POINT_COLUMNS
+
+DEFAULT_ITERATIONS = 100_000
+PERCENTILES = (50, 80, 95)
+# células (iterações x tarefas) por lote: ~16 MB por matriz float64
+BATCH_CELLS = 2_000_000
+# células por simulação: ~1-3 s no modo mais caro (predecessoras)
+MAX_SIMULATION_CELLS = 50_000_000
+MIN_ITERATIONS = 1_000
+# parada antecipada: percentis com variação relativa menor que isto entre
+# CONVERGENCE_MIN_ITERATIONS, 2x, 4x... iterações
+CONVERGENCE_MIN_ITERATIONS = 10_000
+CONVERGENCE_TOLERANCE = 0.001
+STOP_CONVERGED = 'convergencia'
+STOP_CAPPED = 'limite'
+
+# stopped: None (rodou todas as iterações pedidas), STOP_CONVERGED ou STOP_CAPPED
+Simulation = namedtuple('Simulation', ['totals', 'phases', 'iterations', 'stopped'])
+
+_simulation_cache = LRUTTLCache(maxsize=8, ttl=30 * 60)
+
+
+def three_point(df):
+    """Arrays (otimista, provavel, pessimista) por tarefa, ordenados (a <= m <= b)."""
+    base = df['duracao'].astype(float).fillna(1).to_numpy()
+    cols = [df[c].astype(float).fillna(pd.Series(base, index=df.index)).to_numpy() if c in df.columns else base
+            for c in THREE_POINT_COLUMNS]
+    a, m, b = np.sort(np.vstack(cols), axis=0)
+    return a, m, b
+
+
+class _Triangular:
+    """Amostragem pela inversa da CDF triangular (aceita a == b: duração fixa)."""
+
+    def __init__(self, a, m, b):
+        self.a, self.b = a, b
+        width = b - a
+        self.split = np.divide(m - a, width, out=np.zeros_like(width), where=width > 0)
+        self.left = width * (m - a)
+        self.right = width * (b - m)
+
+    def sample(self, rng, rows):
+        u = rng.random((rows, len(self.a)))
+        low = self.a + np.sqrt(u * self.left)
+        high = self.b - np.sqrt((1 - u) * self.right)
+        return np.where(u < self.split, low, high)
+
+
+def _segments(fases):
+    """Início de cada trecho contíguo de fase (df_sel vem agrupado por fase) e o nome da fase."""
+    values = pd.Series(fases).astype(str).to_numpy()
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    return starts, values[starts]
+
+
+class _BatchCPM:
+    """CPM sobre uma matriz de durações (iterações x tarefas), nível a nível.
+
+    As arestas de cada nível viram matrizes (nós x grau) preenchidas com uma linha
+    sentinela (índice n), agrupadas por grau em potências de 2 para limitar o preenchimento.
+    """
+
+    def __init__(self, n, src, dst):
+        levels, _, _ = topological_levels(n, src, dst)
+        level_of = np.empty(n, dtype=np.int64)
+        for i, nodes in enumerate(levels):
+            level_of[nodes] = i
+        self.n = n
+        # ida: predecessoras de cada nó, por nível do nó de destino
+        self.forward = [self._padded(src, dst, level_of[dst] == i) for i in range(1, len(levels))]
+        # volta: sucessoras de cada nó, do último nível para o primeiro
+        self.backward = [self._padded(dst, src, level_of[src] == i) for i in reversed(range(len(levels) - 1))]
+
+    def _padded(self, values, keys, mask):
+        values, keys = values[mask], keys[mask]
+        order = np.argsort(keys, kind='stable')
+        values, keys = values[order], keys[order]
+        nodes, starts, degree = np.unique(keys, return_index=True, return_counts=True)
+        buckets = []
+        width = 2 ** np.ceil(np.log2(degree)).astype(np.int64)
+        for w in np.unique(width):
+            sel = np.flatnonzero(width == w)
+            matrix = np.full((len(sel), w), self.n, dtype=np.int64)
+            col = np.arange(w)
+            filled = col[None, :] < degree[sel, None]
+            matrix[filled] = values[(starts[sel, None] + col[None, :])[filled]]
+            buckets.append((nodes[sel], matrix))
+        return buckets
+
+    def run(self, durations):
+        """es, ef, lf como matrizes (tarefas x iterações) e a duração total de cada iteração."""
+        n, rows = self.n, durations.shape[0]
+        # tarefas nas linhas (cada gather pega linhas contíguas) + linha sentinela
+        dur = np.zeros((n + 1, rows))
+        dur[:n] = durations.T
+        es = np.zeros((n + 1, rows))
+        es[n] = -np.inf
+        for buckets in self.forward:
+            for nodes, preds in buckets:
+                es[nodes] = (es[preds] + dur[preds]).max(axis=1)
+        ef = es[:n] + dur[:n]
+        total = ef.max(axis=0)
+        lf = np.empty((n + 1, rows))
+        lf[:n] = total
+        lf[n] = np.inf
+        for buckets in self.backward:
+            for nodes, succs in buckets:
+                lf[nodes] = (lf[succs] - dur[succs]).min(axis=1)
+        return es[:n], ef, lf[:n], total
+
+
+def max_iterations(n_tasks):
+    """Iterações que cabem em MAX_SIMULATION_CELLS para n_tasks tarefas (no mínimo MIN_ITERATIONS)."""
+    return max(MIN_ITERATIONS, MAX_SIMULATION_CELLS // max(n_tasks, 1))
+
+
+def _converged(previous, current):
+    scale = np.maximum(np.abs(previous), 1e-9)
+    return bool(np.all(np.abs(current - previous) / scale < CONVERGENCE_TOLERANCE))
+
+
+def simulate(df_sel, mode, iterations=DEFAULT_ITERATIONS, seed=None):
+    """Roda a simulação sobre as tarefas agendadas (na ordem do cronograma).
+
+    Retorna Simulation(totals, phases, iterations, stopped): a duração total (dias) de
+    cada iteração e, por fase, a criticidade (fração das iterações em que a fase está
+    no caminho crítico), os percentis da duração da fase e a correlação com a duração
+    total; iterations é quantas rodaram (limite por tarefas ou parada por convergência).
+    Pode levantar caminho_critico.CycleError no modo por predecessoras.
+    """
+    n = len(df_sel)
+    if n == 0:
+        return Simulation(np.zeros(0), pd.DataFrame(columns=['fase', 'criticidade', 'p50_dias', 'p80_dias', 'correlacao']),
+                          0, None)
+    stopped = None
+    if iterations > max_iterations(n):
+        iterations, stopped = max_iterations(n), STOP_CAPPED
+    rng = np.random.default_rng(seed)
+    sampler = _Triangular(*three_point(df_sel))
+    seg_starts, seg_names = _segments(df_sel['fase']) if 'fase' in df_sel.columns else (np.zeros(1, dtype=np.int64), np.array(['']))
+    cpm = None
+    if mode == MODE_PREDECESSORS:
+        src, dst = build_edges(df_sel['numero'], df_sel['predecessores'])
+        cpm = _BatchCPM(n, src, dst)
+
+    batch = max(1, BATCH_CELLS // n)
+    totals, spans, critical = [], [], []
+    done = 0
+    checkpoint, checked = CONVERGENCE_MIN_ITERATIONS, None
+    while done < iterations:
+        rows = min(batch, iterations - done, max(checkpoint - done, 1))
+        d = sampler.sample(rng, rows)
+        if mode == MODE_CHAIN:
+            span = np.add.reduceat(d, seg_starts, axis=1)
+            total = d.sum(axis=1)
+            crit = np.ones_like(span, dtype=bool)
+        elif mode == MODE_PHASE_SEQUENTIAL:
+            span = np.maximum.reduceat(d, seg_starts, axis=1)
+            total = span.sum(axis=1)
+            crit = np.ones_like(span, dtype=bool)
+        elif mode == MODE_PARALLEL:
+            span = np.add.reduceat(d, seg_starts, axis=1)
+            total = span.max(axis=1)
+            crit = np.isclose(span, total[:, None])
+        elif mode == MODE_PREDECESSORS:
+            es, ef, lf, total = cpm.run(d)
+            span = (np.maximum.reduceat(ef, seg_starts, axis=0) - np.minimum.reduceat(es, seg_starts, axis=0)).T
+            crit = np.logical_or.reduceat(np.isclose(lf, ef), seg_starts, axis=0).T
+        else:
+            raise ValueError(f"Modo de agendamento desconhecido: {mode}")
+        totals.append(total)
+        spans.append(span)
+        critical.append(crit.sum(axis=0))
+        done += rows
+        if done >= checkpoint and done < iterations:
+            current = np.percentile(np.concatenate(totals), PERCENTILES)
+            if checked is not None and _converged(checked, current):
+                stopped = STOP_CONVERGED
+                break
+            checked, checkpoint = current, 2 * checkpoint
+
+    totals = np.concatenate(totals)
+    spans = np.concatenate(spans)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = [np.corrcoef(spans[:, j], totals)[0, 1] if spans[:, j].std() > 0 and totals.std() > 0 else 0.0
+                for j in range(spans.shape[1])]
+    phases = pd.DataFrame({
+        'fase': seg_names,
+        'criticidade': np.sum(critical, axis=0) / done,
+        'p50_dias': np.percentile(spans, 50, axis=0),
+        'p80_dias': np.percentile(spans, 80, axis=0),
+        'correlacao': corr,
+    })
+    return Simulation(totals, phases, done, stopped)
+
+
+def completion_percentiles(totals, project_start, calendar=None, percentiles=PERCENTILES):
+    """Tabela percentil -> duração total (dias) e data de término."""
+    values = np.percentile(totals, percentiles) if len(totals) else np.full(len(percentiles), np.nan)
+    return pd.DataFrame({
+        'percentil': [f'P{p}' for p in percentiles],
+        'duracao_dias': values,
+        'termino': offsets_to_dates(project_start, values, calendar, is_end=True),
+    })
+
+
+def get_simulation(df_sel, mode, iterations=DEFAULT_ITERATIONS, seed=0):
+    """simulate() em cache pelo conteúdo do cronograma (semente fixa: resultado estável entre reruns)."""
+    key = (schedule_fingerprint(df_sel), mode, iterations, seed)
+    return _simulation_cache.get_or_compute(key, lambda: simulate(df_sel, mode, iterations, seed))
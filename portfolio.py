@@ -0,0 +1,136 @@
+# portfolio.py
+"""Modo portfólio: vários projetos agendados sobre o mesmo catálogo.
+
+O catálogo é carregado uma vez por processo (cache de ingestao) e só é lido.
+Cada projeto guarda apenas as posições das suas tarefas no catálogo e as datas de
+início/fim (três arrays do tamanho da seleção); colunas de texto só são
+materializadas na exportação. A memória cresce com o número de projetos e de
+tarefas selecionadas, não com projetos x tamanho do catálogo.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from agendamento import MODE_CHAIN, MODE_PREDECESSORS, compute_offsets, schedule, start_end_dates
+from cache_lru import LRUTTLCache
+from exportacao import export_csv
+from ingestao import CATALOG_CACHE_TTL
+from selecao import get_selection_index
+
+PORTFOLIO_CACHE_MAXSIZE = 256
+
+# condicoes: condições aplicadas a todas as fases (vazio = todas as condições da categoria)
+Project = namedtuple('Project', ['nome', 'categoria', 'inicio', 'condicoes'])
+ProjectSchedule = namedtuple('ProjectSchedule', ['project', 'positions', 'start', 'end'])
+
+_project_cache = LRUTTLCache(maxsize=PORTFOLIO_CACHE_MAXSIZE, ttl=CATALOG_CACHE_TTL)
+
+
+def projects_from_table(table, default_start):
+    """Projects a partir da tabela de projetos (nome, categoria, inicio, condicoes "A, B").
+
+    Linhas sem categoria são ignoradas; nomes repetidos ganham um sufixo " (2)", " (3)"...
+    """
+    projects, used = [], set()
+    for i, row in enumerate(table.to_dict('records'), start=1):
+        if pd.isna(row.get('categoria')) or not str(row.get('categoria')).strip():
+            continue
+        base = str(row.get('nome') or '').strip() or f'Projeto {i}'
+        nome, n = base, 2
+        while nome in used:
+            nome, n = f'{base} ({n})', n + 1
+        used.add(nome)
+        conds = tuple(c.strip() for c in str(row.get('condicoes') or '').split(',') if c.strip())
+        inicio = pd.Timestamp(row['inicio']) if pd.notna(row.get('inicio')) else pd.Timestamp(default_start)
+        projects.append(Project(nome, row['categoria'], inicio, conds))
+    return projects
+
+
+def _schedule_project(catalog, project, mode, calendar):
+    index = get_selection_index(catalog)
+    phases = index.phases(project.categoria)
+    conds = list(project.condicoes) or index.conditions(project.categoria)
+    positions = index.positions(project.categoria, {ph: conds for ph in phases}, phases)
+    if mode == MODE_PREDECESSORS:
+        cols = ['fase', 'duracao', 'numero', 'predecessores']
+        scheduled = schedule(catalog.df[cols].take(positions).reset_index(drop=True), phases, project.inicio, mode, calendar)
+        return ProjectSchedule(project, positions, scheduled['start'].to_numpy(), scheduled['end'].to_numpy())
+    # direto sobre os arrays do catálogo: sem copiar colunas nem mapear texto de fase
+    durations = np.nan_to_num(catalog.df['duracao'].to_numpy(dtype=float)[positions], nan=1.0)
+    if mode == MODE_CHAIN:
+        codes = np.zeros(len(positions), dtype=np.int64)
+    else:
+        lookup = np.full(len(index.fases) + 1, -1, dtype=np.int64)
+        lookup[[index.fases.index(ph) for ph in phases]] = np.arange(len(phases))
+        codes = lookup[index.phase_code[positions]]
+    start_off, end_off = compute_offsets(durations, codes, len(phases), mode)
+    start, end = start_end_dates(project.inicio, start_off, end_off, calendar)
+    return ProjectSchedule(project, positions, start, end)
+
+
+def schedule_portfolio(catalog, projects, mode, calendar=None):
+    """Lista de ProjectSchedule, um por projeto (em cache por catálogo, projeto, modo e calendário).
+
+    Pode levantar caminho_critico.CycleError no modo por predecessoras.
+    """
+    cal_key = calendar.key if calendar is not None else None
+    return [
+        _project_cache.get_or_compute(
+            (catalog.key, project, mode, cal_key), lambda p=project: _schedule_project(catalog, p, mode, calendar)
+        )
+        for project in projects
+    ]
+
+
+def portfolio_summary(catalog, results):
+    """(uma linha por projeto, uma linha por projeto x fase) com tarefas, início, fim e duração."""
+    index = get_selection_index(catalog)
+    fases = np.asarray(index.fases + [None], dtype=object)
+    projects, phases = [], []
+    for r in results:
+        has_dates = len(r.start) > 0
+        projects.append({
+            'projeto': r.project.nome,
+            'categoria': r.project.categoria,
+            'tarefas': len(r.positions),
+            'inicio': r.start.min() if has_dates else pd.NaT,
+            'fim': r.end.max() if has_dates else pd.NaT,
+        })
+        if has_dates:
+            # as tarefas de cada projeto vêm agrupadas por fase: um trecho contíguo por fase
+            codes = index.phase_code[r.positions]
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            phases.append(pd.DataFrame({
+                'projeto': r.project.nome,
+                'fase': fases[codes[starts]],
+                'tarefas': np.diff(np.r_[starts, len(codes)]),
+                'inicio': np.minimum.reduceat(r.start, starts),
+                'fim': np.maximum.reduceat(r.end, starts),
+            }))
+    projects = pd.DataFrame(projects, columns=['projeto', 'categoria', 'tarefas', 'inicio', 'fim'])
+    projects['duracao_dias'] = (projects['fim'] - projects['inicio']).dt.days
+    phases = pd.concat(phases, ignore_index=True) if phases else pd.DataFrame(columns=['projeto', 'fase', 'tarefas', 'inicio', 'fim'])
+    return projects, phases
+
+
+def portfolio_frame(catalog, results):
+    """Todas as tarefas de todos os projetos (para exportação), com as colunas do catálogo."""
+    if not results:
+        return catalog.df.iloc[0:0].assign(projeto=[], start=[], end=[])
+    positions = np.concatenate([r.positions for r in results])
+    out = catalog.df.take(positions).reset_index(drop=True)
+    out.insert(0, 'projeto', np.repeat([r.project.nome for r in results], [len(r.positions) for r in results]))
+    out['start'] = np.concatenate([r.start for r in results])
+    out['end'] = np.concatenate([r.end for r in results])
+    return out
+
+
+def portfolio_nbytes(results):
+    """Bytes usados pelos arrays dos projetos (o catálogo compartilhado não entra na conta)."""
+    return sum(r.positions.nbytes + r.start.nbytes + r.end.nbytes for r in results)
+
+
+def export_portfolio_csv(catalog, results):
+    """CSV com as tarefas de todos os projetos (gerado só no clique do download)."""
+    return export_csv(portfolio_frame(catalog, results))
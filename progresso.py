@@ -0,0 +1,119 @@
+# progresso.py
+"""Re-previsão do cronograma a partir do progresso (% concluída e início real).
+
+Parte do cronograma já montado (agendamento / reagendamento), sem refazer a seleção:
+numa passada vetorizada cada tarefa fica só com o trabalho restante
+(duração x (1 - concluído)) e os deslocamentos são recalculados pelo mesmo motor
+(compute_offsets ou caminho crítico) a partir da data de status. Fases já concluídas
+passam a durar zero e as fases seguintes andam conforme o que falta.
+
+- concluída (100%): mantém o início (real, se houver) e termina até a origem (a data de
+  status, ou o início do projeto se a data de status for anterior a ele);
+- em andamento (% > 0 ou com início real): início real (ou o planejado); o restante
+  continua depois das dependências do modo (lógica mantida, "retained logic");
+- não iniciada: não começa antes da data de status.
+Com capacidades por equipe, o restante é nivelado (recursos.leveled_offsets) com as
+mesmas capacidades do cronograma nivelado, em vez de só seguir as dependências.
+As datas do cronograma de origem ficam em inicio_planejado / fim_planejado.
+"""
+import numpy as np
+import pandas as pd
+
+from agendamento import MODE_CHAIN, MODE_PREDECESSORS, compute_offsets, phase_codes, start_end_dates
+from caminho_critico import build_edges, critical_path
+
+STATUS_DONE = 'concluida'
+STATUS_IN_PROGRESS = 'em andamento'
+STATUS_NOT_STARTED = 'nao iniciada'
+
+
+def progress_state(df):
+    """Arrays (fração concluída 0–1, início real datetime64) por tarefa; sem coluna, 0 / NaT."""
+    n = len(df)
+    if 'concluido' in df.columns:
+        done = np.clip(df['concluido'].astype(float).fillna(0.0).to_numpy(), 0.0, 1.0)
+    else:
+        done = np.zeros(n)
+    if 'inicio_real' in df.columns:
+        actual = pd.to_datetime(df['inicio_real'], errors='coerce').to_numpy(dtype='datetime64[ns]')
+    else:
+        actual = np.full(n, np.datetime64('NaT', 'ns'))
+    return done, actual
+
+
+def reforecast(df_sched, phases_ordered, project_start, status_date, mode, calendar=None, capacities=None):
+    """Cópia de df_sched com start/end re-previstos pelo trabalho restante.
+
+    df_sched: cronograma com 'start' e 'end' (saída de schedule / schedule_incremental),
+    na ordem do cronograma. A origem é a data de status (ou o início do projeto, se
+    ainda não começou); com calendário os restantes são dias úteis.
+    Acrescenta inicio_planejado, fim_planejado, restante (dias), situacao e
+    desvio_fim_dias (fim previsto - fim planejado). No modo por predecessoras,
+    folga e critica passam a ser as do trabalho restante. capacities: dict equipe ->
+    pessoas, como em recursos.resource_schedule (None = sem nivelamento).
+    """
+    out = df_sched.copy()
+    if out.empty:
+        out['inicio_planejado'] = out['start']
+        out['fim_planejado'] = out['end']
+        out['restante'] = pd.Series(dtype=float)
+        out['situacao'] = pd.Series(dtype=object)
+        out['desvio_fim_dias'] = pd.Series(dtype=float)
+        return out
+    durations = out['duracao'].astype(float).fillna(1).to_numpy()
+    done, actual = progress_state(out)
+    remaining = durations * (1.0 - done)
+    finished = done >= 1.0
+    started = ~finished & ((done > 0) | ~np.isnat(actual))
+    origin = max(pd.Timestamp(project_start), pd.Timestamp(status_date))
+
+    if capacities is not None:
+        from recursos import leveled_offsets
+
+        # concluídas têm restante zero e não ocupam ninguém; o restante respeita a capacidade
+        start_off, end_off = leveled_offsets(out, remaining, phases_ordered, mode, capacities)[:2]
+    elif mode == MODE_PREDECESSORS:
+        # pode levantar caminho_critico.CycleError
+        src, dst = build_edges(out['numero'], out['predecessores'])
+        cpm = critical_path(remaining, src, dst)
+        start_off, end_off = cpm['es'].to_numpy(), cpm['ef'].to_numpy()
+        out['folga'] = cpm['folga'].to_numpy()
+        out['critica'] = cpm['critica'].to_numpy()
+    else:
+        if mode == MODE_CHAIN:
+            codes = np.zeros(len(out), dtype=np.int64)
+        else:
+            codes = phase_codes(out['fase'], phases_ordered)
+        start_off, end_off = compute_offsets(remaining, codes, len(phases_ordered), mode)
+    forecast_start, forecast_end = start_end_dates(origin, start_off, end_off, calendar)
+
+    planned_start = out['start'].to_numpy(dtype='datetime64[ns]')
+    planned_end = out['end'].to_numpy(dtype='datetime64[ns]')
+    # limite pela origem, não pela data de status: com a data de status antes do início do
+    # projeto, concluídas não podem ir para antes do início
+    cutoff = np.datetime64(origin.to_datetime64(), 'ns')
+    # quem já começou: início real, ou o planejado se não passar da origem
+    begun = np.where(np.isnat(actual), np.minimum(planned_start, cutoff), actual)
+    start = np.where(finished | started, begun, forecast_start)
+    end = np.where(finished, np.maximum(np.minimum(planned_end, cutoff), start), forecast_end)
+
+    out['inicio_planejado'] = planned_start
+    out['fim_planejado'] = planned_end
+    out['start'] = start
+    out['end'] = end
+    out['restante'] = remaining
+    out['situacao'] = np.select([finished, started], [STATUS_DONE, STATUS_IN_PROGRESS], default=STATUS_NOT_STARTED)
+    out['desvio_fim_dias'] = ((end - planned_end) / np.timedelta64(1, 'D')).round(1)
+    return out
+
+
+def forecast_summary(df_forecast):
+    """Contagem por situação, dias restantes e término planejado x previsto do projeto."""
+    counts = df_forecast['situacao'].value_counts()
+    summary = {situacao: int(counts.get(situacao, 0)) for situacao in (STATUS_DONE, STATUS_IN_PROGRESS, STATUS_NOT_STARTED)}
+    summary['restante_dias'] = float(df_forecast['restante'].sum())
+    planned, forecast = df_forecast['fim_planejado'].max(), df_forecast['end'].max()
+    summary['fim_planejado'] = planned
+    summary['fim_previsto'] = forecast
+    summary['deslocamento_fim_dias'] = (forecast - planned).days if pd.notna(planned) and pd.notna(forecast) else 0
+    return summary
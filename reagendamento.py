@@ -0,0 +1,125 @@
+# reagendamento.py
+"""Reagendamento incremental, fase a fase.
+
+Cada fase vira um bloco memoizado por (catálogo, categoria, fase, condições, modo):
+as tarefas selecionadas da fase e seus deslocamentos relativos ao início da fase.
+O cronograma é a concatenação dos blocos, cada um deslocado pelo início da sua fase;
+as datas de cada bloco também ficam em cache por (bloco, início da fase, data de
+início, calendário). Ao mudar as condições de uma fase, só o bloco dela é refeito e
+só os blocos cujo início mudou (as fases seguintes) têm as datas recalculadas.
+Os dois caches dividem o orçamento de memória de sessão (limite em bytes, além do
+número de entradas).
+
+O modo por predecessoras (caminho crítico) liga tarefas entre fases e continua
+sendo calculado de uma vez por agendamento.schedule.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from agendamento import MODE_PARALLEL, MODE_PHASE_SEQUENTIAL, MODE_PREDECESSORS, schedule, start_end_dates
+from cache_lru import LRUTTLCache
+from ingestao import CATALOG_CACHE_TTL, SESSION_MEMORY_BUDGET, catalog_nbytes
+from selecao import get_selection_index
+
+PHASE_CACHE_MAXSIZE = 512
+PHASE_CACHE_MAXBYTES = SESSION_MEMORY_BUDGET // 2  # por cache (blocos e datas)
+
+PhaseBlock = namedtuple('PhaseBlock', ['df', 'start_off', 'end_off', 'span'])
+
+
+def _block_nbytes(block):
+    return catalog_nbytes(block.df) + block.start_off.nbytes + block.end_off.nbytes
+
+
+_block_cache = LRUTTLCache(maxsize=PHASE_CACHE_MAXSIZE, ttl=CATALOG_CACHE_TTL,
+                           maxbytes=PHASE_CACHE_MAXBYTES, sizeof=_block_nbytes)
+_dated_cache = LRUTTLCache(maxsize=PHASE_CACHE_MAXSIZE, ttl=CATALOG_CACHE_TTL,
+                           maxbytes=PHASE_CACHE_MAXBYTES, sizeof=catalog_nbytes)
+
+
+def _conditions_key(conditions):
+    # mesma normalização da seleção: minúsculas, 'sempre' sempre incluída
+    return tuple(sorted({str(c).lower() for c in conditions} | {'sempre'}))
+
+
+def _build_block(index, categoria, phase, conditions, mode):
+    df = index.select(categoria, {phase: conditions}, [phase])
+    durations = df['duracao'].astype(float).fillna(1).to_numpy()
+    if mode == MODE_PHASE_SEQUENTIAL:
+        # tarefas da fase começam juntas; a fase dura o tempo da maior
+        starts = np.zeros(len(durations))
+        span = durations.max() if len(durations) else 0.0
+    else:
+        # chain_seq e parallel: tarefas encadeadas dentro da fase
+        ends = np.cumsum(durations)
+        starts = ends - durations
+        span = ends[-1] if len(ends) else 0.0
+    return PhaseBlock(df, starts, starts + durations, float(span))
+
+
+def _block_key(catalog, categoria, phase, conditions, mode):
+    return (catalog.key, categoria, phase, _conditions_key(conditions), mode)
+
+
+def phase_block(catalog, categoria, phase, conditions, mode):
+    """PhaseBlock da fase (em cache)."""
+    key = _block_key(catalog, categoria, phase, conditions, mode)
+    index = get_selection_index(catalog)
+    return key, _block_cache.get_or_compute(key, lambda: _build_block(index, categoria, phase, conditions, mode))
+
+
+def phase_starts(spans, mode):
+    """Início (em dias) de cada fase a partir da duração de cada uma."""
+    spans = np.asarray(spans, dtype=float)
+    if mode == MODE_PARALLEL:
+        return np.zeros(len(spans))
+    return np.cumsum(spans) - spans
+
+
+def _dated_block(block_key, block, offset, project_start, calendar):
+    key = (block_key, offset, pd.Timestamp(project_start), calendar.key if calendar is not None else None)
+
+    def build():
+        out = block.df.copy()
+        out['start'], out['end'] = start_end_dates(project_start, block.start_off + offset, block.end_off + offset, calendar)
+        return out
+    return _dated_cache.get_or_compute(key, build)
+
+
+def schedule_incremental(catalog, categoria, phase_conditions, phases_ordered, project_start, mode, calendar=None):
+    """Mesmo resultado de schedule(SelectionIndex.select(...), ...), montado por blocos de fase em cache."""
+    if mode == MODE_PREDECESSORS:
+        df_sel = get_selection_index(catalog).select(categoria, phase_conditions, phases_ordered)
+        return schedule(df_sel, phases_ordered, project_start, mode, calendar)
+
+    blocks = [phase_block(catalog, categoria, ph, phase_conditions.get(ph, []), mode) for ph in phases_ordered]
+    offsets = phase_starts([block.span for _, block in blocks], mode)
+    parts = [
+        _dated_block(key, block, float(offset), project_start, calendar)
+        for (key, block), offset in zip(blocks, offsets)
+        if len(block.df)
+    ]
+    if not parts:
+        empty = get_selection_index(catalog).df.iloc[0:0]
+        return schedule(empty, phases_ordered, project_start, mode, calendar)
+    return pd.concat(parts, ignore_index=True)
+
+
+def cached_schedule(catalog, categoria, phase_conditions, phases_ordered, project_start, mode, calendar=None):
+    """schedule_incremental se os blocos de todas as fases já estão em cache; senão None.
+
+    Permite consultar fontes mais lentas (o histórico em disco) só quando a memória falha.
+    """
+    if mode == MODE_PREDECESSORS:
+        return None
+    keys = [_block_key(catalog, categoria, ph, phase_conditions.get(ph, []), mode) for ph in phases_ordered]
+    if not all(key in _block_cache for key in keys):
+        return None
+    return schedule_incremental(catalog, categoria, phase_conditions, phases_ordered, project_start, mode, calendar)
+
+
+def phase_cache_stats():
+    """Estatísticas dos caches de blocos e de datas por fase."""
+    return {'blocos': _block_cache.stats(), 'datas': _dated_cache.stats()}
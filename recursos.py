@@ -0,0 +1,163 @@
+# recursos.py
+"""Agendamento com capacidade por equipe (nivelamento de recursos).
+
+O modo de agendamento vira um grafo de precedência (barreira entre fases no modo
+por fases, cadeia dentro da fase no paralelo, cadeia única no encadeado, ou as
+predecessoras da planilha) e as tarefas são alocadas por lista: um heap de tarefas
+prontas (ordenado por data de liberação e pela ordem do cronograma) e, por equipe,
+um heap com o instante em que cada uma das suas `capacidade` pessoas fica livre.
+Nenhuma equipe passa da sua capacidade em instante algum. Custo O((n + arestas) log n).
+"""
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from agendamento import MODE_CHAIN, MODE_PARALLEL, MODE_PHASE_SEQUENTIAL, MODE_PREDECESSORS, start_end_dates
+from caminho_critico import CycleError, build_edges, csr_adjacency
+
+# capacidade usada para equipes sem limite informado (None = sem limite)
+DEFAULT_CAPACITY = 1
+
+
+def team_names(df):
+    """Equipes distintas da coluna 'equipe' (texto, sem vazios), em ordem alfabética."""
+    if 'equipe' not in df.columns:
+        return []
+    return sorted(df['equipe'].dropna().astype(str).str.strip().replace('', np.nan).dropna().unique().tolist())
+
+
+def precedence_edges(df_sel, phases_ordered, mode):
+    """Arestas (src, dst) do modo de agendamento, com um marco (nó extra) entre fases.
+
+    Retorna (n_nós, src, dst); os nós >= len(df_sel) são marcos de duração zero.
+    """
+    n = len(df_sel)
+    if mode == MODE_PREDECESSORS:
+        src, dst = build_edges(df_sel['numero'], df_sel['predecessores'])
+        return n, src, dst
+    if mode == MODE_CHAIN:
+        idx = np.arange(n - 1)
+        return n, idx, idx + 1
+    order = {ph: i for i, ph in enumerate(phases_ordered)}
+    codes = pd.Series(df_sel['fase']).map(order).fillna(-1).to_numpy(dtype=np.int64)
+    if mode == MODE_PARALLEL:
+        # cadeia dentro de cada fase (df_sel vem agrupado por fase)
+        same = (codes[1:] == codes[:-1]) & (codes[1:] >= 0)
+        idx = np.flatnonzero(same)
+        return n, idx, idx + 1
+    if mode == MODE_PHASE_SEQUENTIAL:
+        # marco k = fim da fase k: tarefas da fase k -> marco k -> tarefas da fase k + 1
+        valid = np.flatnonzero(codes >= 0)
+        n_phases = len(phases_ordered)
+        to_marker = (valid, n + codes[valid])
+        after = valid[codes[valid] > 0]
+        from_marker = (n + codes[after] - 1, after)
+        # marcos encadeados: fases vazias não quebram a sequência
+        markers = np.arange(n, n + n_phases - 1)
+        src = np.concatenate([to_marker[0], from_marker[0], markers])
+        dst = np.concatenate([to_marker[1], from_marker[1], markers + 1])
+        return n + n_phases, src, dst
+    raise ValueError(f"Modo de agendamento desconhecido: {mode}")
+
+
+def level_resources(durations, teams, n_nodes, src, dst, capacities):
+    """Alocação por lista com heaps. Retorna (start_offsets, end_offsets, ready_offsets) das tarefas.
+
+    durations/teams: por tarefa (len n <= n_nodes); nós extras são marcos de duração zero.
+    teams: código da equipe de cada tarefa (-1 = sem equipe, sem limite).
+    capacities: lista com a capacidade de cada código de equipe (None = sem limite).
+    """
+    n = len(durations)
+    dur = np.zeros(n_nodes)
+    dur[:n] = durations
+    team = np.full(n_nodes, -1, dtype=np.int64)
+    team[:n] = teams
+    indptr, targets = csr_adjacency(n_nodes, np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64))
+    ip, tg, du, tm = indptr.tolist(), targets.tolist(), dur.tolist(), team.tolist()
+    indegree = np.bincount(np.asarray(dst, dtype=np.int64), minlength=n_nodes).tolist()
+
+    # heap por equipe com o instante em que cada pessoa fica livre
+    free = [None if cap is None else [0.0] * int(cap) for cap in capacities]
+    ready = [0.0] * n_nodes
+    start = [0.0] * n_nodes
+    heap = [(0.0, i) for i in range(n_nodes) if indegree[i] == 0]
+    heapq.heapify(heap)
+    done = 0
+    while heap:
+        r, u = heapq.heappop(heap)
+        done += 1
+        t = tm[u]
+        s = r
+        if t >= 0 and free[t] is not None:
+            earliest = free[t][0]
+            if earliest > s:
+                s = earliest
+            heapq.heapreplace(free[t], s + du[u])
+        start[u] = s
+        f = s + du[u]
+        for v in tg[ip[u]:ip[u + 1]]:
+            if f > ready[v]:
+                ready[v] = f
+            indegree[v] -= 1
+            if not indegree[v]:
+                heapq.heappush(heap, (ready[v], v))
+    if done < n_nodes:
+        remaining = np.flatnonzero(np.asarray(indegree) > 0)
+        raise CycleError(remaining[remaining < n])
+    starts = np.asarray(start[:n])
+    return starts, starts + dur[:n], np.asarray(ready[:n])
+
+
+def resource_schedule(df_sel, phases_ordered, project_start, mode, capacities, calendar=None,
+                      default_capacity=DEFAULT_CAPACITY):
+    """Cronograma respeitando a capacidade de cada equipe.
+
+    capacities: dict equipe -> nº de pessoas (equipes ausentes usam default_capacity;
+    None = sem limite). Tarefas sem equipe não consomem capacidade.
+    Retorna (cronograma com start/end, utilização por equipe).
+    """
+    out = df_sel.copy()
+    durations = out['duracao'].astype(float).fillna(1).to_numpy()
+    start_off, end_off, ready_off, teams, names, caps = leveled_offsets(
+        out, durations, phases_ordered, mode, capacities, default_capacity
+    )
+    out['start'], out['end'] = start_end_dates(project_start, start_off, end_off, calendar)
+    return out, team_utilization(durations, teams, names, caps, start_off, end_off, ready_off)
+
+
+def leveled_offsets(df_sel, durations, phases_ordered, mode, capacities, default_capacity=DEFAULT_CAPACITY):
+    """Deslocamentos nivelados para as durações dadas (ex.: só o trabalho restante).
+
+    Retorna (start_offsets, end_offsets, ready_offsets, códigos de equipe, equipes, capacidades).
+    """
+    names = team_names(df_sel)
+    if names:
+        labels = df_sel['equipe'].astype(str).str.strip().where(df_sel['equipe'].notna())
+        teams = pd.Categorical(labels, categories=names).codes.astype(np.int64)
+    else:
+        teams = np.full(len(df_sel), -1, dtype=np.int64)
+    caps = [capacities.get(name, default_capacity) for name in names]
+    n_nodes, src, dst = precedence_edges(df_sel, phases_ordered, mode)
+    start_off, end_off, ready_off = level_resources(durations, teams, n_nodes, src, dst, caps)
+    return start_off, end_off, ready_off, teams, names, caps
+
+
+def team_utilization(durations, teams, names, caps, start_off, end_off, ready_off):
+    """Carga, capacidade, utilização (carga / capacidade x duração do projeto) e espera por equipe."""
+    makespan = float(end_off.max()) if len(end_off) else 0.0
+    has_team = teams >= 0
+    k = len(names)
+    load = np.bincount(teams[has_team], weights=durations[has_team], minlength=k)
+    count = np.bincount(teams[has_team], minlength=k)
+    wait = np.bincount(teams[has_team], weights=(start_off - ready_off)[has_team], minlength=k)
+    cap = np.array([np.nan if c is None else c for c in caps], dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return pd.DataFrame({
+            'equipe': names,
+            'capacidade': cap,
+            'tarefas': count,
+            'carga_dias': load,
+            'utilizacao': load / (cap * makespan) if makespan else np.zeros(k),
+            'espera_media_dias': np.where(count > 0, wait / np.maximum(count, 1), 0.0),
+        })
@@ -0,0 +1,122 @@
+# selecao.py
+"""Índice de seleção de tarefas, construído uma vez por catálogo.
+
+Categoria, fase e condição viram códigos categóricos, e cada combinação
+(categoria, fase, condição) aponta para as posições das suas linhas. Qualquer
+combinação de filtros da sidebar vira um único `take` no catálogo, sem repetir
+a normalização de texto a cada rerun.
+"""
+import numpy as np
+import pandas as pd
+
+from cache_lru import LRUTTLCache
+from ingestao import CATALOG_CACHE_MAXSIZE, CATALOG_CACHE_TTL
+from medicao import stage
+
+ALL_CATEGORIES = 'Todos'
+
+_index_cache = LRUTTLCache(maxsize=CATALOG_CACHE_MAXSIZE, ttl=CATALOG_CACHE_TTL)
+
+
+class SelectionIndex:
+    """Mapa (categoria, fase, condição em minúsculas) -> posições das linhas do catálogo."""
+
+    def __init__(self, df):
+        self.df = df
+        n = len(df)
+        if 'categoria' in df.columns:
+            categoria = pd.Categorical(df['categoria'])
+        else:
+            categoria = pd.Categorical([None] * n, categories=[])
+        fase = pd.Categorical(df['fase'], categories=pd.unique(df['fase'].dropna()))
+        condicao = df['condicao'].astype(str)
+        cond_lower = pd.Categorical(condicao.str.lower())
+        self.categorias = categoria.categories.tolist()
+        self.fases = fase.categories.tolist()
+        # posição da fase de cada linha em self.fases (-1 = sem fase)
+        self.phase_code = fase.codes.astype(np.int64)
+
+        # ordem do cronograma dentro de cada fase: por número (NaN no fim), estável
+        if 'numero' in df.columns:
+            self._order = np.argsort(df['numero'].rank(method='first', na_option='bottom').to_numpy(), kind='stable')
+        else:
+            self._order = np.arange(n)
+        rank = np.empty(n, dtype=np.int64)
+        rank[self._order] = np.arange(n)
+
+        # grupos (categoria, fase, condição) como trechos de um único lexsort, sem groupby
+        cat_codes, fase_codes, cond_codes = categoria.codes.astype(np.int64), fase.codes.astype(np.int64), cond_lower.codes.astype(np.int64)
+        valid = np.flatnonzero(fase_codes >= 0)
+        by_group = valid[np.lexsort((rank[valid], cond_codes[valid], fase_codes[valid], cat_codes[valid]))]
+        group_keys = np.column_stack([cat_codes[by_group], fase_codes[by_group], cond_codes[by_group]])
+        changes = (group_keys[1:] != group_keys[:-1]).any(axis=1)
+        bounds = np.flatnonzero(np.r_[True, changes, True]) if len(by_group) else np.zeros(1, dtype=np.int64)
+        sorted_ranks = rank[by_group]
+        self._cond_codes = {c: i for i, c in enumerate(cond_lower.categories)}
+        self._groups = {
+            tuple(key): sorted_ranks[start:end]
+            for key, start, end in zip(group_keys[bounds[:-1]].tolist(), bounds[:-1], bounds[1:])
+        }
+
+        # fases (ordem de aparição) e condições (texto original) por categoria, a partir
+        # das linhas de cada categoria em ordem (um argsort, não uma máscara por categoria)
+        cond_original = pd.Categorical(condicao)
+        self._phases = {ALL_CATEGORIES: self.fases}
+        self._conditions = {ALL_CATEGORIES: sorted(cond_original.categories.tolist())}
+        by_cat = np.argsort(cat_codes, kind='stable')
+        cat_bounds = np.searchsorted(cat_codes[by_cat], np.arange(len(self.categorias) + 1))
+        for code, cat in enumerate(self.categorias):
+            rows = by_cat[cat_bounds[code]:cat_bounds[code + 1]]
+            in_phase = fase_codes[rows]
+            self._phases[cat] = [self.fases[i] for i in pd.unique(in_phase[in_phase >= 0])]
+            self._conditions[cat] = sorted(cond_original.categories[np.unique(cond_original.codes[rows])].tolist())
+
+    def phases(self, categoria=ALL_CATEGORIES):
+        return self._phases.get(categoria, [])
+
+    def conditions(self, categoria=ALL_CATEGORIES):
+        """Condições (texto original, ordenadas) das tarefas da categoria."""
+        return self._conditions.get(categoria, [])
+
+    def positions(self, categoria, phase_conditions, phases_ordered):
+        """Posições das linhas selecionadas, na ordem do cronograma (fase, numero).
+
+        Tarefas 'Sempre' são sempre incluídas, como no filtro original.
+        """
+        if categoria == ALL_CATEGORIES:
+            cat_codes = list(range(-1, len(self.categorias)))
+        elif categoria in self.categorias:
+            cat_codes = [self.categorias.index(categoria)]
+        else:
+            return np.empty(0, dtype=np.int64)
+        phase_code = {ph: i for i, ph in enumerate(self.fases)}
+        n = len(self.df)
+        keys = []
+        for order, ph in enumerate(phases_ordered):
+            if ph not in phase_code:
+                continue
+            wanted = {str(c).lower() for c in phase_conditions.get(ph, [])} | {'sempre'}
+            for cond in wanted:
+                cond_code = self._cond_codes.get(cond)
+                if cond_code is None:
+                    continue
+                for cat_code in cat_codes:
+                    ranks = self._groups.get((cat_code, phase_code[ph], cond_code))
+                    if ranks is not None:
+                        keys.append(order * n + ranks)
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        keys = np.sort(np.concatenate(keys))
+        return self._order[keys % n]
+
+    def select(self, categoria, phase_conditions, phases_ordered):
+        """DataFrame com as tarefas selecionadas (índice 0..n-1), via um único take."""
+        with stage('selecao', len(self.df)) as s:
+            out = self.df.take(self.positions(categoria, phase_conditions, phases_ordered)).reset_index(drop=True)
+            s.rows_out = len(out)
+        return out
+
+
+def get_selection_index(catalog):
+    """SelectionIndex do catálogo (ingestao.Catalog), construído uma vez por chave."""
+    return _index_cache.get_or_compute(catalog.key, lambda: SelectionIndex(catalog.df))